@@ -0,0 +1,71 @@
+"""
+Feature engineering shared by training and prediction
+Builds the model's feature matrix from raw monthly counts with vectorized
+column operations, so N agents cost one pass instead of N DataFrame builds
+"""
+import numpy as np
+import pandas as pd
+
+
+# Feature columns in the order the model is trained on
+FEATURE_COLUMNS = [
+    'calls',
+    'meetings',
+    'leads',
+    'deals',
+    'total_sales',
+    'monthly_target',
+    'sales_percentage',
+    'conversion_rate',
+    'meeting_to_deal',
+    'calls_to_leads_conversion',
+    'leads_to_meetings_conversion',
+    'meetings_to_deals_conversion',
+    'funnel_efficiency',
+    'activity_velocity'
+]
+
+# Raw inputs expected by build_feature_frame
+BASE_COLUMNS = ['calls', 'meetings', 'leads', 'deals', 'total_sales', 'monthly_target', 'days_in_month']
+
+
+def _percentage(numerator, denominator):
+    """numerator / denominator * 100, or 0 where the denominator is not positive"""
+    numerator = numerator.to_numpy(dtype=float)
+    denominator = denominator.to_numpy(dtype=float)
+    result = np.zeros(len(numerator))
+    np.divide(numerator * 100, denominator, out=result, where=denominator > 0)
+    return result
+
+
+def build_feature_frame(base):
+    """
+    Build the feature DataFrame (FEATURE_COLUMNS order) from a DataFrame
+    with one row per agent-month and the BASE_COLUMNS inputs
+    """
+    features = pd.DataFrame(index=base.index)
+    features['calls'] = base['calls']
+    features['meetings'] = base['meetings']
+    features['leads'] = base['leads']
+    features['deals'] = base['deals']
+    features['total_sales'] = base['total_sales']
+    features['monthly_target'] = base['monthly_target']
+
+    # Calculate additional features
+    features['sales_percentage'] = _percentage(base['total_sales'], base['monthly_target'])
+    features['conversion_rate'] = _percentage(base['deals'], base['leads'])
+    features['meeting_to_deal'] = _percentage(base['deals'], base['meetings'])
+
+    # Funnel-specific conversion rates
+    features['calls_to_leads_conversion'] = _percentage(base['leads'], base['calls'])
+    features['leads_to_meetings_conversion'] = _percentage(base['meetings'], base['leads'])
+    features['meetings_to_deals_conversion'] = _percentage(base['deals'], base['meetings'])
+
+    # Funnel efficiency (overall conversion from calls to deals)
+    features['funnel_efficiency'] = _percentage(base['deals'], base['calls'])
+
+    # Activity velocity (activities per day)
+    activities = base['calls'] + base['meetings'] + base['leads'] + base['deals']
+    features['activity_velocity'] = _percentage(activities, base['days_in_month']) / 100
+
+    return features[FEATURE_COLUMNS]
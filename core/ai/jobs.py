@@ -0,0 +1,132 @@
+"""
+Background training jobs
+Runs AITrainer.train_model in a worker process so a training run never ties up
+a gunicorn request thread. Progress is written to the training_jobs collection
+and polled by the status endpoint.
+"""
+import multiprocessing
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from django.conf import settings
+from core.models import TrainingJob
+
+
+def _init_worker():
+    """Spawned workers start from a fresh interpreter, so configure Django first"""
+    import django
+    django.setup()
+
+
+def _run_training_job(job_id, company_id=None):
+    """
+    Worker entry point - trains the model and records the outcome on the job
+    With company_id, only that company's model is trained; a company with too
+    little history gets the global model trained instead, so a fresh
+    deployment still ends up with a published model
+    Returns (accuracy, company_id of the model published), or None if training failed
+    """
+    from core.ai.trainer import AITrainer, InsufficientHistory
+
+    def report(progress, message):
+        TrainingJob.update_progress(job_id, progress, message)
+
+    TrainingJob.mark_running(job_id)
+    message = None
+    try:
+        try:
+            model, accuracy = AITrainer.train_model(progress_callback=report, company_id=company_id)
+        except InsufficientHistory as e:
+            print(f"⚠️  {e}; training the global model instead")
+            message = f"{e}. The global model was trained instead."
+            company_id = None
+            model, accuracy = AITrainer.train_model(progress_callback=report)
+    except Exception as e:
+        traceback.print_exc()
+        TrainingJob.mark_failed(job_id, str(e))
+        return None
+
+    accuracy = float(accuracy)
+    TrainingJob.mark_succeeded(job_id, accuracy, message)
+    return accuracy, company_id
+
+
+class TrainingJobRunner:
+    """Submits training jobs to a per-process worker pool"""
+
+    _executor = None
+    _lock = threading.RLock()
+
+    @classmethod
+    def get_executor(cls):
+        """
+        Lazily start the worker pool
+        'spawn' keeps the worker free of the web process's threads and its
+        MongoClient, which are not safe to carry across fork()
+        """
+        with cls._lock:
+            if cls._executor is None:
+                cls._executor = ProcessPoolExecutor(
+                    max_workers=settings.TRAINING_JOB_WORKERS,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker
+                )
+            return cls._executor
+
+    @classmethod
+    def _reset_executor(cls):
+        """Drop a broken pool so the next submit starts a new one"""
+        with cls._lock:
+            if cls._executor is not None:
+                cls._executor.shutdown(wait=False)
+                cls._executor = None
+
+    @classmethod
+    def submit(cls, requested_by=None, company_id=None):
+        """
+        Queue a training run and return its job record
+        company_id: train that company's model only (the global model by default)
+        If a run for the same model is already queued or running, that job is
+        returned instead of starting a second one
+        """
+        with cls._lock:
+            active = TrainingJob.get_active(settings.TRAINING_JOB_STALE_SECONDS, company_id)
+            if active:
+                return active
+
+            job_id = f"TRAIN-{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
+            job = TrainingJob.create(job_id, requested_by, company_id)
+
+            try:
+                future = cls.get_executor().submit(_run_training_job, job_id, company_id)
+            except (BrokenProcessPool, RuntimeError) as e:
+                cls._reset_executor()
+                TrainingJob.mark_failed(job_id, str(e))
+                raise
+
+        future.add_done_callback(lambda f: cls._on_done(job_id, company_id, f))
+        return job
+
+    @classmethod
+    def _on_done(cls, job_id, company_id, future):
+        """Runs in the web process when the worker finishes"""
+        error = future.exception()
+        if error is not None:
+            # The worker died before it could record the outcome itself
+            TrainingJob.mark_failed(job_id, str(error) or error.__class__.__name__)
+            if isinstance(error, BrokenProcessPool):
+                cls._reset_executor()
+            return
+
+        outcome = future.result()
+        if outcome is not None:
+            # The global model when the company fell back to it (see _run_training_job)
+            _, published_for = outcome
+            # Pick up the new version now rather than at the next reload check
+            from core.services.predictor import PredictorService
+            PredictorService.reset_model(published_for)
+            # Cached dashboards embed predictions from the previous model
+            from core.cache import ResultCache
+            ResultCache.bump(published_for)
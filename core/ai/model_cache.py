@@ -0,0 +1,117 @@
+"""
+LRU cache of loaded models
+Holds one entry per registry (global or per-company) and evicts the least
+recently used models once their in-memory size (registry.model_nbytes)
+exceeds a byte budget, so a worker serving many tenants only keeps the busy
+ones in memory
+"""
+import threading
+import time
+from collections import OrderedDict
+from core.ai.registry import model_nbytes
+from core.metrics import CACHE_REQUESTS
+
+
+class _CacheEntry:
+    """A loaded model (or None if nothing is published) plus reload bookkeeping"""
+
+    __slots__ = ('loaded', 'stamp', 'checked_at', 'size')
+
+    def __init__(self, loaded, stamp, checked_at, size):
+        self.loaded = loaded
+        self.stamp = stamp
+        self.checked_at = checked_at
+        self.size = size
+
+
+class ModelCache:
+    """Thread-safe LRU of LoadedModel keyed by registry root"""
+
+    def __init__(self, max_bytes, check_interval):
+        self.max_bytes = max_bytes
+        self.check_interval = check_interval
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()  # Guards _entries and _load_locks
+        self._load_locks = {}
+
+    def stats(self):
+        """Cached registries and their sizes, most recently used last"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'total_bytes': sum(entry.size for entry in self._entries.values()),
+                'max_bytes': self.max_bytes,
+                'models': [
+                    {'root': key, 'version': entry.loaded.version if entry.loaded else None, 'bytes': entry.size}
+                    for key, entry in self._entries.items()
+                ]
+            }
+
+    def get(self, registry):
+        """
+        Get the current LoadedModel of a registry, or None if it has none
+        The registry pointer is stat'ed at most every check_interval seconds;
+        when a new version appears one thread loads it while other threads
+        keep serving the previous one
+        """
+        key = registry.root
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        now = time.monotonic()
+        if entry is not None and now - entry.checked_at < self.check_interval:
+            CACHE_REQUESTS.inc('model', 'hit')
+            return entry.loaded
+
+        stamp = registry.pointer_stamp()
+        if entry is not None and stamp == entry.stamp:
+            entry.checked_at = now
+            CACHE_REQUESTS.inc('model', 'hit')
+            return entry.loaded
+        CACHE_REQUESTS.inc('model', 'miss')
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Only one thread reloads a registry; the rest carry on with the old model
+        if not load_lock.acquire(blocking=entry is None):
+            return entry.loaded
+        try:
+            current = self._entries.get(key)
+            if current is not None and current is not entry:
+                return current.loaded  # Another thread already swapped
+
+            if stamp is None:
+                loaded, size = None, 0  # Nothing published (remembered until the next check)
+            else:
+                loaded = registry.load()
+                size = model_nbytes(loaded.model)
+                print(f"Loaded prediction model {registry.root} version {loaded.version}")
+
+            with self._lock:
+                self._entries[key] = _CacheEntry(loaded, stamp, now, size)
+                self._entries.move_to_end(key)
+                self._evict(keep=key)
+            return loaded
+        finally:
+            load_lock.release()
+
+    def _evict(self, keep):
+        """Drop least recently used models until under budget (caller holds _lock)"""
+        total = sum(entry.size for entry in self._entries.values())
+        for key in list(self._entries):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= self._entries.pop(key).size
+
+    def invalidate(self, registry=None):
+        """Forget one registry's model (or all) so the next get() reloads it"""
+        with self._lock:
+            if registry is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(registry.root, None)
@@ -0,0 +1,201 @@
+"""
+Versioned model registry
+Each trained model is published as its own version directory holding a joblib
+artifact and a manifest (feature column order, training metrics). A CURRENT
+pointer file names the live version; every file is written to a temp path and
+renamed into place, so readers only ever see complete artifacts.
+
+Layout:
+    <root>/CURRENT                   -> "20240301120000123456"
+    <root>/<version>/model.joblib
+    <root>/<version>/manifest.json
+    <root>/companies/<company_id>/   -> per-company registry, same layout
+"""
+import json
+import os
+import re
+import shutil
+import tempfile
+from collections import namedtuple
+from datetime import datetime
+import joblib
+import numpy as np
+import sklearn
+from django.conf import settings
+from core.metrics import MODEL_LOAD_DURATION, timed
+
+
+# A loaded model together with the manifest it was published with
+LoadedModel = namedtuple('LoadedModel', ['version', 'model', 'manifest'])
+
+
+def _atomic_write(path, data):
+    """Write bytes to path via a temp file + rename in the same directory"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def model_nbytes(model):
+    """
+    Memory a loaded model holds in numpy arrays, including each fitted tree's
+    node and value arrays (sklearn keeps those in private buffers, so every
+    process that loads a model pays this in full)
+    """
+    estimators = getattr(model, 'estimators_', None)
+    if estimators is None:
+        estimators = [model]
+    total = 0
+    for estimator in np.asarray(estimators, dtype=object).ravel():
+        tree = getattr(estimator, 'tree_', None)
+        if tree is not None:
+            total += sum(value.nbytes for value in tree.__getstate__().values() if isinstance(value, np.ndarray))
+    for value in vars(model).values():
+        if isinstance(value, np.ndarray) and value.dtype != object:
+            total += value.nbytes
+    return total
+
+
+class ModelRegistry:
+    """Publishes and loads versioned model artifacts under one directory"""
+
+    POINTER_FILE = 'CURRENT'
+    MODEL_FILE = 'model.joblib'
+    MANIFEST_FILE = 'manifest.json'
+
+    COMPANIES_DIR = 'companies'
+
+    def __init__(self, root=None):
+        self.root = root or settings.MODEL_REGISTRY_DIR
+
+    @classmethod
+    def for_company(cls, company_id=None):
+        """Registry of a company's own model (the global registry when company_id is None)"""
+        if not company_id:
+            return cls()
+        # Company IDs become directory names; keep them to one safe path segment
+        safe_id = re.sub(r'[^A-Za-z0-9_.-]', '_', str(company_id)).lstrip('.')
+        return cls(os.path.join(settings.MODEL_REGISTRY_DIR, cls.COMPANIES_DIR, safe_id))
+
+    @property
+    def pointer_path(self):
+        return os.path.join(self.root, self.POINTER_FILE)
+
+    def version_dir(self, version):
+        return os.path.join(self.root, version)
+
+    def pointer_stamp(self):
+        """
+        Cheap change marker for the CURRENT pointer (one stat call)
+        Returns None when nothing has been published yet
+        """
+        try:
+            stat = os.stat(self.pointer_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def current_version(self):
+        """Version named by the CURRENT pointer, or None"""
+        try:
+            with open(self.pointer_path) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def list_versions(self):
+        """Published versions, oldest first"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name for name in os.listdir(self.root)
+            if not name.startswith('.')
+            and os.path.exists(os.path.join(self.root, name, self.MANIFEST_FILE))
+        )
+
+    def get_manifest(self, version=None):
+        """Manifest of a version (the current one by default), or None"""
+        version = version or self.current_version()
+        if not version:
+            return None
+        try:
+            with open(os.path.join(self.version_dir(version), self.MANIFEST_FILE)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def publish(self, model, feature_columns, metrics=None, **extra):
+        """
+        Publish a model as a new version and make it current
+        The version directory is built under a hidden temp name and renamed
+        into place, then the CURRENT pointer is swapped
+        Returns the manifest
+        """
+        os.makedirs(self.root, exist_ok=True)
+        version = datetime.now().strftime('%Y%m%d%H%M%S%f')
+
+        manifest = dict(extra)
+        manifest.update({
+            'version': version,
+            'created_at': datetime.now().isoformat(),
+            'feature_columns': list(feature_columns),
+            'metrics': metrics or {},
+            'model_class': type(model).__name__,
+            'sklearn_version': sklearn.__version__
+        })
+
+        staging_dir = tempfile.mkdtemp(dir=self.root, prefix=f'.{version}-')
+        try:
+            # Uncompressed: loads faster, and artifacts are small next to the data
+            joblib.dump(model, os.path.join(staging_dir, self.MODEL_FILE))
+            _atomic_write(
+                os.path.join(staging_dir, self.MANIFEST_FILE),
+                json.dumps(manifest, indent=2, default=str).encode('utf-8')
+            )
+            os.rename(staging_dir, self.version_dir(version))
+        except BaseException:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+
+        _atomic_write(self.pointer_path, version.encode('utf-8'))
+        self.prune(settings.MODEL_REGISTRY_KEEP)
+        return manifest
+
+    @timed(MODEL_LOAD_DURATION)
+    def load(self, version=None):
+        """
+        Load a version (the current one by default) as a LoadedModel
+        Each process holds its own copy of the model (see model_nbytes)
+        """
+        version = version or self.current_version()
+        if not version:
+            raise FileNotFoundError(f"No model has been published to {self.root}")
+
+        manifest = self.get_manifest(version)
+        if manifest is None:
+            raise FileNotFoundError(f"Model version {version} not found in {self.root}")
+
+        model = joblib.load(os.path.join(self.version_dir(version), self.MODEL_FILE))
+        return LoadedModel(version, model, manifest)
+
+    def prune(self, keep):
+        """Delete all but the newest `keep` versions (never the current one)"""
+        if not keep:
+            return []
+        current = self.current_version()
+        removed = []
+        for version in self.list_versions()[:-keep]:
+            if version == current:
+                continue
+            # Workers still mapping the old files keep their open inodes
+            shutil.rmtree(self.version_dir(version), ignore_errors=True)
+            removed.append(version)
+        return removed
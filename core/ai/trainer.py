@@ -2,114 +2,76 @@
 AI Model Training Module
 Trains RandomForest classifier to predict agent performance
 """
-import os
-import pickle
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, classification_report
-from datetime import datetime, timedelta
-from core.models import Agent, Activity, Sale
+from django.conf import settings
+from core.ai.registry import ModelRegistry
+from core.ai.training_data import TrainingDataBuilder
+
+
+class InsufficientHistory(ValueError):
+    """A company has too little history for its own model (it keeps using the global one)"""
 
 
 class AITrainer:
     """AI Training Service using RandomForest"""
     
+    # Legacy single-file model, still loaded when the registry is empty
     MODEL_PATH = 'core/ai/model.pkl'
     
     @staticmethod
-    def generate_training_data():
+    def generate_training_data(lookback_months=TrainingDataBuilder.DEFAULT_LOOKBACK_MONTHS,
+                               source=TrainingDataBuilder.SOURCE_ROLLUP,
+                               chunk_size=TrainingDataBuilder.DEFAULT_CHUNK_SIZE,
+                               company_id=None):
         """
         Generate training data from historical agent performance
-        Returns DataFrame with features and labels
-        """
-        agents = Agent.get_all()
-        training_data = []
+        Returns DataFrame with features and labels (one row per agent per month)
         
-        for agent in agents:
-            agent_id = agent['_id']
-            monthly_target = agent.get('monthly_target', 0)
-            
-            # Get data for the last 6 months
-            for month_offset in range(6):
-                # Calculate date range for this month
-                now = datetime.now()
-                target_month = now.month - month_offset
-                target_year = now.year
-                
-                # Adjust year if needed
-                while target_month <= 0:
-                    target_month += 12
-                    target_year -= 1
-                
-                start_date = datetime(target_year, target_month, 1)
-                
-                # Calculate end date
-                if target_month == 12:
-                    end_date = datetime(target_year + 1, 1, 1)
-                else:
-                    end_date = datetime(target_year, target_month + 1, 1)
-                
-                # Get activity counts
-                calls = Activity.count_by_agent(agent_id, 'call', start_date, end_date)
-                meetings = Activity.count_by_agent(agent_id, 'meeting', start_date, end_date)
-                leads = Activity.count_by_agent(agent_id, 'lead', start_date, end_date)
-                deals = Activity.count_by_agent(agent_id, 'deal', start_date, end_date)
-                
-                # Get total sales
-                total_sales = Sale.get_total_by_agent(agent_id, start_date, end_date)
-                
-                # Calculate additional features
-                sales_percentage = (total_sales / monthly_target * 100) if monthly_target > 0 else 0
-                conversion_rate = (deals / leads * 100) if leads > 0 else 0
-                meeting_to_deal = (deals / meetings * 100) if meetings > 0 else 0
-                
-                # Get funnel-specific conversion rates
-                calls_to_leads = (leads / calls * 100) if calls > 0 else 0
-                leads_to_meetings = (meetings / leads * 100) if leads > 0 else 0
-                meetings_to_deals = (deals / meetings * 100) if meetings > 0 else 0
-                
-                # Calculate funnel efficiency (overall conversion from calls to deals)
-                funnel_efficiency = (deals / calls * 100) if calls > 0 else 0
-                
-                # Calculate activity velocity (activities per day)
-                days_in_month = (end_date - start_date).days
-                activity_velocity = (calls + meetings + leads + deals) / days_in_month if days_in_month > 0 else 0
-                
-                # Determine label (HIT or MISS)
-                label = 1 if total_sales >= monthly_target else 0  # 1 = HIT, 0 = MISS
-                
-                training_data.append({
-                    'calls': calls,
-                    'meetings': meetings,
-                    'leads': leads,
-                    'deals': deals,
-                    'total_sales': total_sales,
-                    'monthly_target': monthly_target,
-                    'sales_percentage': sales_percentage,
-                    'conversion_rate': conversion_rate,
-                    'meeting_to_deal': meeting_to_deal,
-                    'calls_to_leads_conversion': calls_to_leads,
-                    'leads_to_meetings_conversion': leads_to_meetings,
-                    'meetings_to_deals_conversion': meetings_to_deals,
-                    'funnel_efficiency': funnel_efficiency,
-                    'activity_velocity': activity_velocity,
-                    'label': label
-                })
-        
-        return pd.DataFrame(training_data)
+        lookback_months: how many calendar months of history to use
+        source: 'rollup' (agent_monthly_stats) or 'raw' (aggregate activities/sales)
+        company_id: only use this company's agents (all companies by default)
+        """
+        return TrainingDataBuilder.build(lookback_months, chunk_size, source, company_id)
     
     @staticmethod
-    def train_model(test_size=0.2, random_state=42):
+    def train_model(test_size=0.2, random_state=42,
+                    lookback_months=TrainingDataBuilder.DEFAULT_LOOKBACK_MONTHS,
+                    progress_callback=None, company_id=None):
         """
         Train RandomForest model on historical data
         Returns model and accuracy metrics
+        
+        progress_callback(progress, message) is called between steps
+        (progress is 0-100) so background jobs can report where they are
+        
+        company_id: train and publish a model for one company only; raises
+        InsufficientHistory (a ValueError) if fewer than TENANT_MODEL_MIN_SAMPLES
+        of its agent-months have any activity (it keeps using the global model)
         """
-        print("Generating training data...")
-        df = AITrainer.generate_training_data()
+        def report(progress, message):
+            if progress_callback:
+                progress_callback(progress, message)
         
-        if len(df) < 10:
+        print("Generating training data...")
+        report(5, "Generating training data")
+        df = AITrainer.generate_training_data(lookback_months, company_id=company_id)
+        
+        if company_id:
+            # Every agent gets a row per month; zero-filled months are not history
+            active = df[TrainingDataBuilder.COUNT_COLUMNS].sum(axis=1) > 0
+            samples = int(active.sum())
+            min_samples = settings.TENANT_MODEL_MIN_SAMPLES
+            if samples < min_samples or df.loc[active, 'label'].nunique() < 2:
+                raise InsufficientHistory(
+                    f"Company {company_id} has {samples} agent-months with activity "
+                    f"(need {min_samples} covering both HIT and MISS); "
+                    "its predictions will keep using the global model"
+                )
+        elif len(df) < 10:
             print("Warning: Insufficient training data. Need at least 10 samples.")
             print("Generating synthetic training data for demonstration...")
             df = AITrainer.generate_synthetic_data()
@@ -121,6 +83,8 @@ class AITrainer:
         X = df.drop('label', axis=1)
         y = df['label']
         
+        report(40, f"Training on {len(df)} samples")
+        
         # Split data
         X_train, X_test, y_train, y_test = train_test_split(
             X, y, test_size=test_size, random_state=random_state
@@ -136,6 +100,8 @@ class AITrainer:
         )
         model.fit(X_train, y_train)
         
+        report(80, "Evaluating model")
+        
         # Make predictions
         y_pred = model.predict(X_test)
         
@@ -154,15 +120,31 @@ class AITrainer:
         print("\nFeature Importance:")
         print(feature_importance)
         
-        # Save model
-        os.makedirs(os.path.dirname(AITrainer.MODEL_PATH), exist_ok=True)
-        with open(AITrainer.MODEL_PATH, 'wb') as f:
-            pickle.dump(model, f)
+        # Publish model as a new registry version
+        report(95, "Saving model")
+        manifest = AITrainer.save_model(model, list(X.columns), company_id=company_id, metrics={
+            'accuracy': float(accuracy),
+            'n_samples': int(len(df)),
+            'n_train': int(len(X_train)),
+            'n_test': int(len(X_test)),
+            'label_distribution': {str(label): int(count) for label, count in y.value_counts().items()},
+            'feature_importance': dict(zip(X.columns, model.feature_importances_.round(6).tolist()))
+        })
         
-        print(f"\nModel saved to {AITrainer.MODEL_PATH}")
+        print(f"\nModel version {manifest['version']} published")
         
         return model, accuracy
     
+    @staticmethod
+    def save_model(model, feature_columns, metrics=None, company_id=None):
+        """
+        Publish the model to the registry (versioned, atomically swapped in)
+        company_id: publish to that company's registry instead of the global one
+        Returns the version manifest
+        """
+        registry = ModelRegistry.for_company(company_id)
+        return registry.publish(model, feature_columns, metrics, company_id=company_id)
+    
     @staticmethod
     def generate_synthetic_data(n_samples=100):
         """
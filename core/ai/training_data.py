@@ -0,0 +1,206 @@
+"""
+Bulk training-data extraction
+Builds the (agent, month) feature matrix from grouped counts instead of
+issuing count queries per agent per month, and streams it in agent chunks
+so memory stays bounded on long histories; reads go through db.analytics
+
+Only extraction is bounded: RandomForest fits on every row at once, so
+build() still holds the whole matrix (agents x lookback months rows, about
+64 bytes a row with features as float32, e.g. ~40 MB for 100k agents over
+6 months). Callers that can consume chunks should use iter_chunks().
+"""
+from datetime import datetime
+import pandas as pd
+from core.database import db
+from core.models import Agent, AgentMonthlyStats
+from core.ai.features import FEATURE_COLUMNS, build_feature_frame
+
+
+class TrainingDataBuilder:
+    """Chunked feature extraction for AITrainer"""
+
+    DEFAULT_LOOKBACK_MONTHS = 6
+    DEFAULT_CHUNK_SIZE = 500  # Agents per chunk
+
+    # Where monthly counts come from: the agent_monthly_stats rollup, or an
+    # aggregation over the raw activities/sales collections
+    SOURCE_ROLLUP = 'rollup'
+    SOURCE_RAW = 'raw'
+
+    COUNT_COLUMNS = ['calls', 'meetings', 'leads', 'deals', 'total_sales']
+
+    @staticmethod
+    def month_windows(lookback_months, now=None):
+        """
+        Calendar months to extract, newest first
+        Returns list of (month_key, start_date, end_date)
+        """
+        now = now or datetime.now()
+        windows = []
+        for month_offset in range(lookback_months):
+            target_month = now.month - month_offset
+            target_year = now.year
+
+            # Adjust year if needed
+            while target_month <= 0:
+                target_month += 12
+                target_year -= 1
+
+            start_date = datetime(target_year, target_month, 1)
+            if target_month == 12:
+                end_date = datetime(target_year + 1, 1, 1)
+            else:
+                end_date = datetime(target_year, target_month + 1, 1)
+
+            windows.append((AgentMonthlyStats.month_key(start_date), start_date, end_date))
+        return windows
+
+    @staticmethod
+    def _empty_counts():
+        return pd.DataFrame(columns=['agent_id', 'month'] + TrainingDataBuilder.COUNT_COLUMNS)
+
+    @staticmethod
+    def _fetch_counts_rollup(agent_ids, windows):
+        """Monthly counts for a chunk of agents from the rollup (one query)"""
+        rollups = AgentMonthlyStats.get_metrics_for_agents(agent_ids, [month for month, _, _ in windows])
+        if not rollups:
+            return TrainingDataBuilder._empty_counts()
+
+        rows = [
+            dict({field: stats[field] for field in TrainingDataBuilder.COUNT_COLUMNS},
+                 agent_id=agent_id, month=month)
+            for (agent_id, month), stats in rollups.items()
+        ]
+        return pd.DataFrame(rows)
+
+    @staticmethod
+    def _fetch_counts_raw(agent_ids, windows):
+        """
+        Monthly counts for a chunk of agents from the raw collections
+        One aggregation grouped by (agent_id, month, type) over activities and
+        one grouped by (agent_id, month) over sales, pivoted with pandas
+        """
+        window_start = windows[-1][1]
+        window_end = windows[0][2]
+
+        activity_pipeline = [
+            {"$match": {
+                "agent_id": {"$in": agent_ids},
+                "created_at": {"$gte": window_start, "$lt": window_end}
+            }},
+            {"$group": {
+                "_id": {
+                    "agent_id": "$agent_id",
+                    "month": {"$dateToString": {"format": "%Y-%m", "date": "$created_at"}},
+                    "activity_type": "$activity_type"
+                },
+                "count": {"$sum": 1}
+            }}
+        ]
+        activity_rows = [
+            {
+                'agent_id': row['_id']['agent_id'],
+                'month': row['_id']['month'],
+                'field': AgentMonthlyStats.ACTIVITY_FIELDS.get(row['_id'].get('activity_type')),
+                'value': row['count']
+            }
+            for row in db.analytics.activities.aggregate(activity_pipeline, allowDiskUse=True)
+        ]
+
+        sale_pipeline = [
+            {"$match": {
+                "agent_id": {"$in": agent_ids},
+                "date": {"$gte": window_start, "$lt": window_end}
+            }},
+            {"$group": {
+                "_id": {
+                    "agent_id": "$agent_id",
+                    "month": {"$dateToString": {"format": "%Y-%m", "date": "$date"}}
+                },
+                "total": {"$sum": "$amount"}
+            }}
+        ]
+        sale_rows = [
+            {
+                'agent_id': row['_id']['agent_id'],
+                'month': row['_id']['month'],
+                'field': 'total_sales',
+                'value': row['total']
+            }
+            for row in db.analytics.sales.aggregate(sale_pipeline, allowDiskUse=True)
+        ]
+
+        long_counts = pd.DataFrame(activity_rows + sale_rows, columns=['agent_id', 'month', 'field', 'value'])
+        long_counts = long_counts.dropna(subset=['field'])
+        if long_counts.empty:
+            return TrainingDataBuilder._empty_counts()
+
+        counts = long_counts.pivot_table(
+            index=['agent_id', 'month'], columns='field', values='value', aggfunc='sum', fill_value=0
+        )
+        return counts.reindex(columns=TrainingDataBuilder.COUNT_COLUMNS, fill_value=0).reset_index()
+
+    @staticmethod
+    def _build_chunk(agents, counts, windows):
+        """Turn one chunk's monthly counts into feature rows plus labels"""
+        agent_ids = [agent['_id'] for agent in agents]
+        months = [month for month, _, _ in windows]
+
+        # Every agent gets a row for every month, even months without activity
+        grid = pd.MultiIndex.from_product([agent_ids, months], names=['agent_id', 'month'])
+        base = (
+            counts.set_index(['agent_id', 'month'])[TrainingDataBuilder.COUNT_COLUMNS]
+            .reindex(grid, fill_value=0)
+            .reset_index()
+        )
+        base[['calls', 'meetings', 'leads', 'deals']] = base[['calls', 'meetings', 'leads', 'deals']].astype(int)
+        base['total_sales'] = base['total_sales'].astype(float)
+
+        targets = {agent['_id']: agent.get('monthly_target', 0) for agent in agents}
+        days = {month: (end_date - start_date).days for month, start_date, end_date in windows}
+        base['monthly_target'] = base['agent_id'].map(targets)
+        base['days_in_month'] = base['month'].map(days)
+
+        features = build_feature_frame(base)
+
+        # Determine label (HIT or MISS): 1 = HIT, 0 = MISS
+        features['label'] = (base['total_sales'] >= base['monthly_target']).astype(int)
+        return features.reset_index(drop=True)
+
+    @staticmethod
+    def iter_chunks(lookback_months=DEFAULT_LOOKBACK_MONTHS, chunk_size=DEFAULT_CHUNK_SIZE,
+                    source=SOURCE_ROLLUP, company_id=None):
+        """
+        Yield training DataFrames (FEATURE_COLUMNS + label), one per chunk of agents
+        Only one chunk of agents and counts is held in memory at a time
+        """
+        windows = TrainingDataBuilder.month_windows(lookback_months)
+
+        if source == TrainingDataBuilder.SOURCE_RAW:
+            fetch_counts = TrainingDataBuilder._fetch_counts_raw
+        elif source == TrainingDataBuilder.SOURCE_ROLLUP:
+            fetch_counts = TrainingDataBuilder._fetch_counts_rollup
+        else:
+            raise ValueError(f"Invalid source. Must be one of: {[TrainingDataBuilder.SOURCE_ROLLUP, TrainingDataBuilder.SOURCE_RAW]}")
+
+        for agents in Agent.iter_batches(company_id, batch_size=chunk_size):
+            counts = fetch_counts([agent['_id'] for agent in agents], windows)
+            yield TrainingDataBuilder._build_chunk(agents, counts, windows)
+
+    @staticmethod
+    def build(lookback_months=DEFAULT_LOOKBACK_MONTHS, chunk_size=DEFAULT_CHUNK_SIZE,
+              source=SOURCE_ROLLUP, company_id=None):
+        """
+        Build the full training DataFrame by concatenating every chunk
+        Features are kept as float32, the precision RandomForest trains on
+        anyway, so the matrix (held whole, see the module docstring) takes
+        half the memory
+        """
+        float32 = {column: 'float32' for column in FEATURE_COLUMNS}
+        chunks = [
+            chunk.astype(float32)
+            for chunk in TrainingDataBuilder.iter_chunks(lookback_months, chunk_size, source, company_id)
+        ]
+        if not chunks:
+            return pd.DataFrame(columns=FEATURE_COLUMNS + ['label'])
+        return pd.concat(chunks, ignore_index=True)
@@ -0,0 +1,178 @@
+"""
+Authentication cache for the auth and subscription middleware
+Keeps users, API token lookups and subscription status in short-TTL
+in-process caches, and batches last_login writes, so a steady-state request
+costs no auth-related MongoDB round-trips.
+
+Model writes that change these (User.update/deactivate/refresh_token,
+Subscription status changes) invalidate the entries in the current process;
+other worker processes pick the change up when their entry expires
+(AUTH_CACHE_TTL_SECONDS).
+"""
+import atexit
+import threading
+import time
+from datetime import datetime
+from django.conf import settings
+from pymongo import UpdateOne
+from core.cache import TTLCache
+from core.metrics import CACHE_REQUESTS
+from core.database import db
+
+
+class AuthCache:
+    """Short-lived cache of users, API tokens and subscription status"""
+
+    _users = None  # user_id -> user document
+    _tokens = None  # api_token -> user_id
+    _subscriptions = None  # company_id -> is_active
+    _init_lock = threading.Lock()
+
+    @classmethod
+    def _caches(cls):
+        if cls._users is None:
+            with cls._init_lock:
+                if cls._users is None:
+                    ttl = settings.AUTH_CACHE_TTL_SECONDS
+                    maxsize = settings.AUTH_CACHE_MAX_ENTRIES
+                    cls._tokens = TTLCache(ttl, maxsize)
+                    cls._subscriptions = TTLCache(ttl, maxsize)
+                    cls._users = TTLCache(ttl, maxsize)
+        return cls._users, cls._tokens, cls._subscriptions
+
+    @classmethod
+    def get_user(cls, user_id):
+        """Get user by ID (cached)"""
+        from core.models import User
+
+        users, _, _ = cls._caches()
+        user = users.get(user_id)
+        CACHE_REQUESTS.inc('auth_user', 'miss' if user is None else 'hit')
+        if user is None:
+            user = User.get(user_id)
+            if user is None:
+                return None
+            users.set(user_id, user)
+        # Callers get their own copy so request code can't alter the cache
+        return dict(user)
+
+    @classmethod
+    def authenticate_token(cls, token):
+        """
+        Authenticate a user by API token (cached)
+        Equivalent to User.authenticate_by_token; last_login is batched
+        """
+        from core.models import User
+
+        users, tokens, _ = cls._caches()
+        user_id = tokens.get(token)
+        CACHE_REQUESTS.inc('auth_token', 'miss' if user_id is None else 'hit')
+        if user_id is not None:
+            user = cls.get_user(user_id)
+            # The token may have been refreshed or the user deactivated since
+            if user and user.get('api_token') == token and user.get('is_active'):
+                LastLoginBuffer.record(user_id)
+                return user
+            tokens.delete(token)
+
+        user = User.authenticate_by_token(token)
+        if user:
+            tokens.set(token, user['_id'])
+            users.set(user['_id'], user)
+            return dict(user)
+        return None
+
+    @classmethod
+    def is_subscription_active(cls, company_id):
+        """Subscription.is_active (cached)"""
+        from core.models import Subscription
+
+        _, _, subscriptions = cls._caches()
+        active = subscriptions.get(company_id)
+        CACHE_REQUESTS.inc('auth_subscription', 'miss' if active is None else 'hit')
+        if active is None:
+            active = Subscription.is_active(company_id)
+            subscriptions.set(company_id, active)
+        return active
+
+    @classmethod
+    def invalidate_user(cls, user_id):
+        """Drop a cached user (their token mapping is re-checked on next use)"""
+        users, _, _ = cls._caches()
+        users.delete(user_id)
+
+    @classmethod
+    def invalidate_subscription(cls, company_id=None):
+        """Drop a company's cached subscription status (all companies by default)"""
+        _, _, subscriptions = cls._caches()
+        if company_id is None:
+            subscriptions.clear()
+        else:
+            subscriptions.delete(company_id)
+
+    @classmethod
+    def clear(cls):
+        for cache in cls._caches():
+            cache.clear()
+
+
+class LastLoginBuffer:
+    """
+    Coalesces last_login updates in memory and writes them with one
+    bulk_write every LAST_LOGIN_FLUSH_SECONDS from a daemon thread
+    """
+
+    _pending = {}  # user_id -> latest login time
+    _lock = threading.Lock()
+    _thread = None
+
+    @classmethod
+    def record(cls, user_id, when=None):
+        """Remember a login; it is written on the next flush"""
+        with cls._lock:
+            cls._pending[user_id] = when or datetime.now()
+            # (Re)start the flusher lazily - threads don't survive a fork
+            if cls._thread is None or not cls._thread.is_alive():
+                cls._thread = threading.Thread(target=cls._run, name='last-login-flush', daemon=True)
+                cls._thread.start()
+
+    @classmethod
+    def _run(cls):
+        while True:
+            time.sleep(settings.LAST_LOGIN_FLUSH_SECONDS)
+            try:
+                cls.flush()
+            except Exception as e:
+                print(f"⚠️  Could not flush last_login updates: {e}")
+
+    @classmethod
+    def flush(cls):
+        """Write pending last_login times in one round-trip; returns the count"""
+        with cls._lock:
+            pending, cls._pending = cls._pending, {}
+        if not pending:
+            return 0
+
+        try:
+            # $max so an older batch never moves last_login backwards
+            db.users.bulk_write(
+                [UpdateOne({"_id": user_id}, {"$max": {"last_login": when}})
+                 for user_id, when in pending.items()],
+                ordered=False
+            )
+        except Exception:
+            # Put them back (keeping any newer logins) for the next attempt
+            with cls._lock:
+                for user_id, when in pending.items():
+                    if user_id not in cls._pending or cls._pending[user_id] < when:
+                        cls._pending[user_id] = when
+            raise
+        return len(pending)
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        LastLoginBuffer.flush()
+    except Exception:
+        pass
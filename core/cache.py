@@ -0,0 +1,182 @@
+"""
+Caching helpers: an in-process TTL cache, and a versioned result cache for
+dashboard computations (in-process or on Django's cache framework)
+"""
+import threading
+import time
+from collections import OrderedDict
+from core.metrics import CACHE_REQUESTS
+
+
+class TTLCache:
+    """
+    Thread-safe in-process cache whose entries expire after ttl seconds
+    Holds at most maxsize entries, dropping the least recently used first
+    """
+
+    def __init__(self, ttl, maxsize=10000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Get a cached value, or default if missing or expired"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            if item[0] <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return item[1]
+
+    def set(self, key, value, ttl=None):
+        """Cache a value for ttl seconds (the cache default if omitted)"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        """Remove a key (no error if it is not cached)"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class LRUBackend:
+    """Result cache backend kept in this process (TTLCache + version counters)"""
+
+    def __init__(self, ttl, maxsize):
+        self._values = TTLCache(ttl, maxsize)
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self._values.get(key)
+
+    def set(self, key, value, ttl):
+        self._values.set(key, value, ttl)
+
+    def get_versions(self, keys):
+        return [self._versions.get(key, 0) for key in keys]
+
+    def incr_version(self, key):
+        with self._lock:
+            self._versions[key] = self._versions.get(key, 0) + 1
+            return self._versions[key]
+
+
+class DjangoCacheBackend:
+    """
+    Result cache backend on Django's cache framework (e.g. locmem or
+    file-based), so worker processes sharing the cache share invalidation
+    """
+
+    def __init__(self, alias):
+        from django.core.cache import caches
+        self._cache = caches[alias]
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, value, ttl):
+        self._cache.set(key, value, ttl)
+
+    def get_versions(self, keys):
+        found = self._cache.get_many(keys)
+        return [found.get(key, 0) for key in keys]
+
+    def incr_version(self, key):
+        # Counters never expire; add() is a no-op when the key already exists
+        self._cache.add(key, 0, timeout=None)
+        try:
+            return self._cache.incr(key)
+        except ValueError:
+            # Evicted between add() and incr()
+            self._cache.set(key, 1, timeout=None)
+            return 1
+
+
+class ResultCache:
+    """
+    Cache of computed dashboard results keyed by (kind, company_id, node_id, month)
+
+    Every key embeds the company's data version. Writes that change
+    dashboard numbers (activities, sales, lead status, agent reassignment)
+    call bump(company_id), so stale entries are never read again and simply
+    age out. bump() with no company invalidates every company (e.g. after a
+    model retrain or rollup rebuild).
+    """
+
+    _backend = None
+    _lock = threading.Lock()
+
+    GLOBAL_VERSION_KEY = 'results:version:*'
+
+    @classmethod
+    def backend(cls):
+        if cls._backend is None:
+            from django.conf import settings
+            with cls._lock:
+                if cls._backend is None:
+                    if settings.RESULT_CACHE_BACKEND == 'django':
+                        cls._backend = DjangoCacheBackend(settings.RESULT_CACHE_ALIAS)
+                    else:
+                        cls._backend = LRUBackend(settings.RESULT_CACHE_TTL_SECONDS, settings.RESULT_CACHE_MAX_ENTRIES)
+        return cls._backend
+
+    @staticmethod
+    def _company_version_key(company_id):
+        return f'results:version:{company_id}'
+
+    @classmethod
+    def version(cls, company_id):
+        """Current data version of a company (global and company counters)"""
+        global_version, company_version = cls.backend().get_versions(
+            [cls.GLOBAL_VERSION_KEY, cls._company_version_key(company_id)]
+        )
+        return f'{global_version}.{company_version}'
+
+    @classmethod
+    def bump(cls, company_id=None):
+        """Invalidate cached results for a company (all companies by default)"""
+        try:
+            if company_id is None:
+                cls.backend().incr_version(cls.GLOBAL_VERSION_KEY)
+            else:
+                cls.backend().incr_version(cls._company_version_key(company_id))
+        except Exception as e:
+            # A cache outage must not fail the write that triggered it
+            print(f"⚠️  Could not invalidate result cache: {e}")
+
+    @classmethod
+    def get_or_compute(cls, kind, company_id, node_id, month, compute, ttl=None):
+        """
+        Return the cached result for (kind, company_id, node_id, month), or
+        compute and cache it. Cached values are shared: treat them as read-only
+        """
+        from django.conf import settings
+
+        key = f'results:{kind}:{company_id}:{node_id}:{month}:{cls.version(company_id)}'
+        backend = cls.backend()
+        value = backend.get(key)
+        if value is not None:
+            CACHE_REQUESTS.inc('result', 'hit')
+            return value
+
+        CACHE_REQUESTS.inc('result', 'miss')
+        value = compute()
+        if value is not None:
+            backend.set(key, value, ttl or settings.RESULT_CACHE_TTL_SECONDS)
+        return value
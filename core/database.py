@@ -1,38 +1,252 @@
 """
 MongoDB connection manager with lazy initialization
+The client is created on first use with the pool, read preference and write
+concern settings of salesAI.settings (MONGODB_*). A client must not be used
+across fork(): a forked child (e.g. a gunicorn worker) drops the inherited
+one and connects again on first use. gunicorn.conf.py also warms the pool
+when a worker starts. Commands are timed by core.profiling when
+DB_PROFILER_ENABLED.
+
+Analytics services read through db.analytics, the same database with the
+MONGODB_ANALYTICS_* read preference (secondaries with bounded staleness by
+default), so dashboard aggregations don't compete with writes on the primary.
 """
-from pymongo import MongoClient
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pymongo import MongoClient, monitoring
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
 from django.conf import settings
+from core.profiling import profiler
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """
+    Connection pool statistics of this process: connections open and checked
+    out, and how long threads waited to check one out (steady waits mean the
+    pool is too small for the threads sharing it)
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()  # check-out start time per thread
+        self.reset()
+    
+    def reset(self):
+        with self._lock:
+            self.open = 0
+            self.checked_out = 0
+            self.max_checked_out = 0
+            self.checkouts = 0
+            self.checkout_failures = 0
+            self.wait_ms_total = 0.0
+            self.wait_ms_max = 0.0
+            self.pool_clears = 0
+    
+    def _waited_ms(self):
+        started = getattr(self._local, 'started', None)
+        self._local.started = None
+        return (time.perf_counter() - started) * 1000 if started else 0.0
+    
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+    
+    def connection_checked_out(self, event):
+        waited = self._waited_ms()
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+            self.wait_ms_total += waited
+            self.wait_ms_max = max(self.wait_ms_max, waited)
+    
+    def connection_check_out_failed(self, event):
+        waited = self._waited_ms()
+        with self._lock:
+            self.checkout_failures += 1
+            self.wait_ms_total += waited
+            self.wait_ms_max = max(self.wait_ms_max, waited)
+    
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+    
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+    
+    def connection_closed(self, event):
+        with self._lock:
+            self.open -= 1
+    
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+    
+    def pool_created(self, event):
+        pass
+    
+    def pool_ready(self, event):
+        pass
+    
+    def pool_closed(self, event):
+        pass
+    
+    def connection_ready(self, event):
+        pass
+    
+    def stats(self):
+        with self._lock:
+            attempts = self.checkouts + self.checkout_failures
+            return {
+                'open_connections': self.open,
+                'checked_out': self.checked_out,
+                'max_checked_out': self.max_checked_out,
+                'checkouts': self.checkouts,
+                'checkout_failures': self.checkout_failures,
+                'wait_ms_avg': round(self.wait_ms_total / attempts, 3) if attempts else 0.0,
+                'wait_ms_max': round(self.wait_ms_max, 3),
+                'pool_clears': self.pool_clears
+            }
 
 
 class MongoDB:
     _instance = None
     _client = None
     _db = None
+    _analytics = None  # (database it was derived from, analytics handle)
+    _lock = threading.Lock()
+    
+    # MONGODB_ANALYTICS_READ_PREFERENCE values
+    READ_PREFERENCES = {
+        'primary': Primary,
+        'primaryPreferred': PrimaryPreferred,
+        'secondary': Secondary,
+        'secondaryPreferred': SecondaryPreferred,
+        'nearest': Nearest
+    }
+    
+    # Pool statistics of this process (see pool_stats)
+    pool_monitor = PoolMonitor()
     
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(MongoDB, cls).__new__(cls)
         return cls._instance
     
+    @staticmethod
+    def client_options():
+        """MongoClient keyword arguments from settings (unset ones keep the URI/driver defaults)"""
+        write_concern = settings.MONGODB_WRITE_CONCERN
+        if write_concern is not None and str(write_concern).isdigit():
+            write_concern = int(write_concern)
+        
+        # MongoDB Atlas connection strings include SSL by default
+        options = {
+            'serverSelectionTimeoutMS': settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+            'connectTimeoutMS': settings.MONGODB_CONNECT_TIMEOUT_MS,
+            'socketTimeoutMS': settings.MONGODB_SOCKET_TIMEOUT_MS,
+            'maxPoolSize': settings.MONGODB_MAX_POOL_SIZE,
+            'minPoolSize': settings.MONGODB_MIN_POOL_SIZE,
+            'maxIdleTimeMS': settings.MONGODB_MAX_IDLE_TIME_MS,
+            'waitQueueTimeoutMS': settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+            'readPreference': settings.MONGODB_READ_PREFERENCE,
+            'w': write_concern,
+            'journal': settings.MONGODB_JOURNAL,
+            'event_listeners': [MongoDB.pool_monitor]
+        }
+        if settings.DB_PROFILER_ENABLED:
+            options['event_listeners'].append(profiler)
+        return {key: value for key, value in options.items() if value is not None}
+    
+    @staticmethod
+    def analytics_read_preference():
+        """Read preference of db.analytics from settings"""
+        mode = settings.MONGODB_ANALYTICS_READ_PREFERENCE
+        if mode not in MongoDB.READ_PREFERENCES:
+            raise ValueError(f"Unknown MONGODB_ANALYTICS_READ_PREFERENCE: {mode}")
+        if mode == 'primary':
+            return Primary()
+        
+        tags = {}
+        for pair in filter(None, settings.MONGODB_ANALYTICS_TAGS.split(',')):
+            key, _, value = pair.partition(':')
+            tags[key.strip()] = value.strip()
+        return MongoDB.READ_PREFERENCES[mode](
+            tag_sets=[tags] if tags else None,
+            max_staleness=settings.MONGODB_ANALYTICS_MAX_STALENESS_SECONDS
+        )
+    
     def _ensure_connection(self):
-        """Lazy initialization of MongoDB connection"""
+        """Lazy initialization of MongoDB connection (once per process)"""
         if self._client is None:
-            # Simple connection - let pymongo handle SSL automatically
-            # MongoDB Atlas connection strings include SSL by default
-            self._client = MongoClient(
-                settings.MONGODB_URI,
-                serverSelectionTimeoutMS=10000,  # 10 second timeout
-                connectTimeoutMS=20000,  # 20 second connection timeout
-                socketTimeoutMS=20000,   # 20 second socket timeout
-            )
-            self._db = self._client[settings.MONGODB_NAME]
+            with self._lock:
+                if self._client is None:
+                    client = MongoClient(settings.MONGODB_URI, **self.client_options())
+                    self._db = client[settings.MONGODB_NAME]
+                    self._client = client
+    
+    def reset(self):
+        """
+        Forget the client without closing it, so the next use connects again
+        Called in a forked child: the inherited client's sockets and
+        monitor threads belong to the parent
+        """
+        # The lock may have been held by another parent thread at fork time
+        self._lock = threading.Lock()
+        self._client = None
+        self._db = None
+        self._analytics = None
+        self.pool_monitor.reset()
+    
+    def warm_pool(self, connections=None):
+        """
+        Open connections before the first requests (e.g. at worker start)
+        Runs `connections` concurrent pings (MONGODB_WARM_CONNECTIONS by
+        default) so each can take its own connection. Returns pool_stats()
+        """
+        if connections is None:
+            connections = settings.MONGODB_WARM_CONNECTIONS
+        self._ensure_connection()
+        if connections > 0:
+            with ThreadPoolExecutor(max_workers=connections) as executor:
+                list(executor.map(lambda _: self._client.admin.command('ping'), range(connections)))
+        return self.pool_stats()
+    
+    def pool_stats(self):
+        """Pool size settings and connection statistics of this process"""
+        return {
+            'pid': os.getpid(),
+            'connected': self._client is not None,
+            'max_pool_size': settings.MONGODB_MAX_POOL_SIZE,
+            'min_pool_size': settings.MONGODB_MIN_POOL_SIZE,
+            'wait_queue_timeout_ms': settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+            **self.pool_monitor.stats()
+        }
     
     @property
     def db(self):
         self._ensure_connection()
         return self._db
     
+    @property
+    def analytics(self):
+        """
+        The database for analytics reads (see MONGODB_ANALYTICS_*)
+        Shares the client and pool; only the read preference differs, so
+        writes made through it still go to the primary. Results may lag the
+        primary: use the collection properties for reads that must see a
+        write just made.
+        """
+        self._ensure_connection()
+        source = self._db
+        analytics = self._analytics
+        if analytics is None or analytics[0] is not source:
+            analytics = (source, source.with_options(read_preference=self.analytics_read_preference()))
+            self._analytics = analytics
+        return analytics[1]
+    
     @property
     def agents(self):
         self._ensure_connection()
@@ -93,6 +307,16 @@ class MongoDB:
         self._ensure_connection()
         return self._db.users
     
+    @property
+    def agent_monthly_stats(self):
+        self._ensure_connection()
+        return self._db.agent_monthly_stats
+    
+    @property
+    def training_jobs(self):
+        self._ensure_connection()
+        return self._db.training_jobs
+    
     def close(self):
         if self._client:
             self._client.close()
@@ -100,3 +324,7 @@ class MongoDB:
 
 # Singleton instance - connection is created lazily on first use
 db = MongoDB()
+
+# A forked child (e.g. a gunicorn worker) must not use its parent's client
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=db.reset)
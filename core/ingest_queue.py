@@ -0,0 +1,325 @@
+"""
+Write-behind queue for ingested activity and sale events
+Uploads are appended to a local SQLite database (WAL, fsync on commit) and
+acknowledged at once; a writer drains it into MongoDB in batches through
+Activity/Sale.bulk_create, so rollups are updated as usual and MongoDB
+latency never reaches the request.
+
+Delivery is at-least-once: an event stays queued until its batch has been
+written, and a re-delivered event is skipped as a duplicate _id (its
+rollup is applied then if the earlier attempt failed before it). Batches
+that fail (e.g. MongoDB unreachable) are retried with exponential backoff;
+events that keep failing, or that fail validation, move to dead_letters.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from django.conf import settings
+
+
+class QueueFull(Exception):
+    """Raised by enqueue when the backlog is over INGEST_QUEUE_MAX_PENDING"""
+
+
+class IngestQueue:
+    """Durable SQLite event queue with a background MongoDB writer"""
+
+    KINDS = ('activity', 'sale')
+
+    # Event timestamp field per kind (filled at enqueue time when missing)
+    TIME_FIELDS = {'activity': 'created_at', 'sale': 'date'}
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            company_id TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            available_at REAL NOT NULL,
+            last_error TEXT,
+            created_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS events_available ON events (available_at, id);
+        CREATE TABLE IF NOT EXISTS dead_letters (
+            id INTEGER PRIMARY KEY,
+            kind TEXT NOT NULL,
+            company_id TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            attempts INTEGER NOT NULL,
+            error TEXT,
+            created_at REAL NOT NULL,
+            failed_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS dead_letters_company ON dead_letters (company_id, id);
+    """
+
+    _local = threading.local()
+    _thread = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def _connection(cls):
+        """Per-thread (and per-process) connection to the queue database"""
+        conn = getattr(cls._local, 'conn', None)
+        if conn is None or cls._local.pid != os.getpid():
+            path = settings.INGEST_QUEUE_PATH
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            # An acknowledged upload must survive a crash
+            conn.execute('PRAGMA synchronous=FULL')
+            conn.executescript(cls.SCHEMA)
+            cls._local.conn = conn
+            cls._local.pid = os.getpid()
+        return conn
+
+    @classmethod
+    def pending_count(cls, company_id=None):
+        """Events waiting to be written (for one company, or all)"""
+        if company_id is None:
+            row = cls._connection().execute('SELECT COUNT(*) FROM events').fetchone()
+        else:
+            row = cls._connection().execute('SELECT COUNT(*) FROM events WHERE company_id = ?', (company_id,)).fetchone()
+        return row[0]
+
+    @classmethod
+    def dead_letter_count(cls, company_id=None):
+        if company_id is None:
+            row = cls._connection().execute('SELECT COUNT(*) FROM dead_letters').fetchone()
+        else:
+            row = cls._connection().execute('SELECT COUNT(*) FROM dead_letters WHERE company_id = ?', (company_id,)).fetchone()
+        return row[0]
+
+    @classmethod
+    def enqueue(cls, kind, company_id, records):
+        """
+        Durably queue records (dicts) for a company; returns how many were queued
+        Records are committed in chunks as they are read, so a long upload
+        never holds the queue's write lock; a re-sent upload is harmless
+        because events are idempotent on _id
+        Raises QueueFull when the backlog is over INGEST_QUEUE_MAX_PENDING, so
+        callers can shed load (the records are then not queued)
+        """
+        if kind not in cls.KINDS:
+            raise ValueError(f"Unknown event kind: {kind}")
+        if cls.pending_count() >= settings.INGEST_QUEUE_MAX_PENDING:
+            raise QueueFull('Ingestion queue is full, retry later')
+
+        # Events without a timestamp happened now, not when the writer gets to them
+        time_field = cls.TIME_FIELDS[kind]
+        received_at = datetime.now().isoformat()
+
+        count = 0
+        batch = []
+        for record in records:
+            record = dict(record)
+            record.setdefault(time_field, received_at)
+            batch.append((kind, company_id, json.dumps(record, default=str)))
+            if len(batch) >= settings.INGEST_QUEUE_BATCH_SIZE:
+                count += cls._insert_events(batch)
+                batch = []
+        if batch:
+            count += cls._insert_events(batch)
+
+        cls.ensure_writer()
+        return count
+
+    @classmethod
+    def _insert_events(cls, events):
+        """Append (kind, company_id, payload) rows in one transaction"""
+        conn = cls._connection()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany(
+                'INSERT INTO events (kind, company_id, payload, available_at, created_at) VALUES (?, ?, ?, ?, ?)',
+                [(kind, company_id, payload, now, now) for kind, company_id, payload in events]
+            )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return len(events)
+
+    @classmethod
+    def ensure_writer(cls):
+        """Start the in-process writer thread (unless INGEST_QUEUE_WRITER is 'off')"""
+        if settings.INGEST_QUEUE_WRITER != 'thread':
+            return
+        with cls._lock:
+            # (Re)start lazily - threads don't survive a fork
+            if cls._thread is None or not cls._thread.is_alive():
+                cls._thread = threading.Thread(target=cls.run_writer, name='ingest-writer', daemon=True)
+                cls._thread.start()
+
+    @classmethod
+    def run_writer(cls, stop_event=None):
+        """Drain the queue until stopped, sleeping while it is empty"""
+        while stop_event is None or not stop_event.is_set():
+            try:
+                written = cls.process_batch()
+            except Exception as e:
+                print(f"⚠️  Ingestion writer error: {e}")
+                written = 0
+            if not written:
+                time.sleep(settings.INGEST_QUEUE_POLL_SECONDS)
+
+    @classmethod
+    def _claim(cls, batch_size):
+        """
+        Lease the oldest ready events (hidden from other writers until the
+        lease expires, so a crashed writer's events are picked up again)
+        """
+        conn = cls._connection()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            rows = conn.execute(
+                'SELECT id, kind, company_id, payload, attempts FROM events '
+                'WHERE available_at <= ? ORDER BY id LIMIT ?',
+                (now, batch_size)
+            ).fetchall()
+            if rows:
+                conn.executemany(
+                    'UPDATE events SET available_at = ? WHERE id = ?',
+                    [(now + settings.INGEST_QUEUE_LEASE_SECONDS, row[0]) for row in rows]
+                )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return rows
+
+    @classmethod
+    def process_batch(cls, batch_size=None):
+        """
+        Write one batch of queued events to MongoDB
+        Returns the number of events taken off the queue (written or dead-lettered)
+        """
+        from core.models import Activity, Sale
+
+        models = {'activity': Activity, 'sale': Sale}
+        rows = cls._claim(batch_size or settings.INGEST_QUEUE_BATCH_SIZE)
+        if not rows:
+            return 0
+
+        # One bulk_create per (kind, company) group in the batch
+        groups = {}
+        for row in rows:
+            groups.setdefault((row[1], row[2]), []).append(row)
+
+        done = 0
+        for (kind, company_id), events in groups.items():
+            records = [json.loads(event[3]) for event in events]
+            try:
+                result = models[kind].bulk_create(company_id, records)
+            except Exception as e:
+                # Transient (e.g. MongoDB unreachable): retry the group later
+                cls._retry(events, str(e) or e.__class__.__name__)
+                continue
+
+            # Rows rejected by validation will never succeed: dead-letter them
+            rejected = {error['row'] - 1: error['error'] for error in result['errors']}
+            cls._complete(events, rejected)
+            done += len(events)
+        return done
+
+    @classmethod
+    def _complete(cls, events, rejected):
+        """Remove written events; move rejected ones (by position) to dead_letters"""
+        conn = cls._connection()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            dead = [
+                (event[0], event[1], event[2], event[3], event[4] + 1, rejected[position], now)
+                for position, event in enumerate(events) if position in rejected
+            ]
+            cls._insert_dead_letters(conn, dead)
+            conn.executemany('DELETE FROM events WHERE id = ?', [(event[0],) for event in events])
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    @classmethod
+    def _retry(cls, events, error):
+        """Back off a failed group; events out of attempts move to dead_letters"""
+        conn = cls._connection()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            dead = []
+            for event in events:
+                attempts = event[4] + 1
+                if attempts >= settings.INGEST_QUEUE_MAX_ATTEMPTS:
+                    dead.append((event[0], event[1], event[2], event[3], attempts, error, now))
+                else:
+                    delay = min(settings.INGEST_QUEUE_RETRY_SECONDS * 2 ** (attempts - 1), 3600)
+                    conn.execute(
+                        'UPDATE events SET attempts = ?, available_at = ?, last_error = ? WHERE id = ?',
+                        (attempts, now + delay, error, event[0])
+                    )
+            cls._insert_dead_letters(conn, dead)
+            conn.executemany('DELETE FROM events WHERE id = ?', [(row[0],) for row in dead])
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        print(f"⚠️  Ingestion batch failed ({len(events)} events): {error}")
+
+    @staticmethod
+    def _insert_dead_letters(conn, rows):
+        # created_at is carried over from the event row
+        conn.executemany(
+            'INSERT INTO dead_letters (id, kind, company_id, payload, attempts, error, created_at, failed_at) '
+            'SELECT id, kind, company_id, payload, ?, ?, created_at, ? FROM events WHERE id = ?',
+            [(attempts, error, failed_at, event_id) for event_id, _, _, _, attempts, error, failed_at in rows]
+        )
+
+    @classmethod
+    def get_dead_letters(cls, company_id=None, limit=100):
+        """Most recent dead letters as dicts"""
+        query = 'SELECT id, kind, company_id, payload, attempts, error, failed_at FROM dead_letters'
+        params = ()
+        if company_id is not None:
+            query += ' WHERE company_id = ?'
+            params = (company_id,)
+        query += ' ORDER BY id DESC LIMIT ?'
+        rows = cls._connection().execute(query, params + (limit,)).fetchall()
+        return [
+            {
+                'id': row[0],
+                'kind': row[1],
+                'company_id': row[2],
+                'record': json.loads(row[3]),
+                'attempts': row[4],
+                'error': row[5],
+                'failed_at': datetime.fromtimestamp(row[6]).isoformat()
+            }
+            for row in rows
+        ]
+
+    @classmethod
+    def requeue_dead_letters(cls, company_id=None):
+        """Move dead letters back onto the queue (e.g. after fixing an agent); returns the count"""
+        conn = cls._connection()
+        where = ' WHERE company_id = ?' if company_id is not None else ''
+        params = (company_id,) if company_id is not None else ()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            cursor = conn.execute(
+                'INSERT INTO events (kind, company_id, payload, attempts, available_at, created_at) '
+                'SELECT kind, company_id, payload, 0, ?, created_at FROM dead_letters' + where,
+                (time.time(),) + params
+            )
+            conn.execute('DELETE FROM dead_letters' + where, params)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return cursor.rowcount
@@ -0,0 +1,119 @@
+"""
+Django management command to benchmark dashboards and services on a synthetic tenant
+"""
+import json
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from core.utils import benchmark
+from core.utils.bulk_seed import seed_tenant
+
+
+class Command(BaseCommand):
+    help = ('Seed a synthetic company of a given size, then time the analytics services, '
+            'model training and dashboard views and report latency, queries and memory as JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--agents', type=int, default=1000, help='Agents in the tenant (default 1000)')
+        parser.add_argument('--area-managers', type=int, default=50, help='Area managers (default 50)')
+        parser.add_argument('--division-heads', type=int, default=5, help='Division heads (default 5)')
+        parser.add_argument('--months', type=int, default=6, help='Months of activity history (default 6)')
+        parser.add_argument(
+            '--activity-factor', type=int, default=1,
+            help='Multiplies the ~50 activities per agent-month (e.g. 20 with 1000 agents and 6 months for ~6M)',
+        )
+        parser.add_argument('--company', default=None, help='Company ID of the tenant (default BENCH-<agents>)')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed for the tenant data')
+        parser.add_argument('--skip-seed', action='store_true', help='Benchmark an already seeded company')
+        parser.add_argument('--iterations', type=int, default=10, help='Timed calls per target (default 10)')
+        parser.add_argument('--warmup', type=int, default=1, help='Untimed calls per target first (default 1)')
+        parser.add_argument(
+            '--warm', action='store_true',
+            help='Keep the result cache between calls (default: invalidate it, measuring computation)',
+        )
+        parser.add_argument('--skip-training', action='store_true', help='Do not benchmark AITrainer.train_model')
+        parser.add_argument('--skip-views', action='store_true', help='Do not benchmark the dashboard views')
+        parser.add_argument(
+            '--mongomock', action='store_true',
+            help='Use an in-memory mongomock database instead of MONGODB_URI (no query counts)',
+        )
+        parser.add_argument(
+            '--allow-remote', action='store_true',
+            help='Allow seeding a MongoDB that is not on localhost',
+        )
+        parser.add_argument('--output', default=None, help='Write the JSON report to this file (default: stdout)')
+        parser.add_argument('--baseline', default=None, help='Compare against an earlier JSON report')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Allowed p95/memory increase over the baseline as a fraction (default 0.2)',
+        )
+
+    def handle(self, *args, **options):
+        company_id = options['company'] or f"BENCH-{options['agents']}"
+
+        # Before the first query, so every command is counted
+        if options['mongomock']:
+            try:
+                benchmark.use_mongomock()
+            except RuntimeError as e:
+                raise CommandError(str(e))
+            backend, counter = 'mongomock', None
+        else:
+            if not options['allow_remote'] and not benchmark.is_local_uri(settings.MONGODB_URI):
+                raise CommandError('MONGODB_URI is not a local MongoDB; use --mongomock, or --allow-remote to seed it anyway')
+            backend, counter = 'mongodb', benchmark.QueryCounter.install()
+
+        sizes = {
+            'agents': options['agents'],
+            'area_managers': options['area_managers'],
+            'division_heads': options['division_heads'],
+            'months': options['months'],
+            'activity_factor': options['activity_factor'],
+        }
+        seeding = None
+        if not options['skip_seed']:
+            self.stdout.write(f'🌱 Seeding {company_id}: {sizes}...')
+            try:
+                seeding = seed_tenant(company_id, seed=options['seed'], **sizes)
+            except ValueError as e:
+                raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(
+                f'   ✅ {seeding["activities"]:,} activities, {seeding["sales"]:,} sales, '
+                f'{seeding["leads"]:,} leads added in {seeding["seconds"]:.1f}s'
+            ))
+
+        self.stdout.write(f'\n⏱️  Benchmarking {company_id} ({backend})...')
+        try:
+            results = benchmark.run_benchmarks(
+                company_id, counter,
+                iterations=options['iterations'],
+                warmup=options['warmup'],
+                cold=not options['warm'],
+                train=not options['skip_training'],
+                views=not options['skip_views']
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        report = benchmark.report(company_id, results, backend, {
+            'sizes': sizes,
+            'seeding': seeding,
+            'iterations': options['iterations'],
+            'cold': not options['warm'],
+        })
+        output = json.dumps(report, indent=2, default=str)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+            self.stdout.write(self.style.SUCCESS(f'\n📄 Report written to {options["output"]}'))
+        else:
+            self.stdout.write(output)
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            regressions = benchmark.compare(results, baseline.get('results', {}), options['tolerance'])
+            if regressions:
+                for regression in regressions:
+                    self.stdout.write(self.style.ERROR(f'   ❌ {regression}'))
+                raise CommandError(f'{len(regressions)} regressions against {options["baseline"]}')
+            self.stdout.write(self.style.SUCCESS(f'   ✅ No regressions against {options["baseline"]}'))
@@ -0,0 +1,47 @@
+"""
+Django management command to create MongoDB indexes declared on the models
+"""
+from django.core.management.base import BaseCommand, CommandError
+from core.models.indexes import ensure_indexes, find_collection_scans
+
+
+class Command(BaseCommand):
+    help = 'Create the MongoDB indexes declared on each model (safe to run repeatedly)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Also explain() every declared query shape and fail if any uses a COLLSCAN',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('🗂️  Ensuring MongoDB indexes...')
+        report = ensure_indexes()
+        
+        failed = 0
+        for entry in report:
+            if entry['status'] == 'ok':
+                self.stdout.write(f"   ✅ {entry['collection']}.{entry['index']}")
+            else:
+                failed += 1
+                self.stdout.write(self.style.ERROR(
+                    f"   ❌ {entry['collection']} {entry['keys']}: {entry['error']}"
+                ))
+        
+        if failed:
+            self.stdout.write(self.style.WARNING(f'   ⚠️  {failed} index(es) could not be created'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'   {len(report)} indexes in place'))
+        
+        if options['check']:
+            self.stdout.write('\n🔍 Checking query plans...')
+            scans = find_collection_scans()
+            for scan in scans:
+                self.stdout.write(self.style.ERROR(
+                    f"   ❌ COLLSCAN on {scan['collection']} ({scan['model']}): "
+                    f"filter={scan['filter']} sort={scan['sort']}"
+                ))
+            if scans or failed:
+                raise CommandError(f'{len(scans)} query shape(s) use a collection scan, {failed} index error(s)')
+            self.stdout.write(self.style.SUCCESS('   ✅ No model query uses a COLLSCAN'))
@@ -0,0 +1,79 @@
+"""
+Django management command to run a local MongoDB replica set for testing read routing
+"""
+import json
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from core.utils.replica_set import DEFAULT_NAME, DEFAULT_PORT, LocalReplicaSet, check_read_routing
+
+
+class Command(BaseCommand):
+    help = ('Start, stop or inspect a local replica set (mongod processes on this machine), '
+            'and check which servers serve the analytics reads (db.analytics)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['start', 'stop', 'status', 'check'])
+        parser.add_argument(
+            '--data-dir', default=os.path.join(settings.BASE_DIR, 'data', 'replica_set'),
+            help='Data directory of the members (default data/replica_set)',
+        )
+        parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port of the first member (default {DEFAULT_PORT})')
+        parser.add_argument('--members', type=int, default=3, help='Number of members (default 3)')
+        parser.add_argument('--name', default=DEFAULT_NAME, help=f'Replica set name (default {DEFAULT_NAME})')
+        parser.add_argument('--mongod', default='mongod', help='mongod binary (default: mongod on PATH)')
+        parser.add_argument(
+            '--company', default=None,
+            help='Company whose analytics reads `check` runs (default DEMO_COMPANY_ID)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            replica_set = LocalReplicaSet(options['data_dir'], options['port'], options['members'],
+                                          options['name'], options['mongod'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        action = options['action']
+        if action == 'start':
+            self.stdout.write(f'🚀 Starting replica set {replica_set.name} on ports {replica_set.ports}...')
+            try:
+                uri = replica_set.start()
+            except RuntimeError as e:
+                raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS('   ✅ Ready. Point the app at it with:'))
+            self.stdout.write(f'   export MONGODB_URI="{uri}"')
+            self.stdout.write('   then seed it (setup_demo) and run `local_replica_set check`')
+
+        elif action == 'stop':
+            stopped = replica_set.stop()
+            self.stdout.write(self.style.SUCCESS(f'🛑 Stopped {len(stopped)} members {stopped}'))
+
+        elif action == 'status':
+            members = replica_set.status()
+            if not members:
+                self.stdout.write(self.style.WARNING(f'⚠️  Replica set {replica_set.name} is not running'))
+            for member in members:
+                self.stdout.write(f"   {member['host']}: {member['state']}")
+
+        else:
+            company_id = options['company'] or settings.DEMO_COMPANY_ID
+            self.stdout.write(f'🔍 Checking read routing for {company_id} on {settings.MONGODB_URI}...')
+            result = check_read_routing(company_id)
+            self.stdout.write(json.dumps(result, indent=2, default=str))
+
+            analytics_servers = set()
+            for name, routes in result['reads'].items():
+                if name.startswith('analytics:'):
+                    analytics_servers.update(routes)
+            if not result['secondaries']:
+                self.stdout.write(self.style.WARNING('   ⚠️  Not a replica set: every read goes to the one server'))
+            else:
+                on_secondaries = analytics_servers & set(result['secondaries'])
+                if on_secondaries:
+                    self.stdout.write(self.style.SUCCESS(f'   ✅ Analytics reads served by {sorted(on_secondaries)}'))
+                else:
+                    self.stdout.write(self.style.WARNING(
+                        '   ⚠️  Analytics reads went to the primary (no eligible secondary, '
+                        'or MONGODB_ANALYTICS_READ_PREFERENCE is primary)'
+                    ))
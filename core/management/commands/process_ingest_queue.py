@@ -0,0 +1,68 @@
+"""
+Django management command to run the ingestion queue writer
+Use with INGEST_QUEUE_WRITER=off to drain the queue from a dedicated process
+"""
+from django.core.management.base import BaseCommand
+from core.ingest_queue import IngestQueue
+
+
+class Command(BaseCommand):
+    help = 'Write queued activity/sale events to MongoDB, or manage dead letters'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the events that are ready now, then exit',
+        )
+        parser.add_argument(
+            '--dead-letters',
+            action='store_true',
+            help='List the most recent dead letters and exit',
+        )
+        parser.add_argument(
+            '--requeue-dead',
+            action='store_true',
+            help='Move dead letters back onto the queue and exit',
+        )
+        parser.add_argument(
+            '--company',
+            dest='company_id',
+            default=None,
+            help='Limit --dead-letters/--requeue-dead to this company ID',
+        )
+
+    def handle(self, *args, **options):
+        company_id = options['company_id']
+
+        if options['dead_letters']:
+            letters = IngestQueue.get_dead_letters(company_id)
+            self.stdout.write(f'☠️  {IngestQueue.dead_letter_count(company_id)} dead letters')
+            for letter in letters:
+                self.stdout.write(
+                    f"   #{letter['id']} {letter['kind']} {letter['company_id']} "
+                    f"{letter['record'].get('_id')}: {letter['error']}"
+                )
+            return
+
+        if options['requeue_dead']:
+            count = IngestQueue.requeue_dead_letters(company_id)
+            self.stdout.write(self.style.SUCCESS(f'   ✅ {count} dead letters requeued'))
+            return
+
+        self.stdout.write(f'📥 {IngestQueue.pending_count()} events pending')
+        if options['once']:
+            total = 0
+            while True:
+                written = IngestQueue.process_batch()
+                if not written:
+                    break
+                total += written
+            self.stdout.write(self.style.SUCCESS(f'   ✅ {total} events processed, {IngestQueue.pending_count()} left'))
+            return
+
+        self.stdout.write('   Writing events (Ctrl+C to stop)...')
+        try:
+            IngestQueue.run_writer()
+        except KeyboardInterrupt:
+            self.stdout.write('   Stopped')
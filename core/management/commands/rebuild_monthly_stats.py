@@ -0,0 +1,40 @@
+"""
+Django management command to rebuild the agent_monthly_stats rollup from history
+"""
+from django.core.management.base import BaseCommand
+from core.models import AgentMonthlyStats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the agent_monthly_stats rollup from the raw activities and sales collections'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--company',
+            dest='company_id',
+            default=None,
+            help='Only rebuild rollups for this company ID',
+        )
+        parser.add_argument(
+            '--if-empty',
+            action='store_true',
+            help='Only build the rollup if it is empty but activities/sales exist '
+                 '(release step for deployments that predate it)',
+        )
+
+    def handle(self, *args, **options):
+        if options['if_empty']:
+            self.stdout.write('📊 Backfilling monthly agent stats if the rollup is empty...')
+            count = AgentMonthlyStats.backfill_if_empty()
+            if count is None:
+                self.stdout.write(self.style.SUCCESS('   ✅ Nothing to do (already built, no history, or running elsewhere)'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'   ✅ {count} rollup documents written'))
+            return
+
+        company_id = options['company_id']
+        scope = f'company {company_id}' if company_id else 'all companies'
+        
+        self.stdout.write(f'📊 Rebuilding monthly agent stats for {scope}...')
+        count = AgentMonthlyStats.rebuild(company_id)
+        self.stdout.write(self.style.SUCCESS(f'   ✅ {count} rollup documents written'))
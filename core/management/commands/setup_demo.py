@@ -1,7 +1,8 @@
 """
 Django management command to set up demo data and train the model
 """
-from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
 from core.utils.sample_data import create_sample_data, clear_all_data
 from core.utils.banking_products_data import create_banking_products, create_sample_leads_and_sales
 from core.ai.trainer import AITrainer
@@ -17,8 +18,34 @@ class Command(BaseCommand):
             action='store_true',
             help='Clear existing data before creating new data',
         )
+        parser.add_argument(
+            '--scale',
+            type=int,
+            default=1,
+            help='Copies of the demo organisation to create (e.g. 350 for ~100k activities)',
+        )
+        parser.add_argument(
+            '--company',
+            default=None,
+            help='Company the demo data belongs to (default: DEMO_COMPANY_ID; other companies get IDs prefixed with the company ID)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=None,
+            help='Random seed (re-running the same seed and scale adds nothing new)',
+        )
+        parser.add_argument(
+            '--skip-training',
+            action='store_true',
+            help='Do not train the AI model after seeding',
+        )
 
     def handle(self, *args, **options):
+        if options['scale'] < 1:
+            raise CommandError('--scale must be at least 1')
+        company_id = options['company'] or settings.DEMO_COMPANY_ID
+        
         self.stdout.write(self.style.SUCCESS('=' * 60))
         self.stdout.write(self.style.SUCCESS('Setting up Sales AI Demo System'))
         self.stdout.write(self.style.SUCCESS('=' * 60))
@@ -32,10 +59,12 @@ class Command(BaseCommand):
             self.stdout.write(self.style.SUCCESS('   ✅ Data cleared!'))
         
         # Step 1: Create organizational hierarchy and agents
-        self.stdout.write('\n📊 Step 1: Creating organizational hierarchy and agents...')
+        self.stdout.write(f'\n📊 Step 1: Creating organizational hierarchy and agents (scale {options["scale"]})...')
         try:
-            create_sample_data()
-            self.stdout.write(self.style.SUCCESS('   ✅ Hierarchy and agents created!'))
+            seeded = create_sample_data(company_id, scale=options['scale'], seed=options['seed'])
+            self.stdout.write(self.style.SUCCESS(
+                f'   ✅ Hierarchy and agents created! ({seeded["activities"]:,} activities in {seeded["seconds"]:.1f}s)'
+            ))
         except Exception as e:
             self.stdout.write(self.style.ERROR(f'   ❌ Error: {e}'))
             if 'duplicate key error' in str(e).lower():
@@ -44,7 +73,7 @@ class Command(BaseCommand):
         # Step 2: Create banking products
         self.stdout.write('\n🏦 Step 2: Creating banking products...')
         try:
-            create_banking_products()
+            create_banking_products(company_id)
             products_count = db.products.count_documents({})
             self.stdout.write(self.style.SUCCESS(f'   ✅ {products_count} products created!'))
         except Exception as e:
@@ -55,7 +84,7 @@ class Command(BaseCommand):
         # Step 3: Create leads and sales
         self.stdout.write('\n📈 Step 3: Creating leads and sales data...')
         try:
-            create_sample_leads_and_sales()
+            create_sample_leads_and_sales(company_id, seed=options['seed'])
             leads_count = db.leads.count_documents({})
             sales_count = db.sales.count_documents({})
             self.stdout.write(self.style.SUCCESS(f'   ✅ {leads_count} leads and {sales_count} sales created!'))
@@ -82,13 +111,16 @@ class Command(BaseCommand):
         
         # Step 5: Train model
         self.stdout.write('\n🤖 Step 4: Training AI model...')
-        try:
-            model, accuracy = AITrainer.train_model()
-            self.stdout.write(self.style.SUCCESS(f'   ✅ Model trained successfully!'))
-            self.stdout.write(self.style.SUCCESS(f'   Accuracy: {accuracy * 100:.2f}%'))
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f'   ❌ Error training model: {e}'))
-            self.stdout.write(self.style.WARNING('   ⚠️  You can train the model later at /train/'))
+        if options['skip_training']:
+            self.stdout.write(self.style.WARNING('   ⏭️  Skipped (--skip-training)'))
+        else:
+            try:
+                model, accuracy = AITrainer.train_model()
+                self.stdout.write(self.style.SUCCESS(f'   ✅ Model trained successfully!'))
+                self.stdout.write(self.style.SUCCESS(f'   Accuracy: {accuracy * 100:.2f}%'))
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f'   ❌ Error training model: {e}'))
+                self.stdout.write(self.style.WARNING('   ⚠️  You can train the model later at /train/'))
         
         self.stdout.write(self.style.SUCCESS('\n' + '=' * 60))
         self.stdout.write(self.style.SUCCESS('✅ Setup complete!'))
@@ -0,0 +1,52 @@
+"""
+Django management command to train the prediction model (global or per company)
+"""
+from django.core.management.base import BaseCommand, CommandError
+from core.ai.trainer import AITrainer
+from core.models import Company
+
+
+class Command(BaseCommand):
+    help = 'Train the global prediction model, or per-company models'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--company',
+            dest='company_id',
+            default=None,
+            help='Train only this company\'s model',
+        )
+        parser.add_argument(
+            '--all-companies',
+            action='store_true',
+            help='Train a model for every active company with enough history',
+        )
+
+    def handle(self, *args, **options):
+        if options['all_companies']:
+            company_ids = [company['_id'] for company in Company.get_all(status='active')]
+        elif options['company_id']:
+            company_ids = [options['company_id']]
+        else:
+            self.stdout.write('🤖 Training global model...')
+            model, accuracy = AITrainer.train_model()
+            self.stdout.write(self.style.SUCCESS(f'   ✅ Global model accuracy: {accuracy * 100:.2f}%'))
+            return
+
+        failures = 0
+        for company_id in company_ids:
+            self.stdout.write(f'🤖 Training model for company {company_id}...')
+            try:
+                model, accuracy = AITrainer.train_model(company_id=company_id)
+            except ValueError as e:
+                # Not enough history: the company keeps using the global model
+                self.stdout.write(self.style.WARNING(f'   ⚠️  Skipped: {e}'))
+                continue
+            except Exception as e:
+                failures += 1
+                self.stdout.write(self.style.ERROR(f'   ❌ Failed: {e}'))
+                continue
+            self.stdout.write(self.style.SUCCESS(f'   ✅ Accuracy: {accuracy * 100:.2f}%'))
+
+        if failures:
+            raise CommandError(f'{failures} company model(s) failed to train')
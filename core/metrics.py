@@ -0,0 +1,260 @@
+"""
+Prometheus metrics
+Counters and histograms exported in the Prometheus text format at /metrics.
+Recording takes no lock: every thread updates its own shard (a dict no other
+thread writes), and the shards are only added up when /metrics is scraped,
+so an observation costs a thread-local lookup and two list updates.
+
+Values are per process. With several gunicorn workers each reports its own
+figures to whichever scrape it answers; run one worker per scrape target if
+exact totals matter.
+"""
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+
+
+# Seconds; request and service latencies
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Seconds; scoring one agent is sub-millisecond once the model is loaded
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+# Seconds; reading a model artifact from disk
+LOAD_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# MongoDB commands per request
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{value}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """A named metric whose values are kept in per-thread shards"""
+
+    TYPE = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.reset()
+        REGISTRY.append(self)
+
+    def reset(self):
+        self._local = threading.local()
+        self._shards = []
+        self._shard_lock = threading.Lock()
+
+    def _shard(self):
+        """This thread's {label values: value} (created on its first update)"""
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._shard_lock:
+                self._shards.append(shard)
+        return shard
+
+    def _snapshots(self):
+        # list() copies a dict in one step under the GIL, while owners keep writing
+        with self._shard_lock:
+            shards = list(self._shards)
+        return [list(shard.items()) for shard in shards]
+
+    def render(self):
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.TYPE}'] + self._samples()
+
+    def _samples(self):
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic counter"""
+
+    TYPE = 'counter'
+
+    def inc(self, *labelvalues, amount=1):
+        shard = self._shard()
+        shard[labelvalues] = shard.get(labelvalues, 0) + amount
+
+    def values(self):
+        """{label values: total} across threads"""
+        totals = {}
+        for items in self._snapshots():
+            for labels, value in items:
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+    def _samples(self):
+        return [
+            f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}'
+            for labels, value in sorted(self.values().items())
+        ]
+
+
+class Histogram(_Metric):
+    """Histogram with fixed bucket upper bounds"""
+
+    TYPE = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labelnames)
+
+    def observe(self, value, *labelvalues):
+        shard = self._shard()
+        counts = shard.get(labelvalues)
+        if counts is None:
+            # One slot per bucket, one for +Inf, then the sum
+            counts = shard[labelvalues] = [0] * (len(self.buckets) + 2)
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def values(self):
+        """{label values: per-bucket counts + [sum]} across threads"""
+        totals = {}
+        for items in self._snapshots():
+            for labels, counts in items:
+                counts = list(counts)
+                total = totals.get(labels)
+                if total is None:
+                    totals[labels] = counts
+                else:
+                    for i, count in enumerate(counts):
+                        total[i] += count
+        return totals
+
+    def _samples(self):
+        lines = []
+        bounds = self.buckets + (float('inf'),)
+        for labels, counts in sorted(self.values().items()):
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = _format_labels(self.labelnames, labels, [('le', _format_value(float(bound)))])
+                lines.append(f'{self.name}_bucket{le} {cumulative}')
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f'{self.name}_sum{label_text} {_format_value(float(counts[-1]))}')
+            lines.append(f'{self.name}_count{label_text} {cumulative}')
+        return lines
+
+
+class GaugeFunction:
+    """Gauge computed at scrape time: fn() returns {label values: value}"""
+
+    TYPE = 'gauge'
+
+    def __init__(self, name, help, labelnames, fn):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.fn = fn
+        REGISTRY.append(self)
+
+    def reset(self):
+        pass
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.TYPE}']
+        for labels, value in sorted(self.fn().items()):
+            lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}')
+        return lines
+
+
+REGISTRY = []
+
+
+def render():
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+def reset():
+    """Forget every recorded value (a forked worker starts from zero)"""
+    for metric in REGISTRY:
+        metric.reset()
+
+
+def timed(histogram, *labelvalues):
+    """Decorator observing the duration of each call in a histogram"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started, *labelvalues)
+        return wrapper
+    return decorator
+
+
+def view_label(request):
+    """URL name of the view that answered a request (never the raw path, to bound label values)"""
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match and match.view_name else 'unmatched'
+
+
+def _cache_hit_ratios():
+    totals = {}
+    for (cache, result), count in CACHE_REQUESTS.values().items():
+        hits, lookups = totals.get(cache, (0, 0))
+        totals[cache] = (hits + (count if result == 'hit' else 0), lookups + count)
+    return {(cache,): hits / lookups for cache, (hits, lookups) in totals.items() if lookups}
+
+
+HTTP_REQUEST_DURATION = Histogram(
+    'salesai_http_request_duration_seconds',
+    'Time to produce a response (streamed bodies excluded), by URL name',
+    ('view', 'method', 'status')
+)
+MONGO_COMMANDS_PER_REQUEST = Histogram(
+    'salesai_mongo_commands_per_request',
+    'MongoDB round-trips per request, by URL name',
+    ('view',), buckets=COUNT_BUCKETS
+)
+SERVICE_DURATION = Histogram(
+    'salesai_service_duration_seconds',
+    'Analytics service call latency, by function',
+    ('function',)
+)
+PREDICT_AGENT_DURATION = Histogram(
+    'salesai_predict_agent_duration_seconds',
+    'PredictorService.predict_agent latency',
+    buckets=FAST_BUCKETS
+)
+MODEL_LOAD_DURATION = Histogram(
+    'salesai_model_load_duration_seconds',
+    'Time to load a published model from the registry',
+    buckets=LOAD_BUCKETS
+)
+CACHE_REQUESTS = Counter(
+    'salesai_cache_requests_total',
+    'Cache lookups by cache and result (hit or miss)',
+    ('cache', 'result')
+)
+CACHE_HIT_RATIO = GaugeFunction(
+    'salesai_cache_hit_ratio',
+    'Hits over lookups since the process started, by cache',
+    ('cache',), _cache_hit_ratios
+)
+
+# A forked child (e.g. a gunicorn worker) must not report its parent's values
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=reset)
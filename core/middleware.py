@@ -1,139 +1,225 @@
 """
 Middleware for authentication and multi-tenancy
 """
+import json
+import logging
+import re
+import time
+from django.conf import settings
 from django.http import JsonResponse
 from django.shortcuts import redirect
-from core.models import User, Subscription
+from core.models import User
+from core.auth_cache import AuthCache
+from core import metrics
+from core.profiling import profiler, query_stats
 
 
-class AuthenticationMiddleware:
-    """Middleware to authenticate users via session or API token"""
+class PathMatcher:
+    """
+    Matches request paths against exact paths and prefixes with one regex
+    compiled up front, instead of a startswith() per entry per request
+    """
     
-    def __init__(self, get_response):
-        self.get_response = get_response
+    def __init__(self, exact=(), prefixes=()):
+        alternatives = [re.escape(path) + r'\Z' for path in exact]
+        alternatives += [re.escape(prefix) for prefix in prefixes]
+        self._regex = re.compile('|'.join(alternatives)) if alternatives else None
     
-    def __call__(self, request):
-        # Public paths that don't require authentication
-        public_paths = [
-            '/',  # Landing page
-            '/register/',
-            '/login/',
-            '/api/register/',
-            '/api/login/',
-            '/api/auth/register/',
-            '/api/auth/login/',
-            '/static/',
-            '/setup-database/',
-            '/check-data/',
-            '/create-test-accounts/',
-        ]
-        
-        # Check if path is public
-        is_public = any(request.path.startswith(path) for path in public_paths)
-        
-        if not is_public:
-            # Try to authenticate via session
-            user_id = request.session.get('user_id')
-            if user_id:
-                user = User.get(user_id)
-                if user and user.get('is_active'):
-                    request.user = user
-                else:
-                    request.user = None
-            else:
-                # Try to authenticate via API token
-                auth_header = request.headers.get('Authorization')
-                if auth_header and auth_header.startswith('Bearer '):
-                    token = auth_header.split(' ')[1]
-                    user = User.authenticate_by_token(token)
-                    request.user = user
-                else:
-                    request.user = None
-            
-            # If not authenticated, redirect to login or return 401
-            if not request.user:
-                # For API requests, return JSON 401
-                if request.path.startswith('/api/'):
-                    return JsonResponse({
-                        'error': 'Authentication required',
-                        'message': 'Please login to access this resource'
-                    }, status=401)
-                # For regular pages, redirect to login
-                else:
-                    return redirect('/login/')
-        else:
-            request.user = None
-        
-        response = self.get_response(request)
-        return response
+    def matches(self, path):
+        return self._regex is not None and self._regex.match(path) is not None
 
 
-class SubscriptionMiddleware:
-    """Middleware to check subscription status"""
+class TenancyMiddleware:
+    """
+    Authentication, subscription check and multi-tenancy in one pass
+    Resolves the user (session, else API token), their company_id and
+    subscription status once per request and keeps them on the request
+    (request.user, request.company_id, request.subscription_active).
+    Public paths skip all of it.
+    """
+    
+    # Served without authentication ('/' is the landing page only, not a prefix).
+    # Django's /admin/ is deliberately not public: without an SQL database it
+    # has no users of its own, so it stays behind the app's login
+    PUBLIC_PATHS = ('/',)
+    PUBLIC_PREFIXES = (
+        '/register/',
+        '/login/',
+        '/api/register/',
+        '/api/login/',
+        '/api/auth/register/',
+        '/api/auth/login/',
+        '/static/',
+        '/setup-database/',
+        '/check-data/',
+        '/create-test-accounts/',
+        '/metrics',  # Prometheus scrapes (METRICS_TOKEN)
+    )
+    
+    # Reachable with an inactive subscription, so it can be renewed
+    SUBSCRIPTION_EXEMPT_PREFIXES = (
+        '/admin/',
+        '/subscription/',
+        '/api/subscription/',
+        '/logout/',
+        '/api/auth/logout/',
+        '/api/auth/user/',
+    )
     
     def __init__(self, get_response):
         self.get_response = get_response
+        self.public = PathMatcher(self.PUBLIC_PATHS, self.PUBLIC_PREFIXES)
+        self.subscription_exempt = PathMatcher(prefixes=self.SUBSCRIPTION_EXEMPT_PREFIXES)
+    
+    @staticmethod
+    def _authenticate(request):
+        """The active user of the session or Bearer API token, or None"""
+        user_id = request.session.get('user_id')
+        if user_id:
+            user = AuthCache.get_user(user_id)
+            return user if user and user.get('is_active') else None
+        
+        auth_header = request.headers.get('Authorization')
+        if auth_header and auth_header.startswith('Bearer '):
+            return AuthCache.authenticate_token(auth_header.split(' ')[1])
+        return None
     
     def __call__(self, request):
-        # Skip for public paths and super admins
-        public_paths = [
-            '/',  # Landing page
-            '/register/',
-            '/login/',
-            '/api/register/',
-            '/api/login/',
-            '/api/auth/register/',
-            '/api/auth/login/',
-            '/static/',
-            '/admin/',
-            '/subscription/manage/',
-            '/subscription/payment/',
-            '/setup-database/',
-            '/check-data/',
-            '/create-test-accounts/',
-        ]
+        request.user = None
+        request.company_id = None
+        request.subscription_active = None
         
-        is_public = any(request.path.startswith(path) for path in public_paths)
+        if self.public.matches(request.path):
+            return self.get_response(request)
         
-        if not is_public and hasattr(request, 'user') and request.user:
-            user = request.user
-            
-            # Super admin bypass
-            if user.get('role') == User.ROLE_SUPER_ADMIN:
-                response = self.get_response(request)
-                return response
-            
-            # Check company subscription
-            company_id = user.get('company_id')
-            if company_id:
-                if not Subscription.is_active(company_id):
+        user = self._authenticate(request)
+        if not user:
+            # For API requests, return JSON 401
+            if request.path.startswith('/api/'):
+                return JsonResponse({
+                    'error': 'Authentication required',
+                    'message': 'Please login to access this resource'
+                }, status=401)
+            # For regular pages, redirect to login
+            return redirect('/login/')
+        
+        request.user = user
+        request.company_id = user.get('company_id')
+        
+        # Super admins are not bound to a subscription
+        if user.get('role') != User.ROLE_SUPER_ADMIN and request.company_id:
+            if not self.subscription_exempt.matches(request.path):
+                request.subscription_active = AuthCache.is_subscription_active(request.company_id)
+                if not request.subscription_active:
                     return JsonResponse({
                         'error': 'Subscription inactive',
                         'message': 'Your company subscription is not active. Please contact your administrator.',
-                        'subscription_url': '/subscription/manage/'
+                        'subscription_url': '/subscription/'
                     }, status=403)
         
+        return self.get_response(request)
+
+
+class MetricsMiddleware:
+    """Records the latency of every request in core.metrics (served at /metrics)"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
         response = self.get_response(request)
+        metrics.HTTP_REQUEST_DURATION.observe(
+            time.perf_counter() - started,
+            metrics.view_label(request), request.method, response.status_code
+        )
         return response
 
 
-class MultiTenantMiddleware:
-    """Middleware to enforce multi-tenant data isolation"""
-    
+class QueryProfilingMiddleware:
+    """
+    Reports the MongoDB cost of each request (see core.profiling): a JSON log
+    line on the core.profiling logger (WARNING for N+1 patterns, INFO
+    otherwise) and a Server-Timing header (db and app durations) for super
+    admins, in DEBUG, or for everyone with DB_PROFILER_SERVER_TIMING.
+    Streamed responses are measured until the last chunk is sent, so they
+    are logged without the header.
+    """
+
     def __init__(self, get_response):
         self.get_response = get_response
-    
+
     def __call__(self, request):
-        # Add company_id to request if user is authenticated
-        if hasattr(request, 'user') and request.user:
-            company_id = request.user.get('company_id')
-            request.company_id = company_id
-        else:
-            request.company_id = None
-        
-        response = self.get_response(request)
+        if not settings.DB_PROFILER_ENABLED:
+            return self.get_response(request)
+
+        profile = profiler.begin()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.end()
+
+        if response.streaming:
+            response.streaming_content = self._stream(request, response, response.streaming_content, profile)
+            return response
+
+        if self._show_timing(request):
+            response['Server-Timing'] = (
+                f'db;dur={profile.db_ms:.2f};desc="{profile.queries} queries, {profile.docs} docs", '
+                f'app;dur={profile.elapsed_ms():.2f}'
+            )
+        self._report(request, response, profile)
         return response
 
+    @staticmethod
+    def _show_timing(request):
+        """Whether the response may reveal its query counts and timings"""
+        if settings.DB_PROFILER_SERVER_TIMING or settings.DEBUG:
+            return True
+        user = getattr(request, 'user', None)
+        return isinstance(user, dict) and user.get('role') == User.ROLE_SUPER_ADMIN
+
+    def _stream(self, request, response, content, profile):
+        content = iter(content)
+        try:
+            while True:
+                profiler.activate(profile)
+                try:
+                    chunk = next(content, None)
+                finally:
+                    profiler.end()
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            self._report(request, response, profile)
+
+    @staticmethod
+    def _report(request, response, profile):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match and match.view_name else request.path
+        metrics.MONGO_COMMANDS_PER_REQUEST.observe(profile.queries, metrics.view_label(request))
+        repeated = profile.repeated_shapes(settings.DB_PROFILER_N_PLUS_ONE_THRESHOLD)
+        if repeated:
+            query_stats.add_patterns(view, repeated)
+
+        level = logging.WARNING if repeated else logging.INFO
+        logging.getLogger('core.profiling').log(level, json.dumps({
+            'event': 'request',
+            'method': request.method,
+            'path': request.path,
+            'view': view,
+            'status': response.status_code,
+            'duration_ms': round(profile.elapsed_ms(), 2),
+            'db_queries': profile.queries,
+            'db_ms': round(profile.db_ms, 2),
+            'db_docs': profile.docs,
+            'n_plus_one': [
+                {'command': key[0], 'collection': key[1], 'count': count}
+                for key, count in repeated.items()
+            ]
+        }))
+
 
 def require_role(required_role):
     """Decorator to require a specific role"""
@@ -9,9 +9,11 @@ from .company import Company
 from .subscription import Subscription
 from .payment import Payment, PaymentMethod
 from .user import User
+from .agent_monthly_stats import AgentMonthlyStats
+from .training_job import TrainingJob
 
 __all__ = [
     'Agent', 'Activity', 'Sale', 'AreaManager', 'DivisionHead', 
     'Product', 'Lead', 'Company', 'Subscription', 'Payment', 
-    'PaymentMethod', 'User'
+    'PaymentMethod', 'User', 'AgentMonthlyStats', 'TrainingJob'
 ]
@@ -3,11 +3,30 @@ Activity model - Represents agent activities (calls, meetings, leads, deals)
 """
 from datetime import datetime
 from core.database import db
+from core.cache import ResultCache
+from core.models import bulk
+from core.models.agent_monthly_stats import AgentMonthlyStats
 
 
 class Activity:
     """Activity Model for tracking calls, meetings, leads, and deals"""
     
+    # MongoDB collection and indexes (created by core.models.indexes.ensure_indexes)
+    COLLECTION = 'activities'
+    INDEXES = [
+        {'keys': [('agent_id', 1), ('activity_type', 1), ('created_at', 1)]},
+        {'keys': [('agent_id', 1), ('created_at', 1)]},
+        {'keys': [('company_id', 1), ('created_at', 1)]}
+    ]
+    
+    # Representative queries checked with explain() by `ensure_indexes --check`
+    QUERY_SHAPES = [
+        {'filter': {'agent_id': 'A', 'activity_type': 'call', 'created_at': {'$gte': datetime(2000, 1, 1)}}},
+        {'filter': {'agent_id': {'$in': ['A', 'B']}, 'created_at': {'$gte': datetime(2000, 1, 1)}}},
+        {'filter': {'agent_id': 'A'}},
+        {'filter': {'company_id': 'C', 'created_at': {'$gte': datetime(2000, 1, 1)}}}
+    ]
+    
     TYPES = ['call', 'meeting', 'lead', 'deal']
     
     @staticmethod
@@ -26,8 +45,56 @@ class Activity:
             "notes": notes
         }
         db.activities.insert_one(activity)
+        
+        # Keep the monthly rollup in step with the raw collection
+        AgentMonthlyStats.record_activity(company_id, agent_id, activity_type, activity["created_at"])
+        ResultCache.bump(company_id)
+        
         return activity
     
+    @staticmethod
+    def bulk_create(company_id, rows, batch_size=None):
+        """
+        Create many activities for a company with unordered insert_many batches
+        rows: dicts with _id, agent_id, activity_type and optional value,
+        notes and created_at (ISO 8601, defaults to now)
+        
+        Idempotent on _id: rows already stored are counted as duplicates.
+        Returns {'received', 'inserted', 'duplicates', 'errors'} (see core.models.bulk)
+        """
+        from django.conf import settings
+        
+        def build_document(row):
+            activity_type = bulk.require(row, "activity_type")
+            if activity_type not in Activity.TYPES:
+                raise ValueError(f"Invalid activity type. Must be one of: {Activity.TYPES}")
+            value = bulk.parse_number(row.get("value"), "value")
+            return {
+                "_id": bulk.require(row, "_id"),
+                "agent_id": bulk.require(row, "agent_id"),
+                "company_id": company_id,
+                "activity_type": activity_type,
+                "value": value if value is not None else 0,
+                "created_at": bulk.parse_datetime(row.get("created_at"), "created_at") or datetime.now(),
+                "notes": row.get("notes") or ""
+            }
+        
+        def on_inserted(activities):
+            # Keep the monthly rollup in step (one bulk_write per batch)
+            increments = {}
+            for activity in activities:
+                AgentMonthlyStats.add_activity(
+                    increments, company_id, activity["agent_id"],
+                    activity["activity_type"], activity["created_at"]
+                )
+            AgentMonthlyStats.record_many(increments)
+            ResultCache.bump(company_id)
+        
+        return bulk.bulk_create(
+            db.activities, company_id, rows, build_document,
+            batch_size or settings.INGEST_BATCH_SIZE, on_inserted
+        )
+    
     @staticmethod
     def get(activity_id):
         """Get activity by ID"""
@@ -51,6 +118,38 @@ class Activity:
         
         return list(db.activities.find(query))
     
+    @staticmethod
+    def get_by_agents(agent_ids, start_date=None, end_date=None):
+        """Get activities for several agents with a single $in query (analytics read)"""
+        query = {"agent_id": {"$in": list(agent_ids)}}
+        
+        if start_date or end_date:
+            date_query = {}
+            if start_date:
+                date_query["$gte"] = start_date
+            if end_date:
+                date_query["$lte"] = end_date
+            query["created_at"] = date_query
+        
+        return list(db.analytics.activities.find(query))
+    
+    @staticmethod
+    def get_recent_by_agents(agent_ids, limit=5):
+        """
+        Latest `limit` activities of each agent in one aggregation (analytics read)
+        Returns dict of agent_id -> activities, newest first
+        """
+        pipeline = [
+            {"$match": {"agent_id": {"$in": list(agent_ids)}}},
+            {"$sort": {"agent_id": 1, "created_at": -1}},
+            {"$group": {"_id": "$agent_id", "activities": {"$push": "$$ROOT"}}},
+            {"$project": {"activities": {"$slice": ["$activities", limit]}}}
+        ]
+        return {
+            row["_id"]: row["activities"]
+            for row in db.analytics.activities.aggregate(pipeline, allowDiskUse=True)
+        }
+    
     @staticmethod
     def count_by_agent(agent_id, activity_type=None, start_date=None, end_date=None):
         """Count activities for a specific agent"""
@@ -72,4 +171,14 @@ class Activity:
     @staticmethod
     def delete(activity_id):
         """Delete an activity"""
-        return db.activities.delete_one({"_id": activity_id})
+        activity = db.activities.find_one({"_id": activity_id})
+        result = db.activities.delete_one({"_id": activity_id})
+        
+        if result.deleted_count and activity.get("created_at"):
+            AgentMonthlyStats.record_activity(
+                activity.get("company_id"), activity["agent_id"],
+                activity.get("activity_type"), activity["created_at"], delta=-1
+            )
+            ResultCache.bump(activity.get("company_id"))
+        
+        return result
@@ -3,11 +3,28 @@ Agent model - Represents a sales agent
 """
 from datetime import datetime
 from core.database import db
+from core.cache import ResultCache
 
 
 class Agent:
     """Sales Agent Model"""
     
+    # MongoDB collection and indexes (created by core.models.indexes.ensure_indexes)
+    COLLECTION = 'agents'
+    INDEXES = [
+        {'keys': [('company_id', 1)]},
+        {'keys': [('company_id', 1), ('_id', 1)]},
+        {'keys': [('area_manager_id', 1)]}
+    ]
+    
+    # Representative queries checked with explain() by `ensure_indexes --check`
+    QUERY_SHAPES = [
+        {'filter': {'company_id': 'C'}},
+        {'filter': {'area_manager_id': 'AM'}},
+        {'filter': {'area_manager_id': {'$in': ['AM', 'AM2']}}},
+        {'filter': {'company_id': 'C', '_id': {'$gt': 'A'}}, 'sort': [('_id', 1)]}
+    ]
+    
     @staticmethod
     def create(agent_id, name, email, monthly_target, company_id, area_manager_id=None):
         """Create a new agent"""
@@ -25,6 +42,7 @@ class Agent:
         # Update subscription agent count
         from core.models.subscription import Subscription
         Subscription.update_agent_count(company_id)
+        ResultCache.bump(company_id)
         
         return agent
     
@@ -41,13 +59,59 @@ class Agent:
             query["company_id"] = company_id
         return list(db.agents.find(query))
     
+    @staticmethod
+    def _page_query(company_id=None, after=None, scope=None):
+        query = {}
+        if company_id:
+            query["company_id"] = company_id
+        if after is not None:
+            query["_id"] = {"$gt": after}
+        if scope:
+            query = {"$and": [query, scope]} if query else dict(scope)
+        return query
+    
+    @staticmethod
+    def get_page(company_id=None, after=None, limit=100, scope=None):
+        """
+        Get up to limit agents in _id order, starting after the agent ID `after`
+        (keyset pagination: pass the last _id of a page to get the next one)
+        scope: extra filter, e.g. OrgGraph.agent_query for the caller
+        """
+        query = Agent._page_query(company_id, after, scope)
+        return list(db.agents.find(query).sort("_id", 1).limit(limit))
+    
+    @staticmethod
+    def iter_batches(company_id=None, batch_size=500):
+        """
+        Iterate over agents in lists of batch_size without loading them all at once
+        Reads through db.analytics (for training; may lag recent writes)
+        """
+        query = Agent._page_query(company_id)
+        
+        batch = []
+        for agent in db.analytics.agents.find(query).sort("_id", 1).batch_size(batch_size):
+            batch.append(agent)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    
     @staticmethod
     def update(agent_id, **kwargs):
         """Update agent information"""
-        return db.agents.update_one(
+        result = db.agents.update_one(
             {"_id": agent_id},
             {"$set": kwargs}
         )
+        
+        # Targets and reassignments (area_manager_id) change hierarchy results
+        if result.modified_count:
+            agent = db.agents.find_one({"_id": agent_id}, {"company_id": 1})
+            if agent:  # Deleted in the meantime: nothing to invalidate (bump(None) would clear every company)
+                ResultCache.bump(agent.get("company_id"))
+        
+        return result
     
     @staticmethod
     def delete(agent_id):
@@ -59,6 +123,8 @@ class Agent:
         if agent and "company_id" in agent:
             from core.models.subscription import Subscription
             Subscription.update_agent_count(agent["company_id"])
+        if result.deleted_count:
+            ResultCache.bump(agent.get("company_id"))
         
         return result
     
@@ -0,0 +1,314 @@
+"""
+Agent Monthly Stats model - Materialized per-agent monthly rollup
+Kept up to date by Activity/Sale writes so dashboards read one small
+document instead of scanning the raw activities and sales collections
+"""
+from datetime import datetime
+from pymongo import ReplaceOne, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from core.database import db
+from core.cache import ResultCache
+
+
+class AgentMonthlyStats:
+    """Monthly rollup of activity counts and sales per agent"""
+
+    # MongoDB collection and indexes (created by core.models.indexes.ensure_indexes)
+    COLLECTION = 'agent_monthly_stats'
+    INDEXES = [
+        {'keys': [('agent_id', 1), ('month', 1)]},
+        {'keys': [('company_id', 1), ('month', 1)]}
+    ]
+
+    # Representative queries checked with explain() by `ensure_indexes --check`
+    QUERY_SHAPES = [
+        {'filter': {'agent_id': 'A', 'month': '2000-01'}},
+        {'filter': {'agent_id': {'$in': ['A', 'B']}, 'month': {'$in': ['2000-01']}}},
+        {'filter': {'company_id': 'C'}}
+    ]
+
+    # Maps activity_type values to rollup counter fields
+    ACTIVITY_FIELDS = {
+        'call': 'calls',
+        'meeting': 'meetings',
+        'lead': 'leads',
+        'deal': 'deals'
+    }
+
+    COUNTER_FIELDS = ['calls', 'meetings', 'leads', 'deals', 'total_sales', 'sales_count']
+
+    REBUILD_BATCH_SIZE = 1000
+
+    # Document that claims the backfill (no agent_id, so never read as stats);
+    # a claim older than BACKFILL_STALE_SECONDS belonged to a process that died
+    BACKFILL_MARKER_ID = 'backfill'
+    BACKFILL_STALE_SECONDS = 3600
+
+    @staticmethod
+    def month_key(date):
+        """Year-month key for a date, e.g. '2024-03'"""
+        return date.strftime('%Y-%m')
+
+    @staticmethod
+    def stats_id(company_id, agent_id, month):
+        """Document ID for a (company_id, agent_id, year-month) rollup"""
+        return f"{company_id}|{agent_id}|{month}"
+
+    @staticmethod
+    def _increment_update(company_id, agent_id, month, increments):
+        """Filter and update document that apply $inc counters to a rollup document"""
+        return (
+            {"_id": AgentMonthlyStats.stats_id(company_id, agent_id, month)},
+            {
+                "$inc": increments,
+                "$set": {"updated_at": datetime.now()},
+                "$setOnInsert": {
+                    "company_id": company_id,
+                    "agent_id": agent_id,
+                    "month": month
+                }
+            }
+        )
+
+    @staticmethod
+    def _increment(company_id, agent_id, month, increments):
+        """Apply $inc counters to a rollup document, creating it if needed"""
+        query, update = AgentMonthlyStats._increment_update(company_id, agent_id, month, increments)
+        return db.agent_monthly_stats.update_one(query, update, upsert=True)
+
+    @staticmethod
+    def record_many(increments):
+        """
+        Apply counters for many rollup documents in one bulk_write
+        increments: dict of (company_id, agent_id, month) -> {field: delta}
+        """
+        if not increments:
+            return None
+        operations = [
+            UpdateOne(*AgentMonthlyStats._increment_update(company_id, agent_id, month, fields), upsert=True)
+            for (company_id, agent_id, month), fields in increments.items()
+        ]
+        return db.agent_monthly_stats.bulk_write(operations, ordered=False)
+
+    @staticmethod
+    def add_activity(increments, company_id, agent_id, activity_type, created_at):
+        """Add one activity to an increments dict for record_many"""
+        field = AgentMonthlyStats.ACTIVITY_FIELDS.get(activity_type)
+        if field is None:
+            return increments
+        fields = increments.setdefault((company_id, agent_id, AgentMonthlyStats.month_key(created_at)), {})
+        fields[field] = fields.get(field, 0) + 1
+        return increments
+
+    @staticmethod
+    def add_sale(increments, company_id, agent_id, amount, date):
+        """Add one sale to an increments dict for record_many"""
+        fields = increments.setdefault((company_id, agent_id, AgentMonthlyStats.month_key(date)), {})
+        fields["total_sales"] = fields.get("total_sales", 0) + amount
+        fields["sales_count"] = fields.get("sales_count", 0) + 1
+        return increments
+
+    @staticmethod
+    def record_activity(company_id, agent_id, activity_type, created_at, delta=1):
+        """Count an activity (delta=-1 when it is deleted)"""
+        field = AgentMonthlyStats.ACTIVITY_FIELDS.get(activity_type)
+        if field is None:
+            return None
+        month = AgentMonthlyStats.month_key(created_at)
+        return AgentMonthlyStats._increment(company_id, agent_id, month, {field: delta})
+
+    @staticmethod
+    def record_sale(company_id, agent_id, amount, date, delta=1):
+        """Add a sale to the rollup (delta=-1 when it is deleted)"""
+        month = AgentMonthlyStats.month_key(date)
+        return AgentMonthlyStats._increment(company_id, agent_id, month, {
+            "total_sales": amount * delta,
+            "sales_count": delta
+        })
+
+    @staticmethod
+    def empty_metrics():
+        """Counters for an agent with no rollup document"""
+        return {field: 0 for field in AgentMonthlyStats.COUNTER_FIELDS}
+
+    @staticmethod
+    def _add(metrics, doc):
+        for field in AgentMonthlyStats.COUNTER_FIELDS:
+            metrics[field] += doc.get(field, 0)
+        return metrics
+
+    @staticmethod
+    def get_metrics(agent_id, month):
+        """Get rollup counters for one agent and year-month (analytics read)"""
+        metrics = AgentMonthlyStats.empty_metrics()
+        for doc in db.analytics.agent_monthly_stats.find({"agent_id": agent_id, "month": month}):
+            AgentMonthlyStats._add(metrics, doc)
+        return metrics
+
+    @staticmethod
+    def get_metrics_for_agents(agent_ids, months):
+        """
+        Get rollup counters for several agents and months in one query (analytics read)
+        Returns dict of (agent_id, month) -> counters; missing pairs are omitted
+        """
+        query = {
+            "agent_id": {"$in": list(agent_ids)},
+            "month": {"$in": list(months)}
+        }
+        result = {}
+        for doc in db.analytics.agent_monthly_stats.find(query):
+            key = (doc["agent_id"], doc["month"])
+            if key not in result:
+                result[key] = AgentMonthlyStats.empty_metrics()
+            AgentMonthlyStats._add(result[key], doc)
+        return result
+
+    @staticmethod
+    def _claim_backfill():
+        """Take the backfill marker (or a stale one); False if another process holds it"""
+        now = datetime.now()
+        try:
+            db.agent_monthly_stats.insert_one({"_id": AgentMonthlyStats.BACKFILL_MARKER_ID, "started_at": now})
+            return True
+        except DuplicateKeyError:
+            stale_before = datetime.fromtimestamp(now.timestamp() - AgentMonthlyStats.BACKFILL_STALE_SECONDS)
+            return db.agent_monthly_stats.find_one_and_update(
+                {"_id": AgentMonthlyStats.BACKFILL_MARKER_ID, "started_at": {"$lt": stale_before}},
+                {"$set": {"started_at": now}}
+            ) is not None
+
+    @staticmethod
+    def backfill_if_empty():
+        """
+        Build the rollup from history if it has never been built (a deployment
+        whose activities and sales predate it); run at release time by
+        `rebuild_monthly_stats --if-empty`
+        A marker document claims the backfill, so only one process runs it;
+        it is removed when the backfill fails, so the next run tries again
+        Returns the number of rollup documents written, or None if there was
+        nothing to do
+        """
+        marker = AgentMonthlyStats.BACKFILL_MARKER_ID
+        if db.agent_monthly_stats.find_one({"_id": {"$ne": marker}}, {"_id": 1}) is not None:
+            return None
+        if db.activities.find_one({}, {"_id": 1}) is None and db.sales.find_one({}, {"_id": 1}) is None:
+            return None
+        if not AgentMonthlyStats._claim_backfill():
+            return None  # Another process is on it
+        try:
+            return AgentMonthlyStats.rebuild()
+        finally:
+            # Gone already when the rebuild swapped the collection in
+            db.agent_monthly_stats.delete_one({"_id": marker})
+
+    @staticmethod
+    def _replace_all(rollups):
+        """Swap in a collection holding exactly these rollup documents"""
+        if not rollups:
+            db.agent_monthly_stats.delete_many({})
+            return
+        temp = db.db[f"{AgentMonthlyStats.COLLECTION}_rebuild_{datetime.now().strftime('%Y%m%d%H%M%S%f')}"]
+        try:
+            for spec in AgentMonthlyStats.INDEXES:
+                temp.create_index(spec['keys'], **{key: value for key, value in spec.items() if key != 'keys'})
+            for i in range(0, len(rollups), AgentMonthlyStats.REBUILD_BATCH_SIZE):
+                temp.insert_many(rollups[i:i + AgentMonthlyStats.REBUILD_BATCH_SIZE])
+            temp.rename(AgentMonthlyStats.COLLECTION, dropTarget=True)
+        except BaseException:
+            temp.drop()
+            raise
+
+    @staticmethod
+    def _replace_company(company_id, rollups, started):
+        """Upsert a company's rollup documents, then delete its ones not rebuilt or updated since `started`"""
+        for i in range(0, len(rollups), AgentMonthlyStats.REBUILD_BATCH_SIZE):
+            db.agent_monthly_stats.bulk_write([
+                ReplaceOne({"_id": doc["_id"]}, doc, upsert=True)
+                for doc in rollups[i:i + AgentMonthlyStats.REBUILD_BATCH_SIZE]
+            ], ordered=False)
+        db.agent_monthly_stats.delete_many({"company_id": company_id, "updated_at": {"$lt": started}})
+
+    @staticmethod
+    def rebuild(company_id=None):
+        """
+        Rebuild the rollup from the raw activities and sales collections
+        Readers never see it empty: a full rebuild is written to a temporary
+        collection that is renamed over agent_monthly_stats; a company's
+        rebuild upserts its documents, then deletes the ones not rebuilt.
+        Counts written by live events while the aggregations run can still
+        be overwritten, so run it when ingestion is quiet
+        Returns the number of rollup documents written
+        """
+        started = datetime.now()
+        match = {}
+        if company_id:
+            match["company_id"] = company_id
+
+        docs = {}
+
+        def get_doc(row_id):
+            if row_id.get("month") is None:
+                return None  # Document without a date
+            stats_id = AgentMonthlyStats.stats_id(row_id.get("company_id"), row_id["agent_id"], row_id["month"])
+            if stats_id not in docs:
+                docs[stats_id] = dict(
+                    AgentMonthlyStats.empty_metrics(),
+                    _id=stats_id,
+                    company_id=row_id.get("company_id"),
+                    agent_id=row_id["agent_id"],
+                    month=row_id["month"],
+                    updated_at=datetime.now()
+                )
+            return docs[stats_id]
+
+        activity_pipeline = [
+            {"$match": match},
+            {"$group": {
+                "_id": {
+                    "company_id": "$company_id",
+                    "agent_id": "$agent_id",
+                    "month": {"$dateToString": {"format": "%Y-%m", "date": "$created_at"}},
+                    "activity_type": "$activity_type"
+                },
+                "count": {"$sum": 1}
+            }}
+        ]
+        for row in db.activities.aggregate(activity_pipeline):
+            field = AgentMonthlyStats.ACTIVITY_FIELDS.get(row["_id"].get("activity_type"))
+            if field is None:
+                continue
+            doc = get_doc(row["_id"])
+            if doc is not None:
+                doc[field] += row["count"]
+
+        sale_pipeline = [
+            {"$match": match},
+            {"$group": {
+                "_id": {
+                    "company_id": "$company_id",
+                    "agent_id": "$agent_id",
+                    "month": {"$dateToString": {"format": "%Y-%m", "date": "$date"}}
+                },
+                "total": {"$sum": "$amount"},
+                "count": {"$sum": 1}
+            }}
+        ]
+        for row in db.sales.aggregate(sale_pipeline):
+            doc = get_doc(row["_id"])
+            if doc is not None:
+                doc["total_sales"] += row["total"]
+                doc["sales_count"] += row["count"]
+
+        rollups = list(docs.values())
+        if company_id:
+            AgentMonthlyStats._replace_company(company_id, rollups, started)
+        else:
+            AgentMonthlyStats._replace_all(rollups)
+
+        # Everything is counted now; a retried bulk upload must not count pending rows again
+        pending = dict(match, rolled_up=False)
+        db.activities.update_many(pending, {"$set": {"rolled_up": True}})
+        db.sales.update_many(pending, {"$set": {"rolled_up": True}})
+
+        ResultCache.bump(company_id)
+        return len(docs)
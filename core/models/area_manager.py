@@ -3,11 +3,25 @@ Area Manager model - Manages multiple sales agents
 """
 from datetime import datetime
 from core.database import db
+from core.cache import ResultCache
 
 
 class AreaManager:
     """Area Manager Model - Supervises multiple agents"""
     
+    # MongoDB collection and indexes (created by core.models.indexes.ensure_indexes)
+    COLLECTION = 'area_managers'
+    INDEXES = [
+        {'keys': [('company_id', 1)]},
+        {'keys': [('division_head_id', 1)]}
+    ]
+    
+    # Representative queries checked with explain() by `ensure_indexes --check`
+    QUERY_SHAPES = [
+        {'filter': {'company_id': 'C'}},
+        {'filter': {'division_head_id': 'DH'}}
+    ]
+    
     @staticmethod
     def create(manager_id, name, email, company_id, division_head_id, area_name):
         """Create a new area manager"""
@@ -21,6 +35,7 @@ class AreaManager:
             "created_at": datetime.now()
         }
         db.area_managers.insert_one(manager)
+        ResultCache.bump(company_id)
         return manager
     
     @staticmethod
@@ -44,15 +59,27 @@ class AreaManager:
     @staticmethod
     def update(manager_id, **kwargs):
         """Update area manager information"""
-        return db.area_managers.update_one(
+        result = db.area_managers.update_one(
             {"_id": manager_id},
             {"$set": kwargs}
         )
+        
+        # Moving a manager to another division head changes division results
+        if result.modified_count:
+            manager = db.area_managers.find_one({"_id": manager_id}, {"company_id": 1})
+            if manager:
+                ResultCache.bump(manager.get("company_id"))
+        
+        return result
     
     @staticmethod
     def delete(manager_id):
         """Delete an area manager"""
-        return db.area_managers.delete_one({"_id": manager_id})
+        manager = AreaManager.get(manager_id)
+        result = db.area_managers.delete_one({"_id": manager_id})
+        if result.deleted_count:
+            ResultCache.bump(manager.get("company_id"))
+        return result
     
     @staticmethod
     def exists(manager_id):
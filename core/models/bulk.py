@@ -0,0 +1,180 @@
+"""
+Bulk ingestion shared by Activity.bulk_create and Sale.bulk_create
+Rows are validated, checked against the company's agents and written with
+unordered insert_many in bounded batches. Documents carry caller-supplied
+_ids, so a retried upload skips the rows that were already written.
+
+Documents are inserted with rolled_up=False and flagged True once
+on_inserted (the monthly rollup) has counted them. If that step fails, a
+retry finds the rows as duplicates still flagged False and counts them
+then, so a failed rollup is not lost. A crash between the rollup and the
+flag update counts those rows twice on retry; rebuild_monthly_stats
+repairs that.
+"""
+from datetime import datetime
+from pymongo.errors import BulkWriteError
+from core.database import db
+
+
+# MongoDB error code for a duplicate _id
+DUPLICATE_KEY_ERROR = 11000
+
+
+def parse_number(value, field, required=False):
+    """Number from a JSON/CSV value (CSV values arrive as strings)"""
+    if value is None or value == '':
+        if required:
+            raise ValueError(f"{field} is required")
+        return None
+    if isinstance(value, bool):
+        raise ValueError(f"{field} must be a number")
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} must be a number")
+
+
+def parse_datetime(value, field):
+    """Datetime from an ISO 8601 string (None when missing); stored as local time like datetime.now()"""
+    if value is None or value == '':
+        return None
+    if not isinstance(value, datetime):
+        try:
+            value = datetime.fromisoformat(str(value))
+        except ValueError:
+            raise ValueError(f"{field} must be an ISO 8601 date")
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return value
+
+
+def require(row, field):
+    """A required string field of a row"""
+    value = row.get(field)
+    if value is None or value == '':
+        raise ValueError(f"{field} is required")
+    return str(value)
+
+
+def insert_unordered(collection, docs):
+    """
+    insert_many(ordered=False) that sorts out per-document failures
+    Returns (positions of duplicates, dict of position -> error message)
+    """
+    try:
+        collection.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        duplicates = set()
+        errors = {}
+        for error in e.details.get('writeErrors', []):
+            if error.get('code') == DUPLICATE_KEY_ERROR:
+                duplicates.add(error['index'])
+            else:
+                errors[error['index']] = error.get('errmsg', 'Write failed')
+        return duplicates, errors
+    return set(), {}
+
+
+def bulk_create(collection, company_id, rows, build_document, batch_size, on_inserted):
+    """
+    Validate and insert rows for one company in batches of batch_size
+
+    build_document(row) returns the document to insert or raises ValueError;
+    rows that are exceptions (parse failures) are reported as they are.
+    on_inserted(docs) runs after each batch with the newly written documents
+    and the already stored duplicates it has not counted yet (rolled_up=False).
+
+    Returns {'received', 'inserted', 'duplicates', 'errors'}; each error is
+    {'row': 1-based row number, 'id': document _id or None, 'error': message}
+    """
+    result = {'received': 0, 'inserted': 0, 'duplicates': 0, 'errors': []}
+
+    batch = []
+    for row in rows:
+        batch.append((result['received'] + 1, row))
+        result['received'] += 1
+        if len(batch) >= batch_size:
+            _write_batch(collection, company_id, batch, build_document, on_inserted, result)
+            batch = []
+    if batch:
+        _write_batch(collection, company_id, batch, build_document, on_inserted, result)
+
+    return result
+
+
+def _write_batch(collection, company_id, batch, build_document, on_inserted, result):
+    docs = []
+    row_numbers = []
+    for row_number, row in batch:
+        if isinstance(row, Exception):
+            result['errors'].append({'row': row_number, 'id': None, 'error': str(row)})
+            continue
+        try:
+            doc = build_document(row)
+        except (ValueError, TypeError) as e:
+            row_id = row.get('_id') if isinstance(row, dict) else None
+            result['errors'].append({'row': row_number, 'id': row_id, 'error': str(e)})
+            continue
+        docs.append(doc)
+        row_numbers.append(row_number)
+
+    if not docs:
+        return
+
+    # Events may only reference agents of the uploading company (one query per batch)
+    agent_ids = list({doc['agent_id'] for doc in docs})
+    known_agents = {
+        agent['_id'] for agent in db.agents.find(
+            {"_id": {"$in": agent_ids}, "company_id": company_id}, {"_id": 1}
+        )
+    }
+    valid_docs = []
+    valid_rows = []
+    for row_number, doc in zip(row_numbers, docs):
+        if doc['agent_id'] not in known_agents:
+            result['errors'].append({'row': row_number, 'id': doc['_id'], 'error': f"Unknown agent: {doc['agent_id']}"})
+            continue
+        valid_docs.append(doc)
+        valid_rows.append(row_number)
+
+    if not valid_docs:
+        return
+
+    for doc in valid_docs:
+        doc['rolled_up'] = False
+
+    duplicates, errors = insert_unordered(collection, valid_docs)
+    inserted = []
+    for position, doc in enumerate(valid_docs):
+        if position in duplicates:
+            continue
+        if position in errors:
+            result['errors'].append({'row': valid_rows[position], 'id': doc['_id'], 'error': errors[position]})
+            continue
+        inserted.append(doc)
+
+    result['inserted'] += len(inserted)
+    result['duplicates'] += len(duplicates)
+
+    # Duplicates written by an earlier attempt whose rollup failed
+    pending = []
+    if duplicates:
+        pending = list(collection.find({
+            "_id": {"$in": [valid_docs[position]['_id'] for position in duplicates]},
+            "company_id": company_id,
+            "rolled_up": False
+        }))
+
+    to_roll_up = inserted + pending
+    if to_roll_up:
+        on_inserted(to_roll_up)
+        collection.update_many(
+            {"_id": {"$in": [doc['_id'] for doc in to_roll_up]}},
+            {"$set": {"rolled_up": True}}
+        )
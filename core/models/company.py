@@ -9,6 +9,19 @@ from core.database import db
 class Company:
     """Company Model - Multi-tenant organization"""
     
+    # MongoDB collection and indexes (created by core.models.indexes.ensure_indexes)
+    COLLECTION = 'companies'
+    INDEXES = [
+        {'keys': [('email', 1)]},
+        {'keys': [('status', 1)]}
+    ]
+    
+    # Representative queries checked with explain() by `ensure_indexes --check`
+    QUERY_SHAPES = [
+        {'filter': {'email': 'a@b.c'}},
+        {'filter': {'status': 'active'}}
+    ]
+    
     @staticmethod
     def create(company_id, name, email, phone, address, 
                tin=None, business_type=None, contact_person=None):
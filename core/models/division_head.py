@@ -3,11 +3,23 @@ Division Head model - Oversees multiple area managers
 """
 from datetime import datetime
 from core.database import db
+from core.cache import ResultCache
 
 
 class DivisionHead:
     """Division Head Model - Oversees multiple area managers"""
     
+    # MongoDB collection and indexes (created by core.models.indexes.ensure_indexes)
+    COLLECTION = 'division_heads'
+    INDEXES = [
+        {'keys': [('company_id', 1)]}
+    ]
+    
+    # Representative queries checked with explain() by `ensure_indexes --check`
+    QUERY_SHAPES = [
+        {'filter': {'company_id': 'C'}}
+    ]
+    
     @staticmethod
     def create(head_id, name, email, company_id, division_name):
         """Create a new division head"""
@@ -20,6 +32,7 @@ class DivisionHead:
             "created_at": datetime.now()
         }
         db.division_heads.insert_one(head)
+        ResultCache.bump(company_id)
         return head
     
     @staticmethod
@@ -38,15 +51,26 @@ class DivisionHead:
     @staticmethod
     def update(head_id, **kwargs):
         """Update division head information"""
-        return db.division_heads.update_one(
+        result = db.division_heads.update_one(
             {"_id": head_id},
             {"$set": kwargs}
         )
+        
+        if result.modified_count:
+            head = db.division_heads.find_one({"_id": head_id}, {"company_id": 1})
+            if head:
+                ResultCache.bump(head.get("company_id"))
+        
+        return result
     
     @staticmethod
     def delete(head_id):
         """Delete a division head"""
-        return db.division_heads.delete_one({"_id": head_id})
+        head = DivisionHead.get(head_id)
+        result = db.division_heads.delete_one({"_id": head_id})
+        if result.deleted_count:
+            ResultCache.bump(head.get("company_id"))
+        return result
     
     @staticmethod
     def exists(head_id):
@@ -0,0 +1,87 @@
+"""
+MongoDB index provisioning
+Creates the indexes declared on each model (INDEXES) and checks the
+declared query shapes (QUERY_SHAPES) against explain() for collection scans
+"""
+from pymongo.errors import OperationFailure
+from core.database import db
+from .agent import Agent
+from .activity import Activity
+from .sale import Sale
+from .area_manager import AreaManager
+from .division_head import DivisionHead
+from .product import Product
+from .lead import Lead
+from .company import Company
+from .subscription import Subscription
+from .payment import Payment, PaymentMethod
+from .user import User
+from .agent_monthly_stats import AgentMonthlyStats
+from .training_job import TrainingJob
+
+
+# Models that declare COLLECTION, INDEXES and QUERY_SHAPES
+INDEXED_MODELS = [
+    Agent, Activity, Sale, AreaManager, DivisionHead, Product, Lead,
+    Company, Subscription, Payment, PaymentMethod, User, AgentMonthlyStats,
+    TrainingJob
+]
+
+
+def ensure_indexes(models=None):
+    """
+    Create every declared index (idempotent - existing indexes are left alone)
+    Returns a report with one entry per index
+    Connection errors are raised; index conflicts (e.g. duplicate emails
+    blocking a unique index) are reported and the remaining indexes still run
+    """
+    report = []
+    for model in models or INDEXED_MODELS:
+        collection = db.db[model.COLLECTION]
+        for spec in model.INDEXES:
+            options = {key: value for key, value in spec.items() if key != 'keys'}
+            entry = {'collection': model.COLLECTION, 'keys': spec['keys']}
+            try:
+                entry['index'] = collection.create_index(spec['keys'], **options)
+                entry['status'] = 'ok'
+            except OperationFailure as e:
+                entry['status'] = 'error'
+                entry['error'] = str(e)
+            report.append(entry)
+    return report
+
+
+def _plan_stages(plan):
+    """Yield every stage name in an explain() plan tree"""
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            yield plan['stage']
+        for value in plan.values():
+            yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _plan_stages(item)
+
+
+def find_collection_scans(models=None):
+    """
+    Explain every declared query shape and return the ones whose winning plan
+    contains a COLLSCAN stage (an empty list means every shape is indexed)
+    """
+    scans = []
+    for model in models or INDEXED_MODELS:
+        collection = db.db[model.COLLECTION]
+        for shape in model.QUERY_SHAPES:
+            cursor = collection.find(shape['filter'])
+            if shape.get('sort'):
+                cursor = cursor.sort(shape['sort'])
+            explain = cursor.explain()
+            winning_plan = explain.get('queryPlanner', {}).get('winningPlan', {})
+            if 'COLLSCAN' in set(_plan_stages(winning_plan)):
+                scans.append({
+                    'model': model.__name__,
+                    'collection': model.COLLECTION,
+                    'filter': shape['filter'],
+                    'sort': shape.get('sort')
+                })
+    return scans
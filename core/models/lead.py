@@ -3,11 +3,27 @@ Lead model - Sales leads with product interest
 """
 from datetime import datetime
 from core.database import db
+from core.cache import ResultCache
 
 
 class Lead:
     """Lead Model - Potential customers with product interests"""
     
+    # MongoDB collection and indexes (created by core.models.indexes.ensure_indexes)
+    COLLECTION = 'leads'
+    INDEXES = [
+        {'keys': [('agent_id', 1), ('status', 1)]},
+        {'keys': [('agent_id', 1), ('created_at', -1)]},
+        {'keys': [('company_id', 1)]}
+    ]
+    
+    # Representative queries checked with explain() by `ensure_indexes --check`
+    QUERY_SHAPES = [
+        {'filter': {'agent_id': 'A', 'status': 'New'}},
+        {'filter': {'agent_id': 'A'}, 'sort': [('created_at', -1)]},
+        {'filter': {'company_id': 'C'}}
+    ]
+    
     @staticmethod
     def create(lead_id, agent_id, company_id, customer_name, contact, product_id, status, value, notes=""):
         """Create a new lead"""
@@ -25,6 +41,8 @@ class Lead:
             "updated_at": datetime.now()
         }
         db.leads.insert_one(lead)
+        # Funnel numbers count leads
+        ResultCache.bump(company_id)
         return lead
     
     @staticmethod
@@ -45,10 +63,18 @@ class Lead:
     @staticmethod
     def update_status(lead_id, status):
         """Update lead status"""
-        return db.leads.update_one(
+        result = db.leads.update_one(
             {"_id": lead_id},
             {"$set": {"status": status, "updated_at": datetime.now()}}
         )
+        
+        # Funnel numbers change with lead status
+        if result.modified_count:
+            lead = db.leads.find_one({"_id": lead_id}, {"company_id": 1})
+            if lead:
+                ResultCache.bump(lead.get("company_id"))
+        
+        return result
     
     @staticmethod
     def get_all(company_id=None):
@@ -8,6 +8,21 @@ from core.database import db
 class Payment:
     """Payment Model - Tracks invoices and payments"""
     
+    # MongoDB collection and indexes (created by core.models.indexes.ensure_indexes)
+    COLLECTION = 'payments'
+    INDEXES = [
+        {'keys': [('company_id', 1), ('created_at', -1)]},
+        {'keys': [('status', 1), ('due_date', 1)]},
+        {'keys': [('status', 1), ('payment_date', 1)]}
+    ]
+    
+    # Representative queries checked with explain() by `ensure_indexes --check`
+    QUERY_SHAPES = [
+        {'filter': {'company_id': 'C'}, 'sort': [('created_at', -1)]},
+        {'filter': {'status': 'pending', 'due_date': {'$lt': datetime(2000, 1, 1)}}},
+        {'filter': {'status': 'paid', 'payment_date': {'$gte': datetime(2000, 1, 1)}}}
+    ]
+    
     # Payment status options
     STATUS_PENDING = "pending"
     STATUS_PAID = "paid"
@@ -213,6 +228,17 @@ class Payment:
 class PaymentMethod:
     """Payment Method Model - Stores company payment preferences"""
     
+    # MongoDB collection and indexes (created by core.models.indexes.ensure_indexes)
+    COLLECTION = 'payment_methods'
+    INDEXES = [
+        {'keys': [('company_id', 1)]}
+    ]
+    
+    # Representative queries checked with explain() by `ensure_indexes --check`
+    QUERY_SHAPES = [
+        {'filter': {'company_id': 'C'}}
+    ]
+    
     @staticmethod
     def create(company_id, method_type, details):
         """Add a payment method for a company"""
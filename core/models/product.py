@@ -8,6 +8,20 @@ from core.database import db
 class Product:
     """Product Model - Banking products and services"""
     
+    # MongoDB collection and indexes (created by core.models.indexes.ensure_indexes)
+    COLLECTION = 'products'
+    INDEXES = [
+        {'keys': [('company_id', 1), ('category', 1)]},
+        {'keys': [('category', 1)]}
+    ]
+    
+    # Representative queries checked with explain() by `ensure_indexes --check`
+    QUERY_SHAPES = [
+        {'filter': {'company_id': 'C'}},
+        {'filter': {'category': 'Loan', 'company_id': 'C'}},
+        {'filter': {'category': 'Loan'}}
+    ]
+    
     @staticmethod
     def create(product_id, name, category, description, commission_rate, company_id):
         """Create a new product"""
@@ -36,6 +50,19 @@ class Product:
             query["company_id"] = company_id
         return list(db.products.find(query))
     
+    @staticmethod
+    def get_catalog(product_ids=None, company_id=None):
+        """
+        Get products as a dict keyed by product ID (for in-memory joins)
+        product_ids: optionally restrict the catalog to these products
+        """
+        query = {}
+        if product_ids is not None:
+            query["_id"] = {"$in": list(product_ids)}
+        if company_id:
+            query["company_id"] = company_id
+        return {product["_id"]: product for product in db.products.find(query)}
+    
     @staticmethod
     def get_by_category(category, company_id=None):
         """Get products by category"""
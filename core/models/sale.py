@@ -3,11 +3,28 @@ Sale model - Represents completed sales
 """
 from datetime import datetime
 from core.database import db
+from core.cache import ResultCache
+from core.models import bulk
+from core.models.agent_monthly_stats import AgentMonthlyStats
 
 
 class Sale:
     """Sale Model for tracking completed sales"""
     
+    # MongoDB collection and indexes (created by core.models.indexes.ensure_indexes)
+    COLLECTION = 'sales'
+    INDEXES = [
+        {'keys': [('agent_id', 1), ('date', 1)]},
+        {'keys': [('company_id', 1), ('date', 1)]}
+    ]
+    
+    # Representative queries checked with explain() by `ensure_indexes --check`
+    QUERY_SHAPES = [
+        {'filter': {'agent_id': 'A', 'date': {'$gte': datetime(2000, 1, 1)}}},
+        {'filter': {'agent_id': 'A'}, 'sort': [('date', -1)]},
+        {'filter': {'company_id': 'C'}, 'sort': [('date', -1)]}
+    ]
+    
     @staticmethod
     def create(sale_id, agent_id, company_id, amount, customer, product_id=None, notes=""):
         """Create a new sale"""
@@ -22,8 +39,50 @@ class Sale:
             "notes": notes
         }
         db.sales.insert_one(sale)
+        
+        # Keep the monthly rollup in step with the raw collection
+        AgentMonthlyStats.record_sale(company_id, agent_id, amount, sale["date"])
+        ResultCache.bump(company_id)
+        
         return sale
     
+    @staticmethod
+    def bulk_create(company_id, rows, batch_size=None):
+        """
+        Create many sales for a company with unordered insert_many batches
+        rows: dicts with _id, agent_id, amount, customer and optional
+        product_id, notes and date (ISO 8601, defaults to now)
+        
+        Idempotent on _id: rows already stored are counted as duplicates.
+        Returns {'received', 'inserted', 'duplicates', 'errors'} (see core.models.bulk)
+        """
+        from django.conf import settings
+        
+        def build_document(row):
+            return {
+                "_id": bulk.require(row, "_id"),
+                "agent_id": bulk.require(row, "agent_id"),
+                "company_id": company_id,
+                "amount": bulk.parse_number(row.get("amount"), "amount", required=True),
+                "customer": bulk.require(row, "customer"),
+                "product_id": row.get("product_id") or None,
+                "date": bulk.parse_datetime(row.get("date"), "date") or datetime.now(),
+                "notes": row.get("notes") or ""
+            }
+        
+        def on_inserted(sales):
+            # Keep the monthly rollup in step (one bulk_write per batch)
+            increments = {}
+            for sale in sales:
+                AgentMonthlyStats.add_sale(increments, company_id, sale["agent_id"], sale["amount"], sale["date"])
+            AgentMonthlyStats.record_many(increments)
+            ResultCache.bump(company_id)
+        
+        return bulk.bulk_create(
+            db.sales, company_id, rows, build_document,
+            batch_size or settings.INGEST_BATCH_SIZE, on_inserted
+        )
+    
     @staticmethod
     def get(sale_id):
         """Get sale by ID"""
@@ -44,6 +103,62 @@ class Sale:
         
         return list(db.sales.find(query))
     
+    @staticmethod
+    def get_by_agents(agent_ids, start_date=None, end_date=None):
+        """Get sales for several agents with a single $in query (analytics read)"""
+        query = {"agent_id": {"$in": list(agent_ids)}}
+        
+        if start_date or end_date:
+            date_query = {}
+            if start_date:
+                date_query["$gte"] = start_date
+            if end_date:
+                date_query["$lte"] = end_date
+            query["date"] = date_query
+        
+        return list(db.analytics.sales.find(query))
+    
+    @staticmethod
+    def get_recent_by_agents(agent_ids, limit=5):
+        """
+        Latest `limit` sales of each agent in one aggregation (analytics read)
+        Returns dict of agent_id -> sales, newest first
+        """
+        pipeline = [
+            {"$match": {"agent_id": {"$in": list(agent_ids)}}},
+            {"$sort": {"agent_id": 1, "date": -1}},
+            {"$group": {"_id": "$agent_id", "sales": {"$push": "$$ROOT"}}},
+            {"$project": {"sales": {"$slice": ["$sales", limit]}}}
+        ]
+        return {row["_id"]: row["sales"] for row in db.analytics.sales.aggregate(pipeline, allowDiskUse=True)}
+    
+    @staticmethod
+    def get_top_products_by_agents(agent_ids, limit=3):
+        """
+        Each agent's `limit` best-selling products by total amount, in one
+        aggregation (analytics read)
+        Returns dict of agent_id -> [{'product_id', 'count', 'total_amount'}]
+        """
+        pipeline = [
+            {"$match": {"agent_id": {"$in": list(agent_ids)}, "product_id": {"$nin": [None, ""]}}},
+            {"$group": {
+                "_id": {"agent_id": "$agent_id", "product_id": "$product_id"},
+                "count": {"$sum": 1},
+                "total_amount": {"$sum": "$amount"}
+            }},
+            {"$sort": {"total_amount": -1}},
+            {"$group": {
+                "_id": "$_id.agent_id",
+                "products": {"$push": {
+                    "product_id": "$_id.product_id",
+                    "count": "$count",
+                    "total_amount": "$total_amount"
+                }}
+            }},
+            {"$project": {"products": {"$slice": ["$products", limit]}}}
+        ]
+        return {row["_id"]: row["products"] for row in db.analytics.sales.aggregate(pipeline, allowDiskUse=True)}
+    
     @staticmethod
     def get_total_by_agent(agent_id, start_date=None, end_date=None):
         """Get total sales amount for a specific agent"""
@@ -68,4 +183,14 @@ class Sale:
     @staticmethod
     def delete(sale_id):
         """Delete a sale"""
-        return db.sales.delete_one({"_id": sale_id})
+        sale = db.sales.find_one({"_id": sale_id})
+        result = db.sales.delete_one({"_id": sale_id})
+        
+        if result.deleted_count and sale.get("date"):
+            AgentMonthlyStats.record_sale(
+                sale.get("company_id"), sale["agent_id"],
+                sale.get("amount", 0), sale["date"], delta=-1
+            )
+            ResultCache.bump(sale.get("company_id"))
+        
+        return result
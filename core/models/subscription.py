@@ -3,11 +3,25 @@ Subscription model - Manages company subscriptions with per-agent pricing
 """
 from datetime import datetime, timedelta
 from core.database import db
+from core.auth_cache import AuthCache
 
 
 class Subscription:
     """Subscription Model - Per-agent pricing for companies"""
     
+    # MongoDB collection and indexes (created by core.models.indexes.ensure_indexes)
+    COLLECTION = 'subscriptions'
+    INDEXES = [
+        {'keys': [('company_id', 1)]},
+        {'keys': [('status', 1), ('trial_end_date', 1)]}
+    ]
+    
+    # Representative queries checked with explain() by `ensure_indexes --check`
+    QUERY_SHAPES = [
+        {'filter': {'company_id': 'C'}},
+        {'filter': {'status': 'trial', 'trial_end_date': {'$lte': datetime(2000, 1, 1)}}}
+    ]
+    
     # Pricing configuration (in PHP)
     PRICE_PER_AGENT = 500  # ₱500 per agent per month
     
@@ -45,6 +59,7 @@ class Subscription:
             "updated_at": datetime.now()
         }
         db.subscriptions.insert_one(subscription)
+        AuthCache.invalidate_subscription(company_id)
         return subscription
     
     @staticmethod
@@ -98,7 +113,7 @@ class Subscription:
         """Activate a subscription (after trial or payment)"""
         next_billing_date = datetime.now() + timedelta(days=30)
         
-        return db.subscriptions.update_one(
+        result = db.subscriptions.update_one(
             {"company_id": company_id},
             {"$set": {
                 "status": "active",
@@ -106,11 +121,13 @@ class Subscription:
                 "updated_at": datetime.now()
             }}
         )
+        AuthCache.invalidate_subscription(company_id)
+        return result
     
     @staticmethod
     def mark_past_due(company_id):
         """Mark subscription as past due (payment failed)"""
-        return db.subscriptions.update_one(
+        result = db.subscriptions.update_one(
             {"company_id": company_id},
             {"$set": {
                 "status": "past_due",
@@ -118,6 +135,8 @@ class Subscription:
                 "updated_at": datetime.now()
             }}
         )
+        AuthCache.invalidate_subscription(company_id)
+        return result
     
     @staticmethod
     def cancel(company_id, reason=None, immediate=False):
@@ -135,17 +154,19 @@ class Subscription:
             if subscription:
                 update_data["access_until"] = subscription.get("next_billing_date")
         
-        return db.subscriptions.update_one(
+        result = db.subscriptions.update_one(
             {"company_id": company_id},
             {"$set": update_data}
         )
+        AuthCache.invalidate_subscription(company_id)
+        return result
     
     @staticmethod
     def renew(company_id):
         """Renew subscription for another billing cycle"""
         next_billing_date = datetime.now() + timedelta(days=30)
         
-        return db.subscriptions.update_one(
+        result = db.subscriptions.update_one(
             {"company_id": company_id},
             {"$set": {
                 "status": "active",
@@ -156,6 +177,8 @@ class Subscription:
                 "past_due_since": ""
             }}
         )
+        AuthCache.invalidate_subscription(company_id)
+        return result
     
     @staticmethod
     def is_active(company_id):
@@ -205,5 +228,7 @@ class Subscription:
                 "updated_at": now
             }}
         )
+        if result.modified_count:
+            AuthCache.invalidate_subscription()
         
         return result.modified_count
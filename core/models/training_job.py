@@ -0,0 +1,143 @@
+"""
+Training Job model - Background AI model training runs
+Tracks status and progress so the web tier can poll instead of blocking
+"""
+from datetime import datetime, timedelta
+from core.database import db
+
+
+class TrainingJob:
+    """Training Job Model - One background run of AITrainer.train_model"""
+
+    # MongoDB collection and indexes (created by core.models.indexes.ensure_indexes)
+    COLLECTION = 'training_jobs'
+    INDEXES = [
+        {'keys': [('company_id', 1), ('status', 1), ('updated_at', -1)]},
+        {'keys': [('created_at', -1)]}
+    ]
+
+    # Representative queries checked with explain() by `ensure_indexes --check`
+    QUERY_SHAPES = [
+        {'filter': {'status': {'$in': ['queued', 'running']}, 'company_id': 'C', 'updated_at': {'$gte': datetime(2000, 1, 1)}}},
+        {'filter': {}, 'sort': [('created_at', -1)]}
+    ]
+
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+
+    ACTIVE_STATUSES = [STATUS_QUEUED, STATUS_RUNNING]
+
+    @staticmethod
+    def create(job_id, requested_by=None, company_id=None):
+        """Create a new queued training job"""
+        job = {
+            "_id": job_id,
+            "requested_by": requested_by,  # User ID that started the run
+            "company_id": company_id,  # Company whose model is trained (None = global model)
+            "status": TrainingJob.STATUS_QUEUED,  # queued, running, succeeded, failed
+            "progress": 0,  # 0-100
+            "message": "Waiting for a training worker",
+            "accuracy": None,
+            "error": None,
+            "created_at": datetime.now(),
+            "started_at": None,
+            "finished_at": None,
+            "updated_at": datetime.now()
+        }
+        db.training_jobs.insert_one(job)
+        return job
+
+    @staticmethod
+    def get(job_id):
+        """Get training job by ID"""
+        return db.training_jobs.find_one({"_id": job_id})
+
+    @staticmethod
+    def get_active(stale_after_seconds=None, company_id=None):
+        """
+        Get the queued or running job for a company's model (the global model
+        when company_id is None), if any
+        Jobs not updated for stale_after_seconds (e.g. the worker was killed)
+        are ignored so a new run can start
+        """
+        query = {"status": {"$in": TrainingJob.ACTIVE_STATUSES}, "company_id": company_id}
+        if stale_after_seconds:
+            query["updated_at"] = {"$gte": datetime.now() - timedelta(seconds=stale_after_seconds)}
+        return db.training_jobs.find_one(query, sort=[("updated_at", -1)])
+
+    @staticmethod
+    def get_recent(limit=10):
+        """Get the most recent training jobs"""
+        return list(db.training_jobs.find().sort("created_at", -1).limit(limit))
+
+    @staticmethod
+    def mark_running(job_id):
+        """Mark job as picked up by a worker"""
+        return db.training_jobs.update_one(
+            {"_id": job_id},
+            {"$set": {
+                "status": TrainingJob.STATUS_RUNNING,
+                "message": "Training started",
+                "started_at": datetime.now(),
+                "updated_at": datetime.now()
+            }}
+        )
+
+    @staticmethod
+    def update_progress(job_id, progress, message):
+        """Record training progress (0-100) and the current step"""
+        return db.training_jobs.update_one(
+            {"_id": job_id},
+            {"$set": {
+                "progress": progress,
+                "message": message,
+                "updated_at": datetime.now()
+            }}
+        )
+
+    @staticmethod
+    def mark_succeeded(job_id, accuracy, message=None):
+        """Mark job as finished with the trained model's accuracy"""
+        return db.training_jobs.update_one(
+            {"_id": job_id},
+            {"$set": {
+                "status": TrainingJob.STATUS_SUCCEEDED,
+                "progress": 100,
+                "message": message or "Model trained successfully!",
+                "accuracy": accuracy,
+                "finished_at": datetime.now(),
+                "updated_at": datetime.now()
+            }}
+        )
+
+    @staticmethod
+    def mark_failed(job_id, error):
+        """Mark job as failed (only if it has not already finished)"""
+        return db.training_jobs.update_one(
+            {"_id": job_id, "status": {"$in": TrainingJob.ACTIVE_STATUSES}},
+            {"$set": {
+                "status": TrainingJob.STATUS_FAILED,
+                "message": "Training failed",
+                "error": error,
+                "finished_at": datetime.now(),
+                "updated_at": datetime.now()
+            }}
+        )
+
+    @staticmethod
+    def to_dict(job):
+        """JSON-serializable view of a job for the status endpoint"""
+        return {
+            'job_id': job['_id'],
+            'company_id': job.get('company_id'),
+            'status': job['status'],
+            'progress': job.get('progress', 0),
+            'message': job.get('message'),
+            'accuracy': job.get('accuracy'),
+            'error': job.get('error'),
+            'created_at': job['created_at'].isoformat() if job.get('created_at') else None,
+            'started_at': job['started_at'].isoformat() if job.get('started_at') else None,
+            'finished_at': job['finished_at'].isoformat() if job.get('finished_at') else None
+        }
@@ -5,11 +5,27 @@ from datetime import datetime
 import hashlib
 import secrets
 from core.database import db
+from core.auth_cache import AuthCache, LastLoginBuffer
 
 
 class User:
     """User Model - Authentication and authorization"""
     
+    # MongoDB collection and indexes (created by core.models.indexes.ensure_indexes)
+    COLLECTION = 'users'
+    INDEXES = [
+        {'keys': [('email', 1)], 'unique': True},
+        {'keys': [('api_token', 1)], 'unique': True},
+        {'keys': [('company_id', 1), ('role', 1)]}
+    ]
+    
+    # Representative queries checked with explain() by `ensure_indexes --check`
+    QUERY_SHAPES = [
+        {'filter': {'email': 'a@b.c', 'is_active': True}},
+        {'filter': {'api_token': 'T', 'is_active': True}},
+        {'filter': {'company_id': 'C', 'role': 'agent'}}
+    ]
+    
     # User roles
     ROLE_SUPER_ADMIN = "super_admin"  # Platform admin (manages all companies)
     ROLE_COMPANY_ADMIN = "company_admin"  # Company owner/admin
@@ -91,10 +107,8 @@ class User:
         })
         
         if user:
-            db.users.update_one(
-                {"_id": user["_id"]},
-                {"$set": {"last_login": datetime.now()}}
-            )
+            # Batched with other logins instead of one write per API call
+            LastLoginBuffer.record(user["_id"])
         
         return user
     
@@ -124,10 +138,12 @@ class User:
             kwargs["password"] = User.hash_password(kwargs["password"])
         
         kwargs["updated_at"] = datetime.now()
-        return db.users.update_one(
+        result = db.users.update_one(
             {"_id": user_id},
             {"$set": kwargs}
         )
+        AuthCache.invalidate_user(user_id)
+        return result
     
     @staticmethod
     def change_password(user_id, old_password, new_password):
@@ -139,29 +155,33 @@ class User:
         if user.get("password") != User.hash_password(old_password):
             return False
         
-        return db.users.update_one(
+        result = db.users.update_one(
             {"_id": user_id},
             {"$set": {
                 "password": User.hash_password(new_password),
                 "updated_at": datetime.now()
             }}
         )
+        AuthCache.invalidate_user(user_id)
+        return result
     
     @staticmethod
     def reset_password(user_id, new_password):
         """Reset user password (admin function)"""
-        return db.users.update_one(
+        result = db.users.update_one(
             {"_id": user_id},
             {"$set": {
                 "password": User.hash_password(new_password),
                 "updated_at": datetime.now()
             }}
         )
+        AuthCache.invalidate_user(user_id)
+        return result
     
     @staticmethod
     def deactivate(user_id):
         """Deactivate a user account"""
-        return db.users.update_one(
+        result = db.users.update_one(
             {"_id": user_id},
             {"$set": {
                 "is_active": False,
@@ -169,11 +189,13 @@ class User:
                 "updated_at": datetime.now()
             }}
         )
+        AuthCache.invalidate_user(user_id)
+        return result
     
     @staticmethod
     def activate(user_id):
         """Activate a user account"""
-        return db.users.update_one(
+        result = db.users.update_one(
             {"_id": user_id},
             {"$set": {
                 "is_active": True,
@@ -181,6 +203,8 @@ class User:
             },
             "$unset": {"deactivated_at": ""}}
         )
+        AuthCache.invalidate_user(user_id)
+        return result
     
     @staticmethod
     def refresh_token(user_id):
@@ -193,6 +217,7 @@ class User:
                 "updated_at": datetime.now()
             }}
         )
+        AuthCache.invalidate_user(user_id)
         return new_token
     
     @staticmethod
@@ -217,7 +242,9 @@ class User:
     @staticmethod
     def delete(user_id):
         """Delete a user"""
-        return db.users.delete_one({"_id": user_id})
+        result = db.users.delete_one({"_id": user_id})
+        AuthCache.invalidate_user(user_id)
+        return result
     
     @staticmethod
     def exists(user_id):
@@ -0,0 +1,222 @@
+"""
+MongoDB query profiling
+A pymongo CommandListener (registered on the client by core.database) times
+every command with its collection, query shape (the filter or pipeline with
+values replaced by '?') and returned document count. Commands are added up
+per request by QueryProfilingMiddleware (Server-Timing header and a JSON log
+line) and per shape for the process; shapes repeated within one request are
+reported as N+1 patterns. /api/debug/queries/ shows both.
+"""
+import json
+import threading
+import time
+from pymongo import monitoring
+from django.conf import settings
+
+
+def _shape(value):
+    """A filter/pipeline with its values replaced by '?' (keys and operators kept)"""
+    if isinstance(value, dict):
+        return {key: _shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if any(isinstance(item, (dict, list, tuple)) for item in value):
+            return [_shape(item) for item in value]
+        return ['?'] if value else []
+    return '?'
+
+
+def query_shape(command_name, command):
+    """Shape of a command as a string (empty for commands without a query)"""
+    if command_name == 'find':
+        shape = {'filter': _shape(command.get('filter', {}))}
+        if 'sort' in command:
+            shape['sort'] = list(command['sort'])
+    elif command_name == 'aggregate':
+        shape = _shape(command.get('pipeline', []))
+    elif command_name in ('count', 'distinct', 'findAndModify'):
+        shape = _shape(command.get('query', {}))
+    elif command_name == 'update' and command.get('updates'):
+        shape = _shape(command['updates'][0].get('q', {}))
+    elif command_name == 'delete' and command.get('deletes'):
+        shape = _shape(command['deletes'][0].get('q', {}))
+    else:
+        return ''
+    return json.dumps(shape, default=str)[:settings.DB_PROFILER_MAX_SHAPE_LENGTH]
+
+
+def _returned(command_name, reply):
+    """Documents a command returned (or counted/wrote)"""
+    cursor = reply.get('cursor')
+    if cursor:
+        return len(cursor.get('firstBatch', cursor.get('nextBatch', ())))
+    if command_name == 'distinct':
+        return len(reply.get('values', ()))
+    return reply.get('n', 0) if isinstance(reply.get('n'), int) else 0
+
+
+class RequestProfile:
+    """Commands of one request, added up by (command, collection, shape)"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_ms = 0.0
+        self.docs = 0
+        self.by_shape = {}  # key -> [count, ms, docs]
+
+    def add(self, key, ms, docs):
+        self.queries += 1
+        self.db_ms += ms
+        self.docs += docs
+        totals = self.by_shape.setdefault(key, [0, 0.0, 0])
+        totals[0] += 1
+        totals[1] += ms
+        totals[2] += docs
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def repeated_shapes(self, threshold):
+        """{key: count} of query shapes run at least threshold times (N+1 candidates)"""
+        return {key: totals[0] for key, totals in self.by_shape.items()
+                if key[2] and totals[0] >= threshold}
+
+
+class QueryStats:
+    """Per-shape totals and N+1 patterns of this process (bounded)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._shapes = {}
+            self._patterns = {}
+            self.dropped = 0
+            self.since = time.time()
+
+    def add(self, key, ms, docs):
+        with self._lock:
+            stats = self._shapes.get(key)
+            if stats is None:
+                if len(self._shapes) >= settings.DB_PROFILER_MAX_SHAPES:
+                    self.dropped += 1
+                    return
+                stats = self._shapes[key] = {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'docs': 0}
+            stats['count'] += 1
+            stats['total_ms'] += ms
+            stats['max_ms'] = max(stats['max_ms'], ms)
+            stats['docs'] += docs
+
+    def add_patterns(self, view, repeated):
+        """Record the repeated shapes ({key: count}) of one request of a view"""
+        with self._lock:
+            for key, count in repeated.items():
+                pattern = self._patterns.get((view, key))
+                if pattern is None:
+                    if len(self._patterns) >= settings.DB_PROFILER_MAX_SHAPES:
+                        self.dropped += 1
+                        continue
+                    pattern = self._patterns[(view, key)] = {'requests': 0, 'queries': 0, 'max_per_request': 0}
+                pattern['requests'] += 1
+                pattern['queries'] += count
+                pattern['max_per_request'] = max(pattern['max_per_request'], count)
+
+    @staticmethod
+    def _describe(key):
+        command, collection, shape = key
+        return {'command': command, 'collection': collection, 'shape': shape}
+
+    def slowest(self, limit=20):
+        """Query shapes by total time, slowest first"""
+        with self._lock:
+            items = sorted(self._shapes.items(), key=lambda item: item[1]['total_ms'], reverse=True)[:limit]
+        return [
+            {
+                **self._describe(key),
+                'count': stats['count'],
+                'total_ms': round(stats['total_ms'], 2),
+                'avg_ms': round(stats['total_ms'] / stats['count'], 3),
+                'max_ms': round(stats['max_ms'], 2),
+                'avg_docs': round(stats['docs'] / stats['count'], 1)
+            }
+            for key, stats in items
+        ]
+
+    def n_plus_one(self, limit=20):
+        """Shapes repeated within requests, by view, most queries first"""
+        with self._lock:
+            items = sorted(self._patterns.items(), key=lambda item: item[1]['queries'], reverse=True)[:limit]
+        return [
+            {
+                'view': view,
+                **self._describe(key),
+                'requests': pattern['requests'],
+                'avg_per_request': round(pattern['queries'] / pattern['requests'], 1),
+                'max_per_request': pattern['max_per_request']
+            }
+            for (view, key), pattern in items
+        ]
+
+
+class QueryProfiler(monitoring.CommandListener):
+    """
+    Times MongoDB commands into QueryStats and the current thread's
+    RequestProfile, if any (pymongo reports a command's start and end on
+    the thread that ran it)
+    """
+
+    def __init__(self, stats):
+        self.stats = stats
+        self._local = threading.local()
+
+    def begin(self):
+        """Start profiling the commands of this thread (one request)"""
+        profile = RequestProfile()
+        self._local.profile = profile
+        return profile
+
+    def end(self):
+        """Stop profiling this thread; returns its RequestProfile"""
+        profile = getattr(self._local, 'profile', None)
+        self._local.profile = None
+        return profile
+
+    def activate(self, profile):
+        """Profile this thread into an existing RequestProfile (streamed responses)"""
+        self._local.profile = profile
+
+    def _pending(self):
+        pending = getattr(self._local, 'pending', None)
+        if pending is None:
+            pending = self._local.pending = {}
+        return pending
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str):
+            collection = event.command.get('collection', '')
+        key = (event.command_name, collection, query_shape(event.command_name, event.command))
+        self._pending()[event.request_id] = key
+
+    def _finish(self, event, docs):
+        key = self._pending().pop(event.request_id, None)
+        if key is None:
+            return
+        ms = event.duration_micros / 1000
+        self.stats.add(key, ms, docs)
+        profile = getattr(self._local, 'profile', None)
+        if profile is not None:
+            profile.add(key, ms, docs)
+
+    def succeeded(self, event):
+        self._finish(event, _returned(event.command_name, event.reply))
+
+    def failed(self, event):
+        self._finish(event, 0)
+
+
+# Process-wide statistics and the listener core.database registers
+query_stats = QueryStats()
+profiler = QueryProfiler(query_stats)
@@ -0,0 +1,46 @@
+"""
+Analytics Context
+Request-scoped memo shared by the analytics services, so an agent page that
+needs the agent, its month metrics, funnel, funnel analysis and prediction
+computes each of them exactly once
+"""
+from core.models import Agent
+from core.services.metrics_engine import MetricsEngine
+
+
+class AnalyticsContext:
+    """
+    Memoizes analytics artifacts by (kind, agent_id, period) for one request
+    Create one per request and pass it as context= to the services; services
+    called without one get a private context (no sharing, same results)
+    """
+
+    def __init__(self):
+        self._memo = {}
+
+    @classmethod
+    def ensure(cls, context):
+        """The given context, or a fresh one when the caller passed None"""
+        return context if context is not None else cls()
+
+    def memoize(self, key, compute):
+        """Return the value stored under key, computing it on first use"""
+        if key not in self._memo:
+            self._memo[key] = compute()
+        return self._memo[key]
+
+    def prime_agents(self, agents):
+        """Seed agent documents the caller has already loaded"""
+        for agent in agents:
+            self._memo[('agent', agent['_id'])] = agent
+
+    def get_agent(self, agent_id):
+        """Agent document (Agent.get)"""
+        return self.memoize(('agent', agent_id), lambda: Agent.get(agent_id))
+
+    def get_month_metrics(self, agent_id, month_start):
+        """Month metrics from the rollup (MetricsEngine.get_month_metrics)"""
+        return self.memoize(
+            ('month_metrics', agent_id, month_start),
+            lambda: MetricsEngine.get_month_metrics(agent_id, month_start)
+        )
@@ -2,6 +2,8 @@
 Advanced Sales Funnel Analyzer with AI Insights
 Provides detailed stage-by-stage analysis and bottleneck detection
 """
+from datetime import datetime
+from core.services.analytics_context import AnalyticsContext
 from core.services.sales_funnel import SalesFunnelService
 
 
@@ -18,12 +20,29 @@ class FunnelAnalyzer:
     }
     
     @staticmethod
-    def analyze_funnel_stages(agent_id):
+    def analyze_funnel_stages(agent_id, context=None, start_date=None, end_date=None):
         """
         Perform deep analysis on each funnel stage
         Returns detailed insights for each conversion point
+        start_date/end_date: period of the funnel (the current month by default)
+        context: AnalyticsContext to reuse the funnel and analysis within a request
         """
-        funnel = SalesFunnelService.get_funnel_metrics(agent_id)
+        if start_date is None:
+            # Default to current month
+            now = datetime.now()
+            start_date = datetime(now.year, now.month, 1)
+        
+        context = AnalyticsContext.ensure(context)
+        return context.memoize(
+            ('funnel_analysis', agent_id, start_date, end_date),
+            lambda: FunnelAnalyzer._analyze_funnel(
+                SalesFunnelService.get_funnel_metrics(agent_id, start_date, end_date, context=context)
+            )
+        )
+    
+    @staticmethod
+    def _analyze_funnel(funnel):
+        """Stage-by-stage analysis of already computed funnel metrics"""
         
         stages_analysis = []
         
@@ -225,11 +244,11 @@ class FunnelAnalyzer:
         return round(min(100, avg_score), 1)
     
     @staticmethod
-    def get_ai_recommendations(agent_id):
+    def get_ai_recommendations(agent_id, context=None):
         """
         Get AI-powered recommendations based on funnel analysis
         """
-        analysis = FunnelAnalyzer.analyze_funnel_stages(agent_id)
+        analysis = FunnelAnalyzer.analyze_funnel_stages(agent_id, context)
         
         recommendations = []
         
@@ -1,28 +1,83 @@
 """
 Hierarchy Performance Service
 Aggregates performance data for Area Managers and Division Heads
+The hierarchy is walked through the company's OrgGraph; results are cached
+per (company, node, month) in the shared ResultCache and invalidated by the
+writes that change them
 """
-from core.models import Agent, AreaManager, DivisionHead, Activity, Sale, Lead, Product
+from core.cache import ResultCache
+from core.models import AreaManager, DivisionHead, Activity, Sale, Product
+from core.services.metrics_engine import MetricsEngine
+from core.services.org_graph import OrgGraph
 from core.services.performance import PerformanceService
 from core.services.predictor import PredictorService
 from core.services.sales_funnel import SalesFunnelService
+from core.metrics import SERVICE_DURATION, timed
 
 
 class HierarchyPerformanceService:
     """Service for calculating hierarchical performance metrics"""
     
+    # Dashboard order for agents
+    RISK_ORDER = {'HIGH': 0, 'MEDIUM': 1, 'LOW': 2, 'UNKNOWN': 3}
+    
+    # Agent card contents: latest activities/sales and best-selling products
+    RECENT_ITEMS = 5
+    TOP_PRODUCTS = 3
+    
+    @staticmethod
+    def _current_month():
+        start_date, _ = PerformanceService.get_current_month_range()
+        return start_date.strftime('%Y-%m')
+    
     @staticmethod
-    def get_area_manager_performance(manager_id):
+    def _org_graph(company_id, get_node, node_id):
+        """
+        The OrgGraph of company_id; when the caller doesn't know the company
+        it is read from the node's own document (None if the node is missing)
+        """
+        if company_id is None:
+            node = get_node(node_id)
+            if not node:
+                return None
+            company_id = node.get('company_id')
+        return OrgGraph.for_company(company_id)
+    
+    @staticmethod
+    @timed(SERVICE_DURATION, 'HierarchyPerformanceService.get_area_manager_performance')
+    def get_area_manager_performance(manager_id, company_id=None):
         """
         Get aggregated performance for an area manager's team
-        Returns performance summary and list of agents
+        Returns performance summary and list of agents (highest risk first),
+        or None if the manager doesn't exist (in company_id, when given)
+        
+        The result is shared between requests: treat it as read-only
         """
-        manager = AreaManager.get(manager_id)
+        graph = HierarchyPerformanceService._org_graph(company_id, AreaManager.get, manager_id)
+        manager = graph.get_area_manager(manager_id) if graph else None
         if not manager:
             return None
         
+        return ResultCache.get_or_compute(
+            'area_manager', graph.company_id, manager_id,
+            HierarchyPerformanceService._current_month(),
+            lambda: HierarchyPerformanceService._compute_area_manager_performance(manager, graph)
+        )
+    
+    @staticmethod
+    def _compute_area_manager_performance(manager, graph):
+        """
+        Build an area manager's team performance (uncached)
+        
+        The team comes from the org graph, the rest is loaded with a fixed
+        number of queries (metrics, recent activities, recent sales, top
+        products, product catalog) that return only what the cards show, and
+        agent cards are built in memory
+        """
+        manager_id = manager['_id']
+        
         # Get all agents under this manager
-        agents = Agent.get_by_area_manager(manager_id)
+        agents = graph.agents_of(manager_id)
         
         if not agents:
             return {
@@ -41,6 +96,33 @@ class HierarchyPerformanceService:
                 }
             }
         
+        # Team-wide fetches: each query covers every agent in the team
+        agent_ids = [agent['_id'] for agent in agents]
+        start_date, end_date = PerformanceService.get_current_month_range()
+        metrics_by_agent = MetricsEngine.get_month_metrics_for_agents(agent_ids, start_date)
+        
+        activities_by_agent = Activity.get_recent_by_agents(agent_ids, HierarchyPerformanceService.RECENT_ITEMS)
+        sales_by_agent = Sale.get_recent_by_agents(agent_ids, HierarchyPerformanceService.RECENT_ITEMS)
+        products_by_agent = Sale.get_top_products_by_agents(agent_ids, HierarchyPerformanceService.TOP_PRODUCTS)
+        
+        # Join products once from a catalog of every product on the cards
+        product_ids = {
+            sale['product_id']
+            for sales in sales_by_agent.values()
+            for sale in sales
+            if sale.get('product_id')
+        }
+        product_ids.update(
+            product['product_id'] for products in products_by_agent.values() for product in products
+        )
+        catalog = Product.get_catalog(product_ids) if product_ids else {}
+        
+        # Predict the whole team with one predict_proba call
+        try:
+            predictions = PredictorService.predict_batch(agents, metrics_by_agent)
+        except Exception:
+            predictions = {}
+        
         # Collect agent performance data
         agents_data = []
         total_sales = 0
@@ -49,78 +131,29 @@ class HierarchyPerformanceService:
         risk_counts = {'HIGH': 0, 'MEDIUM': 0, 'LOW': 0, 'UNKNOWN': 0}
         
         for agent in agents:
-            agent_id = agent['_id']
-            
-            # Get performance
-            performance = PerformanceService.get_agent_performance(agent_id)
-            
-            # Get prediction
-            try:
-                prediction = PredictorService.predict_agent(agent_id)
-            except:
-                prediction = {
-                    'prediction': 'N/A',
-                    'risk_level': 'UNKNOWN',
-                    'confidence': 0
-                }
-            
-            # Get sales funnel metrics
-            try:
-                funnel = SalesFunnelService.get_funnel_metrics(agent_id)
-            except:
-                funnel = None
-            
-            # Get recent activities (last 5)
-            recent_activities = Activity.get_by_agent(agent_id)
-            recent_activities = sorted(recent_activities, key=lambda x: x.get('created_at', x.get('date')), reverse=True)[:5]
-            
-            # Get recent sales with product details
-            sales = Sale.get_by_agent(agent_id)
-            recent_sales = []
-            for sale in sorted(sales, key=lambda x: x['date'], reverse=True)[:5]:
-                sale_data = dict(sale)
-                if sale.get('product_id'):
-                    product = Product.get(sale['product_id'])
-                    sale_data['product'] = product
-                else:
-                    sale_data['product'] = None
-                recent_sales.append(sale_data)
-            
-            # Get product performance (group sales by product)
-            product_performance = {}
-            for sale in sales:
-                if sale.get('product_id'):
-                    pid = sale['product_id']
-                    if pid not in product_performance:
-                        product = Product.get(pid)
-                        product_performance[pid] = {
-                            'product': product,
-                            'count': 0,
-                            'total_amount': 0
-                        }
-                    product_performance[pid]['count'] += 1
-                    product_performance[pid]['total_amount'] += sale['amount']
-            
-            # Sort products by total amount
-            top_products = sorted(product_performance.values(), key=lambda x: x['total_amount'], reverse=True)[:3]
-            
-            agents_data.append({
-                'agent': agent,
-                'agent_id': agent_id,
-                'performance': performance,
-                'prediction': prediction,
-                'funnel': funnel,
-                'recent_activities': recent_activities,
-                'recent_sales': recent_sales,
-                'top_products': top_products
-            })
+            agent_data = HierarchyPerformanceService._build_agent_card(
+                agent,
+                metrics_by_agent.get(agent['_id'], MetricsEngine.empty_metrics()),
+                activities_by_agent.get(agent['_id'], []),
+                sales_by_agent.get(agent['_id'], []),
+                products_by_agent.get(agent['_id'], []),
+                catalog,
+                predictions.get(agent['_id']),
+                start_date
+            )
+            agents_data.append(agent_data)
             
             # Aggregate metrics
+            performance = agent_data['performance']
             if performance:
                 total_sales += performance['sales']['actual']
                 total_target += performance['sales']['target']
                 total_score += performance['overall_score']
-                risk_counts[prediction['risk_level']] += 1
+                risk_counts[agent_data['prediction']['risk_level']] += 1
+        
+        # Sort agents by risk level (HIGH first)
+        risk_order = HierarchyPerformanceService.RISK_ORDER
+        agents_data.sort(key=lambda x: risk_order.get(x['prediction']['risk_level'], 999))
         
         # Calculate summary
         achievement_percentage = (total_sales / total_target * 100) if total_target > 0 else 0
@@ -143,17 +176,150 @@ class HierarchyPerformanceService:
         }
     
     @staticmethod
-    def get_division_head_performance(head_id):
+    def _build_agent_card(agent, metrics, recent_activities, recent_sales, top_products, catalog, prediction, start_date):
+        """
+        Build one agent's dashboard card from data already fetched for the team
+        (recent items newest first, top products by total amount)
+        No database access happens here
+        """
+        agent_id = agent['_id']
+        
+        # Get performance
+        performance = PerformanceService.build_performance(agent, metrics, start_date)
+        
+        # Prediction comes from the team batch (None if the model is unavailable)
+        if prediction is None:
+            prediction = {
+                'prediction': 'N/A',
+                'risk_level': 'UNKNOWN',
+                'confidence': 0
+            }
+        
+        # Get sales funnel metrics (this month's counts, as SalesFunnelService.get_funnel_metrics)
+        try:
+            funnel = SalesFunnelService.funnel_from_metrics(metrics)
+        except:
+            funnel = None
+        
+        # Join the product details
+        recent_sales = [
+            dict(sale, product=catalog.get(sale['product_id']) if sale.get('product_id') else None)
+            for sale in recent_sales
+        ]
+        top_products = [
+            {'product': catalog.get(product['product_id']), 'count': product['count'], 'total_amount': product['total_amount']}
+            for product in top_products
+        ]
+        
+        return {
+            'agent': agent,
+            'agent_id': agent_id,
+            'performance': performance,
+            'prediction': prediction,
+            'funnel': funnel,
+            'recent_activities': recent_activities,
+            'recent_sales': recent_sales,
+            'top_products': top_products
+        }
+    
+    @staticmethod
+    @timed(SERVICE_DURATION, 'HierarchyPerformanceService.get_division_head_performance')
+    def get_division_head_performance(head_id, company_id=None, detail=False):
         """
         Get aggregated performance for a division head's areas
-        Returns performance summary and list of area managers
+        Returns performance summary and list of area managers (lowest
+        achievement first, to highlight issues)
+        
+        By default this is a roll-up: area and division totals (agents,
+        targets, sales, achievement) come from one grouped aggregation and no
+        per-agent cards are built; load those for one area on demand with
+        get_area_manager_performance. detail=True builds every area's full
+        team performance, including scores and risk counts
+        
+        Returns None if the division head doesn't exist (in company_id, when
+        given). The result is shared between requests: treat it as read-only
         """
-        head = DivisionHead.get(head_id)
+        graph = HierarchyPerformanceService._org_graph(company_id, DivisionHead.get, head_id)
+        head = graph.get_division_head(head_id) if graph else None
         if not head:
             return None
         
+        if detail:
+            kind = 'division_head_detail'
+            compute = HierarchyPerformanceService._compute_division_head_performance
+        else:
+            kind = 'division_head'
+            compute = HierarchyPerformanceService._compute_division_rollup
+        
+        return ResultCache.get_or_compute(
+            kind, graph.company_id, head_id,
+            HierarchyPerformanceService._current_month(),
+            lambda: compute(head, graph)
+        )
+    
+    @staticmethod
+    def _compute_division_rollup(head, graph):
+        """
+        Build a division head's area and division totals (uncached)
+        Area managers come from the org graph, totals from one aggregation
+        """
+        head_id = head['_id']
+        area_managers = graph.area_managers_of(head_id)
+        
+        start_date, _ = PerformanceService.get_current_month_range()
+        totals = MetricsEngine.get_team_totals([manager['_id'] for manager in area_managers], start_date)
+        
+        areas_data = []
+        division_total_sales = 0
+        division_total_target = 0
+        division_total_agents = 0
+        
+        for manager in area_managers:
+            team = totals.get(manager['_id'], {})
+            total_sales = team.get('total_sales', 0)
+            total_target = team.get('total_target', 0)
+            total_agents = team.get('total_agents', 0)
+            
+            areas_data.append({
+                'manager': manager,
+                'manager_id': manager['_id'],
+                'summary': {
+                    'total_agents': total_agents,
+                    'total_sales': total_sales,
+                    'total_target': total_target,
+                    'achievement_percentage': (total_sales / total_target * 100) if total_target > 0 else 0
+                }
+            })
+            
+            division_total_sales += total_sales
+            division_total_target += total_target
+            division_total_agents += total_agents
+        
+        # Sort areas by achievement percentage (lowest first)
+        areas_data.sort(key=lambda x: x['summary']['achievement_percentage'])
+        
+        achievement_percentage = (division_total_sales / division_total_target * 100) if division_total_target > 0 else 0
+        
+        return {
+            'division_head': head,
+            'head_id': head_id,
+            'areas': areas_data,
+            'summary': {
+                'total_areas': len(area_managers),
+                'total_agents': division_total_agents,
+                'total_sales': division_total_sales,
+                'total_target': division_total_target,
+                'achievement_percentage': achievement_percentage
+            }
+        }
+    
+    @staticmethod
+    def _compute_division_head_performance(head, graph):
+        """Build a division head's performance from its (cached) area results"""
+        head_id = head['_id']
+        
         # Get all area managers under this division head
-        area_managers = AreaManager.get_by_division_head(head_id)
+        area_managers = graph.area_managers_of(head_id)
         
         if not area_managers:
             return {
@@ -185,7 +351,7 @@ class HierarchyPerformanceService:
             manager_id = manager['_id']
             
             # Get area manager's performance
-            area_performance = HierarchyPerformanceService.get_area_manager_performance(manager_id)
+            area_performance = HierarchyPerformanceService.get_area_manager_performance(manager_id, graph.company_id)
             
             if area_performance:
                 areas_data.append(area_performance)
@@ -200,6 +366,9 @@ class HierarchyPerformanceService:
                 division_risk_counts['MEDIUM'] += summary['medium_risk_count']
                 division_risk_counts['LOW'] += summary['low_risk_count']
         
+        # Sort areas by achievement percentage (lowest first)
+        areas_data.sort(key=lambda x: x['summary']['achievement_percentage'])
+        
         # Calculate division summary
         achievement_percentage = (division_total_sales / division_total_target * 100) if division_total_target > 0 else 0
         average_score = division_total_score / division_total_agents if division_total_agents > 0 else 0
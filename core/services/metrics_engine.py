@@ -0,0 +1,204 @@
+"""
+Metrics Engine
+Computes monthly activity counts and sales totals with aggregation pipelines
+instead of one count query per activity type
+Reads go through db.analytics (secondaries when routing is configured)
+"""
+from core.database import db
+from core.models import AgentMonthlyStats
+
+
+class MetricsEngine:
+    """Aggregation-based metrics for one agent or a whole company"""
+
+    # Maps activity_type values to the metric keys used by the services
+    ACTIVITY_KEYS = {
+        'call': 'calls',
+        'meeting': 'meetings',
+        'lead': 'leads',
+        'deal': 'deals'
+    }
+
+    # Group key of the sales row appended to the activity pipeline
+    SALES_ROW = '__sales__'
+
+    @staticmethod
+    def empty_metrics():
+        """Metrics for an agent with no activity in the period"""
+        return {
+            'calls': 0,
+            'meetings': 0,
+            'leads': 0,
+            'deals': 0,
+            'total_sales': 0,
+            'sales_count': 0
+        }
+
+    @staticmethod
+    def _date_query(start_date=None, end_date=None):
+        """Build a date range filter (same bounds as Activity.count_by_agent)"""
+        date_query = {}
+        if start_date:
+            date_query["$gte"] = start_date
+        if end_date:
+            date_query["$lte"] = end_date
+        return date_query
+
+    @staticmethod
+    def _activity_match(start_date=None, end_date=None, company_id=None):
+        query = {}
+        if company_id:
+            query["company_id"] = company_id
+        date_query = MetricsEngine._date_query(start_date, end_date)
+        if date_query:
+            query["created_at"] = date_query
+        return query
+
+    @staticmethod
+    def _sale_match(start_date=None, end_date=None, company_id=None):
+        query = {}
+        if company_id:
+            query["company_id"] = company_id
+        date_query = MetricsEngine._date_query(start_date, end_date)
+        if date_query:
+            query["date"] = date_query
+        return query
+
+    @staticmethod
+    def get_month_metrics(agent_id, month_start):
+        """
+        Get one agent's metrics for a calendar month from the agent_monthly_stats rollup
+        """
+        return AgentMonthlyStats.get_metrics(agent_id, AgentMonthlyStats.month_key(month_start))
+
+    @staticmethod
+    def get_month_metrics_for_agents(agent_ids, month_start):
+        """
+        Get metrics for a calendar month for several agents from the rollup (one query)
+        Returns dict of agent_id -> metrics; agents without data are omitted
+        """
+        month = AgentMonthlyStats.month_key(month_start)
+        rollups = AgentMonthlyStats.get_metrics_for_agents(agent_ids, [month])
+        return {agent_id: metrics for (agent_id, _), metrics in rollups.items()}
+
+    @staticmethod
+    def get_team_totals(area_manager_ids, month_start):
+        """
+        Get agent counts, targets and month sales per area manager in one aggregation
+        Agents are grouped by area_manager_id with their month rollup joined by
+        $lookup on (agent_id, month), so the rollup's (agent_id, month) index
+        serves the join and no per-agent documents are returned
+        Returns dict of area_manager_id -> totals; managers without agents are omitted
+        """
+        month = AgentMonthlyStats.month_key(month_start)
+        pipeline = [
+            {"$match": {"area_manager_id": {"$in": list(area_manager_ids)}}},
+            {"$lookup": {
+                "from": AgentMonthlyStats.COLLECTION,
+                "let": {"agent_id": "$_id"},
+                "pipeline": [
+                    {"$match": {
+                        "month": month,
+                        "$expr": {"$eq": ["$agent_id", "$$agent_id"]}
+                    }},
+                    {"$project": {"_id": 0, "total_sales": 1, "sales_count": 1}}
+                ],
+                "as": "stats"
+            }},
+            {"$group": {
+                "_id": "$area_manager_id",
+                "total_agents": {"$sum": 1},
+                "total_target": {"$sum": "$monthly_target"},
+                "total_sales": {"$sum": {"$sum": "$stats.total_sales"}},
+                "sales_count": {"$sum": {"$sum": "$stats.sales_count"}}
+            }}
+        ]
+
+        totals = {}
+        for row in db.analytics.agents.aggregate(pipeline):
+            manager_id = row.pop("_id")
+            totals[manager_id] = row
+        return totals
+
+    @staticmethod
+    def get_agent_metrics(agent_id, start_date=None, end_date=None, company_id=None):
+        """
+        Get activity counts and sales totals for one agent in a single round-trip
+        Activities are grouped by type and the sales total is appended with $unionWith
+        """
+        activity_match = MetricsEngine._activity_match(start_date, end_date, company_id)
+        activity_match["agent_id"] = agent_id
+
+        sale_match = MetricsEngine._sale_match(start_date, end_date, company_id)
+        sale_match["agent_id"] = agent_id
+
+        pipeline = [
+            {"$match": activity_match},
+            {"$group": {"_id": "$activity_type", "count": {"$sum": 1}}},
+            {"$unionWith": {
+                "coll": "sales",
+                "pipeline": [
+                    {"$match": sale_match},
+                    {"$group": {
+                        "_id": MetricsEngine.SALES_ROW,
+                        "total": {"$sum": "$amount"},
+                        "count": {"$sum": 1}
+                    }}
+                ]
+            }}
+        ]
+
+        metrics = MetricsEngine.empty_metrics()
+        for row in db.analytics.activities.aggregate(pipeline):
+            if row["_id"] == MetricsEngine.SALES_ROW:
+                metrics['total_sales'] = row.get("total", 0)
+                metrics['sales_count'] = row.get("count", 0)
+            elif row["_id"] in MetricsEngine.ACTIVITY_KEYS:
+                metrics[MetricsEngine.ACTIVITY_KEYS[row["_id"]]] = row["count"]
+
+        return metrics
+
+    @staticmethod
+    def get_company_metrics(company_id=None, start_date=None, end_date=None, agent_ids=None):
+        """
+        Get metrics for every agent of a company (or a given set of agents)
+        Runs one pipeline over activities and one over sales
+        Returns dict of agent_id -> metrics; agents without data are omitted
+        """
+        activity_match = MetricsEngine._activity_match(start_date, end_date, company_id)
+        sale_match = MetricsEngine._sale_match(start_date, end_date, company_id)
+        if agent_ids is not None:
+            activity_match["agent_id"] = {"$in": list(agent_ids)}
+            sale_match["agent_id"] = {"$in": list(agent_ids)}
+
+        metrics_by_agent = {}
+
+        activity_pipeline = [
+            {"$match": activity_match},
+            {"$group": {
+                "_id": {"agent_id": "$agent_id", "activity_type": "$activity_type"},
+                "count": {"$sum": 1}
+            }}
+        ]
+        for row in db.analytics.activities.aggregate(activity_pipeline):
+            key = MetricsEngine.ACTIVITY_KEYS.get(row["_id"].get("activity_type"))
+            if key is None:
+                continue
+            agent_id = row["_id"]["agent_id"]
+            metrics = metrics_by_agent.setdefault(agent_id, MetricsEngine.empty_metrics())
+            metrics[key] = row["count"]
+
+        sale_pipeline = [
+            {"$match": sale_match},
+            {"$group": {
+                "_id": "$agent_id",
+                "total": {"$sum": "$amount"},
+                "count": {"$sum": 1}
+            }}
+        ]
+        for row in db.analytics.sales.aggregate(sale_pipeline):
+            metrics = metrics_by_agent.setdefault(row["_id"], MetricsEngine.empty_metrics())
+            metrics['total_sales'] = row["total"]
+            metrics['sales_count'] = row["count"]
+
+        return metrics_by_agent
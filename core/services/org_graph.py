@@ -0,0 +1,133 @@
+"""
+Organisation Graph
+A company's division heads, area managers and agents loaded with three bulk
+queries and indexed by parent, so dashboards and permission checks walk the
+hierarchy in memory instead of issuing one query per node
+"""
+from core.cache import ResultCache
+from core.database import db
+from core.models import User
+
+
+class OrgGraph:
+    """
+    In-memory hierarchy of one company: division head -> area managers -> agents
+    Graphs are shared through the ResultCache and rebuilt when the company's
+    data version changes (hierarchy writes bump it); treat them as read-only
+    """
+
+    def __init__(self, company_id, division_heads, area_managers, agents):
+        self.company_id = company_id
+        self.division_heads = {head['_id']: head for head in division_heads}
+        self.area_managers = {manager['_id']: manager for manager in area_managers}
+        self.agents = {agent['_id']: agent for agent in agents}
+
+        # Parent -> children indexes (in load order)
+        self._managers_by_head = {}
+        for manager in area_managers:
+            self._managers_by_head.setdefault(manager.get('division_head_id'), []).append(manager)
+        self._agents_by_manager = {}
+        for agent in agents:
+            self._agents_by_manager.setdefault(agent.get('area_manager_id'), []).append(agent)
+
+    @classmethod
+    def build(cls, company_id):
+        """Load a company's hierarchy (three queries, uncached)"""
+        query = {"company_id": company_id}
+        return cls(
+            company_id,
+            list(db.division_heads.find(query)),
+            list(db.area_managers.find(query)),
+            list(db.agents.find(query))
+        )
+
+    @classmethod
+    def for_company(cls, company_id):
+        """Get a company's graph (cached until its data version changes)"""
+        return ResultCache.get_or_compute(
+            'org_graph', company_id, company_id, '*',
+            lambda: cls.build(company_id)
+        )
+
+    def get_division_head(self, head_id):
+        return self.division_heads.get(head_id)
+
+    def get_area_manager(self, manager_id):
+        return self.area_managers.get(manager_id)
+
+    def get_agent(self, agent_id):
+        return self.agents.get(agent_id)
+
+    def area_managers_of(self, head_id):
+        """Area managers reporting to a division head"""
+        return list(self._managers_by_head.get(head_id, []))
+
+    def agents_of(self, manager_id):
+        """Agents in an area manager's team"""
+        return list(self._agents_by_manager.get(manager_id, []))
+
+    def agents_of_division(self, head_id):
+        """Agents in every team of a division head"""
+        return [
+            agent
+            for manager in self._managers_by_head.get(head_id, [])
+            for agent in self._agents_by_manager.get(manager['_id'], [])
+        ]
+
+    def division_head_of(self, agent_id):
+        """ID of the division head above an agent, or None"""
+        agent = self.agents.get(agent_id)
+        manager = self.area_managers.get(agent.get('area_manager_id')) if agent else None
+        return manager.get('division_head_id') if manager else None
+
+    def can_access_agent(self, user, agent_id):
+        """
+        Whether a user may see an agent: agents see themselves, area managers
+        their team, division heads their division, admins the whole company
+        """
+        agent = self.agents.get(agent_id)
+        if agent is None:
+            return False
+
+        role = user.get('role')
+        related_id = user.get('related_id')
+        if role == User.ROLE_AGENT:
+            return agent_id == related_id
+        if role == User.ROLE_AREA_MANAGER:
+            return agent.get('area_manager_id') == related_id
+        if role == User.ROLE_DIVISION_HEAD:
+            return self.division_head_of(agent_id) == related_id
+        return True
+
+    def agent_query(self, user):
+        """
+        MongoDB filter for the agents a user may see, by the same rules as
+        can_access_agent (combine it with the company filter)
+        """
+        role = user.get('role')
+        related_id = user.get('related_id')
+        if role == User.ROLE_AGENT:
+            return {'_id': related_id}
+        if role == User.ROLE_AREA_MANAGER:
+            return {'area_manager_id': related_id}
+        if role == User.ROLE_DIVISION_HEAD:
+            return {'area_manager_id': {'$in': [
+                manager['_id'] for manager in self._managers_by_head.get(related_id, [])
+            ]}}
+        return {}
+
+    def can_access_area_manager(self, user, manager_id):
+        """Whether a user may see an area manager's team"""
+        manager = self.area_managers.get(manager_id)
+        if manager is None:
+            return False
+
+        role = user.get('role')
+        related_id = user.get('related_id')
+        if role == User.ROLE_AGENT:
+            return False
+        if role == User.ROLE_AREA_MANAGER:
+            return manager_id == related_id
+        if role == User.ROLE_DIVISION_HEAD:
+            return manager.get('division_head_id') == related_id
+        return True
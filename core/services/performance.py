@@ -3,7 +3,10 @@ Performance calculation service
 Calculates agent performance based on activities and sales
 """
 from datetime import datetime, timedelta
-from core.models import Agent, Activity, Sale
+from core.models import Agent
+from core.services.analytics_context import AnalyticsContext
+from core.services.metrics_engine import MetricsEngine
+from core.metrics import SERVICE_DURATION, timed
 
 
 class PerformanceService:
@@ -57,25 +60,41 @@ class PerformanceService:
         return min(score, 100)  # Cap at 100
     
     @staticmethod
-    def get_agent_performance(agent_id):
+    @timed(SERVICE_DURATION, 'PerformanceService.get_agent_performance')
+    def get_agent_performance(agent_id, company_id=None, context=None):
         """
         Calculate comprehensive performance for an agent
         Returns dict with scores and metrics
+        context: AnalyticsContext to share the agent and metrics within a request
         """
-        agent = Agent.get(agent_id)
+        context = AnalyticsContext.ensure(context)
+        agent = context.get_agent(agent_id)
         if not agent:
             return None
         
+        # Tenant guard when the caller scopes the lookup to a company
+        if company_id and agent.get('company_id') != company_id:
+            return None
+        
         start_date, end_date = PerformanceService.get_current_month_range()
         
-        # Get activity counts
-        calls_count = Activity.count_by_agent(agent_id, 'call', start_date, end_date)
-        meetings_count = Activity.count_by_agent(agent_id, 'meeting', start_date, end_date)
-        leads_count = Activity.count_by_agent(agent_id, 'lead', start_date, end_date)
-        deals_count = Activity.count_by_agent(agent_id, 'deal', start_date, end_date)
+        # Activity counts and sales total from the monthly rollup
+        metrics = context.get_month_metrics(agent_id, start_date)
         
-        # Get total sales
-        total_sales = Sale.get_total_by_agent(agent_id, start_date, end_date)
+        return PerformanceService.build_performance(agent, metrics, start_date)
+    
+    @staticmethod
+    def build_performance(agent, metrics, start_date):
+        """
+        Build the performance dict for an agent from precomputed metrics
+        metrics: dict as returned by MetricsEngine (calls, meetings, leads, deals, total_sales)
+        """
+        calls_count = metrics['calls']
+        meetings_count = metrics['meetings']
+        leads_count = metrics['leads']
+        deals_count = metrics['deals']
+        
+        total_sales = metrics['total_sales']
         target_sales = agent.get('monthly_target', 0)
         
         # Calculate individual scores
@@ -113,7 +132,7 @@ class PerformanceService:
             performance_level = 'Poor'
         
         return {
-            'agent_id': agent_id,
+            'agent_id': agent['_id'],
             'agent_name': agent.get('name'),
             'month': start_date.strftime('%B %Y'),
             'activities': {
@@ -133,14 +152,18 @@ class PerformanceService:
         }
     
     @staticmethod
-    def get_all_agents_performance():
-        """Get performance data for all agents"""
-        agents = Agent.get_all()
-        performances = []
+    @timed(SERVICE_DURATION, 'PerformanceService.get_all_agents_performance')
+    def get_all_agents_performance(company_id=None):
+        """Get performance data for all agents (one rollup query for the whole set)"""
+        agents = Agent.get_all(company_id)
+        start_date, end_date = PerformanceService.get_current_month_range()
+        metrics_by_agent = MetricsEngine.get_month_metrics_for_agents(
+            [agent['_id'] for agent in agents], start_date
+        )
         
+        performances = []
         for agent in agents:
-            perf = PerformanceService.get_agent_performance(agent['_id'])
-            if perf:
-                performances.append(perf)
+            metrics = metrics_by_agent.get(agent['_id'], MetricsEngine.empty_metrics())
+            performances.append(PerformanceService.build_performance(agent, metrics, start_date))
         
         return performances
@@ -3,32 +3,80 @@ Prediction service using trained AI model
 """
 import os
 import pickle
+import threading
+import numpy as np
 import pandas as pd
 from datetime import datetime
-from core.models import Agent, Activity, Sale
+from django.conf import settings
+from core.models import Agent
+from core.ai.features import BASE_COLUMNS, FEATURE_COLUMNS, build_feature_frame
+from core.ai.model_cache import ModelCache
+from core.ai.registry import LoadedModel, ModelRegistry
 from core.ai.trainer import AITrainer
+from core.services.analytics_context import AnalyticsContext
+from core.services.metrics_engine import MetricsEngine
 from core.services.sales_funnel import SalesFunnelService
 from core.services.funnel_analyzer import FunnelAnalyzer
+from core.metrics import PREDICT_AGENT_DURATION, SERVICE_DURATION, timed
 
 
 class PredictorService:
     """Service for making predictions using trained AI model"""
     
-    _model = None
+    # Loaded models (global + per-company), hot-reloaded and LRU-evicted
+    _cache = None
+    _legacy = None
+    _cache_lock = threading.Lock()
     
     @classmethod
-    def load_model(cls):
-        """Load trained model from disk"""
-        if cls._model is None:
-            if os.path.exists(AITrainer.MODEL_PATH):
-                with open(AITrainer.MODEL_PATH, 'rb') as f:
-                    cls._model = pickle.load(f)
-            else:
-                raise FileNotFoundError(
-                    f"Model not found at {AITrainer.MODEL_PATH}. "
-                    "Please train the model first using AITrainer.train_model()"
-                )
-        return cls._model
+    def get_cache(cls):
+        with cls._cache_lock:
+            if cls._cache is None:
+                cls._cache = ModelCache(settings.MODEL_CACHE_MAX_BYTES, settings.MODEL_RELOAD_CHECK_SECONDS)
+            return cls._cache
+    
+    @classmethod
+    def current_model(cls, company_id=None):
+        """
+        Get the model serving a company as a LoadedModel(version, model, manifest)
+        Uses the company's own model when one has been published, otherwise the
+        global model (tenants with too little history never get their own)
+        """
+        cache = cls.get_cache()
+        if company_id:
+            loaded = cache.get(ModelRegistry.for_company(company_id))
+            if loaded is not None:
+                return loaded
+        
+        loaded = cache.get(ModelRegistry())
+        if loaded is not None:
+            return loaded
+        
+        # Legacy single-file model from before the registry
+        if cls._legacy is None and os.path.exists(AITrainer.MODEL_PATH):
+            with open(AITrainer.MODEL_PATH, 'rb') as f:
+                cls._legacy = LoadedModel(None, pickle.load(f), {})
+        if cls._legacy is not None:
+            return cls._legacy
+        
+        raise FileNotFoundError(
+            f"Model not found in {settings.MODEL_REGISTRY_DIR} or at {AITrainer.MODEL_PATH}. "
+            "Please train the model first using AITrainer.train_model()"
+        )
+    
+    @classmethod
+    def load_model(cls, company_id=None):
+        """Load trained model (hot-reloaded when a new version is published)"""
+        return cls.current_model(company_id).model
+    
+    @classmethod
+    def reset_model(cls, company_id=None):
+        """Forget a cached model (all of them by default) so it is reloaded from disk"""
+        if company_id:
+            cls.get_cache().invalidate(ModelRegistry.for_company(company_id))
+        else:
+            cls.get_cache().invalidate()
+            cls._legacy = None
     
     @staticmethod
     def get_current_month_range():
@@ -44,104 +92,157 @@ class PredictorService:
         return start_date, end_date
     
     @staticmethod
-    def prepare_agent_features(agent_id):
+    def prepare_agent_features(agent_id, context=None):
         """
         Prepare features for prediction from current month's data
         """
-        agent = Agent.get(agent_id)
+        context = AnalyticsContext.ensure(context)
+        agent = context.get_agent(agent_id)
         if not agent:
             return None
         
         start_date, end_date = PredictorService.get_current_month_range()
-        
-        # Get activity counts
-        calls = Activity.count_by_agent(agent_id, 'call', start_date, end_date)
-        meetings = Activity.count_by_agent(agent_id, 'meeting', start_date, end_date)
-        leads = Activity.count_by_agent(agent_id, 'lead', start_date, end_date)
-        deals = Activity.count_by_agent(agent_id, 'deal', start_date, end_date)
-        
-        # Get total sales
-        total_sales = Sale.get_total_by_agent(agent_id, start_date, end_date)
-        monthly_target = agent.get('monthly_target', 0)
-        
-        # Calculate additional features
-        sales_percentage = (total_sales / monthly_target * 100) if monthly_target > 0 else 0
-        conversion_rate = (deals / leads * 100) if leads > 0 else 0
-        meeting_to_deal = (deals / meetings * 100) if meetings > 0 else 0
-        
-        # Calculate funnel-specific conversion rates
-        calls_to_leads = (leads / calls * 100) if calls > 0 else 0
-        leads_to_meetings = (meetings / leads * 100) if leads > 0 else 0
-        meetings_to_deals = (deals / meetings * 100) if meetings > 0 else 0
-        
-        # Calculate funnel efficiency (overall conversion from calls to deals)
-        funnel_efficiency = (deals / calls * 100) if calls > 0 else 0
-        
-        # Calculate activity velocity
+        return context.memoize(
+            ('features', agent_id, start_date),
+            lambda: PredictorService.build_features(
+                agent, context.get_month_metrics(agent_id, start_date), start_date, end_date
+            )
+        )
+    
+    @staticmethod
+    def build_features(agent, metrics, start_date, end_date):
+        """
+        Build the one-row feature DataFrame for an agent from precomputed metrics
+        """
+        features = PredictorService.build_feature_matrix(
+            [agent], {agent['_id']: metrics}, start_date, end_date
+        )
+        return features.reset_index(drop=True)
+    
+    @staticmethod
+    def build_feature_matrix(agents, metrics_by_agent, start_date, end_date):
+        """
+        Build the feature matrix for N agents at once (one row per agent, indexed by agent ID)
+        metrics_by_agent: dict of agent_id -> month metrics; missing agents count as zero
+        """
         days_in_month = (end_date - start_date).days
-        activity_velocity = (calls + meetings + leads + deals) / days_in_month if days_in_month > 0 else 0
-        
-        features = {
-            'calls': calls,
-            'meetings': meetings,
-            'leads': leads,
-            'deals': deals,
-            'total_sales': total_sales,
-            'monthly_target': monthly_target,
-            'sales_percentage': sales_percentage,
-            'conversion_rate': conversion_rate,
-            'meeting_to_deal': meeting_to_deal,
-            'calls_to_leads_conversion': calls_to_leads,
-            'leads_to_meetings_conversion': leads_to_meetings,
-            'meetings_to_deals_conversion': meetings_to_deals,
-            'funnel_efficiency': funnel_efficiency,
-            'activity_velocity': activity_velocity
-        }
-        
-        return pd.DataFrame([features])
+        rows = []
+        for agent in agents:
+            metrics = metrics_by_agent.get(agent['_id'], MetricsEngine.empty_metrics())
+            rows.append({
+                'calls': metrics['calls'],
+                'meetings': metrics['meetings'],
+                'leads': metrics['leads'],
+                'deals': metrics['deals'],
+                'total_sales': metrics['total_sales'],
+                'monthly_target': agent.get('monthly_target', 0),
+                'days_in_month': days_in_month
+            })
+        
+        base = pd.DataFrame(rows, columns=BASE_COLUMNS, index=[agent['_id'] for agent in agents])
+        return build_feature_frame(base)
     
     @staticmethod
-    def predict_agent(agent_id):
+    @timed(PREDICT_AGENT_DURATION)
+    def predict_agent(agent_id, context=None):
         """
         Predict if agent will HIT or MISS their target
         Returns dict with prediction and probability
+        context: AnalyticsContext to share the agent, metrics and prediction within a request
         """
-        # Load model
-        model = PredictorService.load_model()
-        
-        # Prepare features
-        features = PredictorService.prepare_agent_features(agent_id)
-        if features is None:
+        context = AnalyticsContext.ensure(context)
+        agent = context.get_agent(agent_id)
+        if not agent:
             return None
         
-        # Make prediction
-        prediction = model.predict(features)[0]
-        probability = model.predict_proba(features)[0]
+        start_date, end_date = PredictorService.get_current_month_range()
+        
+        # Scored by the agent's company model, or the global one
+        return context.memoize(
+            ('prediction', agent_id, start_date),
+            lambda: PredictorService.predict_with_metrics(agent, context.get_month_metrics(agent_id, start_date))
+        )
+    
+    @staticmethod
+    def predict_with_metrics(agent, metrics, model=None):
+        """
+        Predict for an agent whose month metrics were already fetched
+        Lets batch callers avoid the per-agent database round-trips
+        """
+        predictions = PredictorService.predict_batch([agent], {agent['_id']: metrics}, model)
+        return predictions[agent['_id']]
+    
+    @staticmethod
+    def predict_batch(agents, metrics_by_agent=None, model=None):
+        """
+        Predict HIT/MISS for many agents with one predict_proba call per model
+        Agents are grouped by company so each is scored by its company's model
+        (or the global fallback); pass model to score every agent with it
+        metrics_by_agent: month metrics keyed by agent ID (fetched from the rollup if omitted)
+        Returns dict of agent_id -> prediction dict (same shape as predict_agent)
+        """
+        if not agents:
+            return {}
         
-        # Get agent info
-        agent = Agent.get(agent_id)
+        start_date, end_date = PredictorService.get_current_month_range()
+        if metrics_by_agent is None:
+            metrics_by_agent = MetricsEngine.get_month_metrics_for_agents(
+                [agent['_id'] for agent in agents], start_date
+            )
         
-        # Handle probability array (may have 1 or 2 values depending on classes seen in training)
-        if len(probability) == 2:
-            prob_miss = probability[0]
-            prob_hit = probability[1]
+        if model is not None:
+            groups = [(model, None, agents)]
         else:
-            # Only one class seen in training data
-            prob_miss = probability[0] if prediction == 0 else 1 - probability[0]
-            prob_hit = 1 - prob_miss
-        
-        result = {
-            'agent_id': agent_id,
-            'agent_name': agent.get('name'),
-            'prediction': 'HIT' if prediction == 1 else 'MISS',
-            'confidence': max(probability) * 100,
-            'probability_hit': prob_hit * 100,
-            'probability_miss': prob_miss * 100,
-            'risk_level': PredictorService.calculate_risk_level(prob_miss),
-            'features': features.to_dict('records')[0]
-        }
-        
-        return result
+            agents_by_company = {}
+            for agent in agents:
+                agents_by_company.setdefault(agent.get('company_id'), []).append(agent)
+            groups = []
+            for company_id, company_agents in agents_by_company.items():
+                loaded = PredictorService.current_model(company_id)
+                groups.append((loaded.model, loaded.manifest.get('feature_columns'), company_agents))
+        
+        predictions = {}
+        for group_model, feature_columns, group_agents in groups:
+            features = PredictorService.build_feature_matrix(group_agents, metrics_by_agent, start_date, end_date)
+            if not feature_columns:
+                feature_columns = list(getattr(group_model, 'feature_names_in_', FEATURE_COLUMNS))
+            predictions.update(PredictorService._score(group_model, feature_columns, group_agents, features))
+        
+        return predictions
+    
+    @staticmethod
+    def _score(model, feature_columns, agents, features):
+        """Run one predict_proba over a feature matrix and build prediction dicts"""
+        # One pass over the forest in the column order the model was trained with;
+        # the label is the most probable class
+        probabilities = model.predict_proba(features[feature_columns])
+        classes = list(model.classes_)
+        labels = np.asarray(model.classes_)[probabilities.argmax(axis=1)]
+        
+        # Classes may be [0], [1] or [0, 1] depending on the labels seen in training
+        if 0 in classes:
+            prob_miss = probabilities[:, classes.index(0)]
+        else:
+            prob_miss = np.zeros(len(agents))
+        prob_hit = 1 - prob_miss
+        confidence = probabilities.max(axis=1)
+        
+        feature_records = features.to_dict('records')
+        
+        predictions = {}
+        for i, agent in enumerate(agents):
+            predictions[agent['_id']] = {
+                'agent_id': agent['_id'],
+                'agent_name': agent.get('name'),
+                'prediction': 'HIT' if labels[i] == 1 else 'MISS',
+                'confidence': confidence[i] * 100,
+                'probability_hit': prob_hit[i] * 100,
+                'probability_miss': prob_miss[i] * 100,
+                'risk_level': PredictorService.calculate_risk_level(prob_miss[i]),
+                'features': feature_records[i]
+            }
+        
+        return predictions
     
     @staticmethod
     def calculate_risk_level(miss_probability):
@@ -154,24 +255,28 @@ class PredictorService:
             return 'LOW'
     
     @staticmethod
-    def get_prediction_with_funnel_insights(agent_id):
+    def get_prediction_with_funnel_insights(agent_id, context=None):
         """
         Get prediction with detailed funnel insights and AI-driven analysis
         Returns prediction plus comprehensive funnel analysis
+        The funnel and its analysis are computed once and shared through context
         """
-        # Get standard prediction
-        prediction = PredictorService.predict_agent(agent_id)
+        context = AnalyticsContext.ensure(context)
+        
+        # Get standard prediction (copied - the memoized one stays unchanged)
+        prediction = PredictorService.predict_agent(agent_id, context)
         if not prediction:
             return None
+        prediction = dict(prediction)
         
         # Get detailed funnel metrics
-        funnel_data = SalesFunnelService.get_funnel_metrics(agent_id)
+        funnel_data = SalesFunnelService.get_funnel_metrics(agent_id, context=context)
         
         # Get advanced funnel analysis
-        funnel_analysis = FunnelAnalyzer.analyze_funnel_stages(agent_id)
+        funnel_analysis = FunnelAnalyzer.analyze_funnel_stages(agent_id, context)
         
         # Get AI recommendations
-        ai_recommendations = FunnelAnalyzer.get_ai_recommendations(agent_id)
+        ai_recommendations = FunnelAnalyzer.get_ai_recommendations(agent_id, context)
         
         # Combine all insights
         prediction['funnel_metrics'] = funnel_data
@@ -188,17 +293,15 @@ class PredictorService:
         return prediction
     
     @staticmethod
-    def predict_all_agents():
-        """Predict for all agents"""
-        agents = Agent.get_all()
-        predictions = []
+    @timed(SERVICE_DURATION, 'PredictorService.predict_all_agents')
+    def predict_all_agents(company_id=None):
+        """Predict for all agents (one rollup query and one predict_proba call)"""
+        agents = Agent.get_all(company_id)
         
-        for agent in agents:
-            try:
-                pred = PredictorService.predict_agent(agent['_id'])
-                if pred:
-                    predictions.append(pred)
-            except Exception as e:
-                print(f"Error predicting for agent {agent['_id']}: {e}")
+        try:
+            predictions = PredictorService.predict_batch(agents)
+        except Exception as e:
+            print(f"Error predicting for agents: {e}")
+            return []
         
-        return predictions
+        return [predictions[agent['_id']] for agent in agents]
@@ -2,7 +2,9 @@
 Sales Funnel Service
 Analyzes agent performance through sales funnel stages and conversion rates
 """
-from core.models import Activity, Sale
+from core.services.analytics_context import AnalyticsContext
+from core.services.metrics_engine import MetricsEngine
+from core.metrics import SERVICE_DURATION, timed
 from datetime import datetime
 
 
@@ -10,7 +12,8 @@ class SalesFunnelService:
     """Service for analyzing sales funnel metrics and conversion rates"""
     
     @staticmethod
-    def get_funnel_metrics(agent_id, start_date=None):
+    @timed(SERVICE_DURATION, 'SalesFunnelService.get_funnel_metrics')
+    def get_funnel_metrics(agent_id, start_date=None, end_date=None, context=None):
         """
         Calculate sales funnel metrics for an agent
         
@@ -21,6 +24,11 @@ class SalesFunnelService:
         4. Proposals (Deals) - Deals in negotiation
         5. Closed Sales - Successful sales
         
+        Stage counts come from one aggregation bounded by start_date/end_date
+        (grouped by activity_type plus a sales count), so no documents are loaded
+        
+        context: AnalyticsContext to reuse the funnel within a request
+        
         Returns conversion rates and bottleneck analysis
         """
         if start_date is None:
@@ -28,29 +36,51 @@ class SalesFunnelService:
             now = datetime.now()
             start_date = datetime(now.year, now.month, 1)
         
-        # Get activity counts by type
-        activities = Activity.get_by_agent(agent_id)
-        
-        calls_count = 0
-        leads_count = 0
-        meetings_count = 0
-        deals_count = 0
-        
-        for activity in activities:
-            activity_type = activity.get('activity_type', '')  # Fixed: use 'activity_type' field
-            if activity_type == 'call':
-                calls_count += 1
-            elif activity_type == 'lead':
-                leads_count += 1
-            elif activity_type == 'meeting':
-                meetings_count += 1
-            elif activity_type == 'deal':
-                deals_count += 1
-        
-        # Get closed sales count
-        sales = Sale.get_by_agent(agent_id)
-        closed_sales = len(sales)
+        context = AnalyticsContext.ensure(context)
+        return context.memoize(
+            ('funnel', agent_id, start_date, end_date),
+            lambda: SalesFunnelService.funnel_from_metrics(
+                MetricsEngine.get_agent_metrics(agent_id, start_date, end_date)
+            )
+        )
+    
+    @staticmethod
+    @timed(SERVICE_DURATION, 'SalesFunnelService.get_funnel_metrics_for_agents')
+    def get_funnel_metrics_for_agents(agent_ids, start_date=None, end_date=None, company_id=None):
+        """
+        Calculate sales funnel metrics for many agents at once
+        Two aggregations cover every agent (activities and sales)
+        Returns dict of agent_id -> funnel metrics
+        """
+        if start_date is None:
+            # Default to current month
+            now = datetime.now()
+            start_date = datetime(now.year, now.month, 1)
         
+        metrics_by_agent = MetricsEngine.get_company_metrics(company_id, start_date, end_date, agent_ids)
+        return {
+            agent_id: SalesFunnelService.funnel_from_metrics(
+                metrics_by_agent.get(agent_id, MetricsEngine.empty_metrics())
+            )
+            for agent_id in agent_ids
+        }
+    
+    @staticmethod
+    def funnel_from_metrics(metrics):
+        """Build funnel metrics from MetricsEngine/rollup counts"""
+        return SalesFunnelService.build_funnel_metrics(
+            metrics['calls'],
+            metrics['leads'],
+            metrics['meetings'],
+            metrics['deals'],
+            metrics['sales_count']
+        )
+    
+    @staticmethod
+    def build_funnel_metrics(calls_count, leads_count, meetings_count, deals_count, closed_sales):
+        """
+        Build funnel stages, conversion rates and recommendations from stage counts
+        """
         # Calculate conversion rates
         def safe_percentage(numerator, denominator):
             """Calculate percentage safely, avoiding division by zero"""
@@ -196,12 +226,12 @@ class SalesFunnelService:
         }
     
     @staticmethod
-    def get_funnel_analysis_for_ai(agent_id):
+    def get_funnel_analysis_for_ai(agent_id, context=None):
         """
         Get funnel metrics formatted for AI analysis
         Returns key metrics that indicate sales process health
         """
-        metrics = SalesFunnelService.get_funnel_metrics(agent_id)
+        metrics = SalesFunnelService.get_funnel_metrics(agent_id, context=context)
         
         return {
             'overall_conversion': metrics['conversion_rates']['overall'],
@@ -0,0 +1,68 @@
+"""
+Tenant and hierarchy scoping of /api/agents/
+Runs on an in-memory mongomock database (pip install mongomock)
+"""
+import json
+import unittest
+from django.test import RequestFactory, SimpleTestCase
+from core.cache import ResultCache
+from core.database import db
+from core.utils import benchmark
+from core.views import api_agents
+
+try:
+    import mongomock
+except ImportError:
+    mongomock = None
+
+
+@unittest.skipIf(mongomock is None, 'mongomock is not installed')
+class ApiAgentsScopeTests(SimpleTestCase):
+
+    def setUp(self):
+        benchmark.use_mongomock()
+        self.addCleanup(db.reset)
+        ResultCache.bump(None)
+        db.division_heads.insert_many([
+            {'_id': 'DH1', 'company_id': 'C1'},
+            {'_id': 'DH2', 'company_id': 'C1'},
+        ])
+        db.area_managers.insert_many([
+            {'_id': 'AM1', 'company_id': 'C1', 'division_head_id': 'DH1'},
+            {'_id': 'AM2', 'company_id': 'C1', 'division_head_id': 'DH2'},
+        ])
+        db.agents.insert_many([
+            {'_id': 'A1', 'company_id': 'C1', 'area_manager_id': 'AM1', 'name': 'One'},
+            {'_id': 'A2', 'company_id': 'C1', 'area_manager_id': 'AM1', 'name': 'Two'},
+            {'_id': 'A3', 'company_id': 'C1', 'area_manager_id': 'AM2', 'name': 'Three'},
+            {'_id': 'B1', 'company_id': 'C2', 'area_manager_id': 'BM1', 'name': 'Other'},
+        ])
+
+    def get(self, user, query=''):
+        request = RequestFactory().get('/api/agents/?fields=agent' + query)
+        request.user = user
+        response = api_agents(request)
+        body = json.loads(response.content)
+        ids = [row['agent']['_id'] for row in body.get('agents', [])]
+        return response.status_code, ids
+
+    def test_super_admin_must_name_a_company(self):
+        self.assertEqual(self.get({'role': 'super_admin'})[0], 400)
+        self.assertEqual(self.get({'role': 'super_admin'}, '&company=C2'), (200, ['B1']))
+
+    def test_company_admin_sees_own_company(self):
+        user = {'role': 'company_admin', 'company_id': 'C1'}
+        self.assertEqual(self.get(user), (200, ['A1', 'A2', 'A3']))
+
+    def test_hierarchy_roles_see_their_agents(self):
+        cases = [
+            ({'role': 'division_head', 'related_id': 'DH2'}, ['A3']),
+            ({'role': 'area_manager', 'related_id': 'AM1'}, ['A1', 'A2']),
+            ({'role': 'agent', 'related_id': 'A2'}, ['A2']),
+        ]
+        for user, expected in cases:
+            with self.subTest(role=user['role']):
+                self.assertEqual(self.get(dict(user, company_id='C1')), (200, expected))
+
+    def test_user_without_company_is_denied(self):
+        self.assertEqual(self.get({'role': 'agent', 'related_id': 'A1'})[0], 403)
@@ -0,0 +1,97 @@
+"""
+Monthly rollup of bulk ingestion when the rollup write fails and the batch is retried
+Runs on an in-memory mongomock database (pip install mongomock)
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+from django.test import SimpleTestCase, override_settings
+from core.database import db
+from core.ingest_queue import IngestQueue
+from core.models import Activity, AgentMonthlyStats
+from core.utils import benchmark
+
+try:
+    import mongomock
+except ImportError:
+    mongomock = None
+
+
+COMPANY_ID = 'TEST-CO'
+
+
+class FlakyRollup:
+    """Stands in for AgentMonthlyStats.record_many, failing the first `failures` calls"""
+
+    def __init__(self, failures=1):
+        self.failures = failures
+        self.counted = {}
+
+    def __call__(self, increments):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError('rollup write failed')
+        for key, fields in increments.items():
+            totals = self.counted.setdefault(key, {})
+            for field, value in fields.items():
+                totals[field] = totals.get(field, 0) + value
+
+
+def activity_rows():
+    return [
+        {'_id': 'ACT-1', 'agent_id': 'A1', 'activity_type': 'call', 'created_at': '2026-03-02T10:00:00'},
+        {'_id': 'ACT-2', 'agent_id': 'A1', 'activity_type': 'call', 'created_at': '2026-03-03T10:00:00'},
+    ]
+
+
+@unittest.skipIf(mongomock is None, 'mongomock is not installed')
+class BulkRollupRetryTests(SimpleTestCase):
+
+    def setUp(self):
+        benchmark.use_mongomock()
+        db.agents.insert_one({'_id': 'A1', 'company_id': COMPANY_ID})
+        self.rollup = FlakyRollup()
+        patcher = mock.patch.object(AgentMonthlyStats, 'record_many', self.rollup)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(db.reset)
+
+    def calls(self):
+        return self.rollup.counted.get((COMPANY_ID, 'A1', '2026-03'), {}).get('calls', 0)
+
+    def test_retried_upload_rolls_up_rows_of_the_failed_attempt(self):
+        with self.assertRaises(ConnectionError):
+            Activity.bulk_create(COMPANY_ID, activity_rows())
+        self.assertEqual(db.activities.count_documents({'rolled_up': False}), 2)
+
+        result = Activity.bulk_create(COMPANY_ID, activity_rows())
+
+        self.assertEqual((result['inserted'], result['duplicates']), (0, 2))
+        self.assertEqual(self.calls(), 2)
+        self.assertEqual(db.activities.count_documents({'rolled_up': True}), 2)
+
+    def test_rows_are_rolled_up_once(self):
+        self.rollup.failures = 0
+        Activity.bulk_create(COMPANY_ID, activity_rows())
+        Activity.bulk_create(COMPANY_ID, activity_rows())
+
+        self.assertEqual(self.calls(), 2)
+
+    def test_queue_redelivery_rolls_up_rows_of_the_failed_attempt(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        queue_path = os.path.join(directory.name, 'queue.sqlite3')
+        with override_settings(INGEST_QUEUE_PATH=queue_path, INGEST_QUEUE_WRITER='off'):
+            IngestQueue._local.conn = None
+            self.addCleanup(setattr, IngestQueue._local, 'conn', None)
+            IngestQueue.enqueue('activity', COMPANY_ID, activity_rows())
+
+            self.assertEqual(IngestQueue.process_batch(), 0)  # Rollup failed: group retried
+            self.assertEqual(self.calls(), 0)
+
+            IngestQueue._connection().execute('UPDATE events SET available_at = 0')
+            self.assertEqual(IngestQueue.process_batch(), 2)
+
+            self.assertEqual(self.calls(), 2)
+            self.assertEqual(IngestQueue.pending_count(), 0)
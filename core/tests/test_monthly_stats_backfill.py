@@ -0,0 +1,56 @@
+"""
+Backfill of the monthly rollup (rebuild_monthly_stats --if-empty)
+Runs on an in-memory mongomock database (pip install mongomock)
+"""
+import unittest
+from datetime import datetime
+from unittest import mock
+from django.test import SimpleTestCase
+from core.database import db
+from core.models import AgentMonthlyStats
+from core.utils import benchmark
+
+try:
+    import mongomock
+except ImportError:
+    mongomock = None
+
+
+@unittest.skipIf(mongomock is None, 'mongomock is not installed')
+class BackfillTests(SimpleTestCase):
+
+    def setUp(self):
+        benchmark.use_mongomock()
+        self.addCleanup(db.reset)
+        db.activities.insert_many([
+            {'_id': f'ACT-{i}', 'company_id': 'C1', 'agent_id': 'A1', 'activity_type': 'call',
+             'created_at': datetime(2026, 3, i + 1)}
+            for i in range(3)
+        ])
+
+    def calls(self):
+        doc = db.agent_monthly_stats.find_one({'_id': AgentMonthlyStats.stats_id('C1', 'A1', '2026-03')})
+        return doc['calls'] if doc else 0
+
+    def test_builds_an_empty_rollup_once(self):
+        self.assertEqual(AgentMonthlyStats.backfill_if_empty(), 1)
+        self.assertEqual(self.calls(), 3)
+        self.assertIsNone(db.agent_monthly_stats.find_one({'_id': AgentMonthlyStats.BACKFILL_MARKER_ID}))
+        self.assertIsNone(AgentMonthlyStats.backfill_if_empty())
+
+    def test_failed_backfill_is_retried(self):
+        with mock.patch.object(AgentMonthlyStats, '_replace_all', side_effect=ConnectionError('lost')):
+            with self.assertRaises(ConnectionError):
+                AgentMonthlyStats.backfill_if_empty()
+
+        self.assertEqual(AgentMonthlyStats.backfill_if_empty(), 1)
+        self.assertEqual(self.calls(), 3)
+
+    def test_claim_of_a_dead_process_expires(self):
+        marker = {'_id': AgentMonthlyStats.BACKFILL_MARKER_ID, 'started_at': datetime.now()}
+        db.agent_monthly_stats.insert_one(marker)
+        self.assertIsNone(AgentMonthlyStats.backfill_if_empty())  # Held by a live process
+
+        db.agent_monthly_stats.update_one({'_id': marker['_id']}, {'$set': {'started_at': datetime(2000, 1, 1)}})
+        self.assertEqual(AgentMonthlyStats.backfill_if_empty(), 1)
+        self.assertEqual(self.calls(), 3)
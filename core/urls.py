@@ -6,6 +6,8 @@ from . import views
 from . import views_setup
 from . import views_auth
 from . import views_subscription
+from . import views_ingest
+from . import views_debug
 
 urlpatterns = [
     # Landing page (public)
@@ -18,11 +20,13 @@ urlpatterns = [
     path('division-head/dashboard/', views.division_head_dashboard_view, name='division_head_dashboard'),
     path('agent/<str:agent_id>/', views.agent_detail, name='agent_detail'),
     path('train/', views.train_model, name='train_model'),
+    path('train/jobs/<str:job_id>/', views.training_job_status, name='training_job_status'),
     path('api/agents/', views.api_agents, name='api_agents'),
     
     # Area Manager routes
     path('area-managers/', views.area_managers_list, name='area_managers_list'),
     path('area-manager/<str:manager_id>/', views.area_manager_dashboard, name='area_manager_dashboard'),
+    path('api/area-manager/<str:manager_id>/agents/', views.api_area_manager_agents, name='api_area_manager_agents'),
     
     # Division Head routes
     path('division-heads/', views.division_heads_list, name='division_heads_list'),
@@ -51,6 +55,16 @@ urlpatterns = [
     path('api/subscription/record-payment/', views_subscription.record_payment, name='record_payment'),
     path('api/subscription/generate-invoices/', views_subscription.generate_invoices, name='generate_invoices'),
     
+    # Bulk ingestion routes (company admin; NDJSON or CSV body)
+    path('api/ingest/activities/', views_ingest.ingest_activities, name='ingest_activities'),
+    path('api/ingest/sales/', views_ingest.ingest_sales, name='ingest_sales'),
+    path('api/ingest/status/', views_ingest.ingest_status, name='ingest_status'),
+    
+    # Operational endpoints (super admin, or METRICS_TOKEN for /metrics; per worker process)
+    path('api/debug/db-pool/', views_debug.db_pool_stats, name='db_pool_stats'),
+    path('api/debug/queries/', views_debug.query_stats, name='query_stats'),
+    path('metrics', views_debug.metrics, name='metrics'),
+    
     # Setup endpoints (for free tier deployment)
     path('setup-database/', views_setup.setup_database, name='setup_database'),
     path('check-data/', views_setup.check_data, name='check_data'),
@@ -0,0 +1,364 @@
+"""
+Benchmark harness for the analytics services, model training and dashboards
+Times each entry point against a seeded tenant (see bulk_seed.seed_tenant)
+and reports latency percentiles, MongoDB commands per call and peak Python
+memory as JSON, so runs can be compared for regressions
+(see `python manage.py benchmark`)
+"""
+import platform
+import secrets
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import nullcontext
+from datetime import datetime
+import numpy as np
+from pymongo import MongoClient, monitoring
+
+
+# Hosts `benchmark` may seed without --allow-remote
+LOCAL_HOSTS = ('localhost', '127.0.0.1', '::1')
+
+# p95 changes smaller than this are timer noise, not regressions
+MIN_REGRESSION_MS = 1.0
+
+
+class QueryCounter(monitoring.CommandListener):
+    """Counts the MongoDB commands this process sends, by command name"""
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        with self._lock:
+            self._counts[event.command_name] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    def snapshot(self):
+        with self._lock:
+            return Counter(self._counts)
+
+    @classmethod
+    def install(cls):
+        """
+        Register a counter for every MongoClient created from now on; an
+        existing connection is closed so it reconnects with the counter
+        """
+        from core.database import db
+
+        counter = cls()
+        monitoring.register(counter)
+        if isinstance(db._client, MongoClient):
+            db._client.close()
+            db._client = None
+            db._db = None
+        return counter
+
+
+def use_mongomock():
+    """Point core.database.db at an empty in-memory mongomock database"""
+    from django.conf import settings
+    from core.database import db
+
+    try:
+        import mongomock
+    except ImportError:
+        raise RuntimeError("The mongomock backend needs the mongomock package (pip install mongomock)")
+
+    client = mongomock.MongoClient()
+    db._client = client
+    db._db = client[settings.MONGODB_NAME]
+
+
+def is_local_uri(uri):
+    """Whether a MongoDB URI only names hosts on this machine"""
+    from pymongo import uri_parser
+
+    if uri.startswith('mongodb+srv://'):
+        return False
+    hosts = [host for host, _ in uri_parser.parse_uri(uri)['nodelist']]
+    return all(host in LOCAL_HOSTS for host in hosts)
+
+
+def percentiles(samples):
+    """Latency summary (milliseconds) of a list of samples"""
+    values = np.array(samples, dtype=float)
+    summary = {'min': values.min(), 'mean': values.mean(), 'max': values.max()}
+    for p in (50, 90, 95, 99):
+        summary[f'p{p}'] = np.percentile(values, p)
+    return {key: round(float(value), 2) for key, value in summary.items()}
+
+
+class Benchmark:
+    """
+    Runs and measures callables
+    Each target is called `warmup` times untimed, `iterations` times timed
+    (latency and MongoDB commands), then once more under tracemalloc for
+    peak memory - tracing slows Python down, so that run is not timed.
+    With cold=True the result cache is invalidated before every call, so
+    dashboards are measured computing rather than reading the cache.
+    """
+
+    def __init__(self, counter=None, iterations=10, warmup=1, cold=True):
+        self.counter = counter
+        self.iterations = iterations
+        self.warmup = warmup
+        self.cold = cold
+        self.results = {}
+
+    def _prepare(self):
+        if self.cold:
+            from core.cache import ResultCache
+            ResultCache.bump()
+
+    def _commands(self):
+        return self.counter.snapshot() if self.counter else Counter()
+
+    def run(self, name, fn, iterations=None, warmup=None):
+        """Measure fn() and store the result under name"""
+        iterations = iterations or self.iterations
+        errors = []
+
+        for _ in range(self.warmup if warmup is None else warmup):
+            self._prepare()
+            try:
+                fn()
+            except Exception:
+                pass
+
+        latencies = []
+        queries = []
+        for _ in range(iterations):
+            self._prepare()
+            before = sum(self._commands().values())
+            started = time.perf_counter()
+            try:
+                fn()
+            except Exception as e:
+                errors.append(str(e) or e.__class__.__name__)
+            latencies.append((time.perf_counter() - started) * 1000)
+            queries.append(sum(self._commands().values()) - before)
+
+        self._prepare()
+        before = self._commands()
+        tracemalloc.start()
+        try:
+            fn()
+        except Exception:
+            pass
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        commands = self._commands() - before
+
+        result = {
+            'iterations': iterations,
+            'latency_ms': percentiles(latencies),
+            'peak_memory_kb': round(peak / 1024, 1),
+            'errors': len(errors)
+        }
+        if self.counter:
+            result['queries_per_call'] = round(sum(queries) / len(queries), 1)
+            result['commands'] = dict(commands.most_common())
+        else:
+            # mongomock does not emit command events
+            result['queries_per_call'] = None
+        if errors:
+            result['first_error'] = errors[0]
+        self.results[name] = result
+        print(f"  {name}: p50 {result['latency_ms']['p50']}ms, p95 {result['latency_ms']['p95']}ms, "
+              f"{result['queries_per_call']} queries, {result['peak_memory_kb']}KB peak"
+              + (f", {len(errors)} errors" if errors else ""))
+        return result
+
+
+class ViewError(Exception):
+    """A benchmarked view answered with a status other than 200"""
+
+
+def _ensure_users(company_id, graph):
+    """A company, subscription and one user per role for the view benchmarks"""
+    from core.models import Company, Subscription, User
+
+    domain = f"{company_id.lower()}.example.com"
+    if not Company.exists(company_id):
+        Company.create(company_id, f"Benchmark {company_id}", f"admin@{domain}", "+63 900 000 0000", "Benchmark")
+    if not Subscription.get_by_company(company_id):
+        Subscription.create(f"SUB-{company_id}", company_id, f"admin@{domain}", trial_enabled=True)
+        Subscription.update_agent_count(company_id)
+
+    head = next(iter(graph.division_heads.values()))
+    manager = graph.area_managers_of(head['_id'])[0]
+    agent = graph.agents_of(manager['_id'])[0]
+    roles = [
+        ('admin', User.ROLE_COMPANY_ADMIN, None),
+        ('head', User.ROLE_DIVISION_HEAD, head['_id']),
+        ('manager', User.ROLE_AREA_MANAGER, manager['_id']),
+        ('agent', User.ROLE_AGENT, agent['_id']),
+    ]
+    users = {}
+    for key, role, related_id in roles:
+        user_id = f"USER-{company_id}-{key.upper()}"
+        if not User.get(user_id):
+            User.create(user_id, f"bench-{key}@{domain}", secrets.token_urlsafe(16), role,
+                        company_id=company_id, name=f"Benchmark {key}", related_id=related_id)
+        users[key] = user_id
+    return users, head['_id'], manager['_id'], agent['_id']
+
+
+def _client_for(user_id):
+    """A Django test client logged in as a user (session cookie)"""
+    from importlib import import_module
+    from django.conf import settings
+    from django.test import Client
+
+    client = Client(raise_request_exception=False)
+    session = import_module(settings.SESSION_ENGINE).SessionStore()
+    session['user_id'] = user_id
+    session.save()
+    client.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+    return client
+
+
+def _view(client, path):
+    def fetch():
+        response = client.get(path)
+        # A redirect (e.g. to /login/) would time the wrong page
+        if response.status_code != 200:
+            raise ViewError(f"{path} returned {response.status_code}")
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+    return fetch
+
+
+def run_benchmarks(company_id, counter=None, iterations=10, warmup=1, cold=True,
+                   train=True, views=True):
+    """
+    Benchmark the services, training and dashboards of a seeded company
+    Returns {name: result} (see Benchmark.run)
+    """
+    from django.test import override_settings
+    from core.services.org_graph import OrgGraph
+    from core.services.predictor import PredictorService
+
+    bench = Benchmark(counter, iterations, warmup, cold)
+    graph = OrgGraph.build(company_id)
+    if not graph.agents:
+        raise ValueError(f"Company {company_id} has no agents; seed it first")
+    users, head_id, manager_id, agent_id = _ensure_users(company_id, graph)
+
+    # Models trained here go to a throwaway registry, never the real one
+    # (without training, predictions use the models already published)
+    with tempfile.TemporaryDirectory() as registry_dir:
+        registry = override_settings(MODEL_REGISTRY_DIR=registry_dir) if train else nullcontext()
+        with registry:
+            _run_targets(bench, company_id, users, head_id, manager_id, agent_id, train, views)
+            PredictorService.reset_model()
+    return bench.results
+
+
+def _run_targets(bench, company_id, users, head_id, manager_id, agent_id, train, views):
+    from core.ai.trainer import AITrainer
+    from core.services.hierarchy_performance import HierarchyPerformanceService
+    from core.services.performance import PerformanceService
+    from core.services.predictor import PredictorService
+
+    if train:
+        print("\n🤖 Training")
+        bench.run('trainer.train_model', AITrainer.train_model, iterations=1, warmup=0)
+    PredictorService.reset_model()
+
+    print("\n📊 Services")
+    bench.run('performance.get_all_agents_performance',
+              lambda: PerformanceService.get_all_agents_performance(company_id))
+    bench.run('hierarchy.get_area_manager_performance',
+              lambda: HierarchyPerformanceService.get_area_manager_performance(manager_id, company_id))
+    bench.run('hierarchy.get_division_head_performance',
+              lambda: HierarchyPerformanceService.get_division_head_performance(head_id, company_id))
+    bench.run('hierarchy.get_division_head_performance[detail]',
+              lambda: HierarchyPerformanceService.get_division_head_performance(head_id, company_id, detail=True))
+    bench.run('predictor.predict_all_agents',
+              lambda: PredictorService.predict_all_agents(company_id))
+
+    if views:
+        print("\n🖥️  Views")
+        pages = [
+            ('view:dashboard', 'admin', '/dashboard/'),
+            ('view:agent_dashboard', 'agent', '/agent/dashboard/'),
+            ('view:area_manager_dashboard', 'manager', '/area-manager/dashboard/'),
+            ('view:division_head_dashboard', 'head', '/division-head/dashboard/'),
+            ('view:agent_detail', 'admin', f'/agent/{agent_id}/'),
+            ('view:area_manager_detail', 'admin', f'/area-manager/{manager_id}/'),
+            ('view:division_head_detail', 'admin', f'/division-head/{head_id}/'),
+            ('view:area_managers_list', 'admin', '/area-managers/'),
+            ('view:division_heads_list', 'admin', '/division-heads/'),
+            ('view:api_agents', 'admin', '/api/agents/'),
+            ('view:api_agents[ndjson]', 'admin', '/api/agents/?format=ndjson'),
+        ]
+        clients = {key: _client_for(user_id) for key, user_id in users.items()}
+        for name, user, path in pages:
+            bench.run(name, _view(clients[user], path))
+
+
+def tenant_summary(company_id):
+    """Document counts of a company"""
+    from core.database import db
+
+    query = {"company_id": company_id}
+    return {
+        'division_heads': db.division_heads.count_documents(query),
+        'area_managers': db.area_managers.count_documents(query),
+        'agents': db.agents.count_documents(query),
+        'activities': db.activities.count_documents(query),
+        'sales': db.sales.count_documents(query),
+        'leads': db.leads.count_documents(query),
+    }
+
+
+def report(company_id, results, backend, options):
+    """The JSON document written by `benchmark`"""
+    from core.database import db
+
+    return {
+        'meta': {
+            'started_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'backend': backend,
+            'company_id': company_id,
+            'tenant': tenant_summary(company_id),
+            'db_pool': db.pool_stats() if backend == 'mongodb' else None,
+            **options
+        },
+        'results': results
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    Regressions of results against a baseline report's results: p95 latency
+    or peak memory up by more than tolerance (a fraction), or more queries
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        p95, base_p95 = result['latency_ms']['p95'], base['latency_ms']['p95']
+        if p95 > base_p95 * (1 + tolerance) and p95 - base_p95 >= MIN_REGRESSION_MS:
+            regressions.append(f"{name}: p95 {base_p95}ms -> {p95}ms")
+        if result['peak_memory_kb'] > base['peak_memory_kb'] * (1 + tolerance):
+            regressions.append(f"{name}: peak memory {base['peak_memory_kb']}KB -> {result['peak_memory_kb']}KB")
+        queries, base_queries = result.get('queries_per_call'), base.get('queries_per_call')
+        if queries is not None and base_queries is not None and queries > base_queries:
+            regressions.append(f"{name}: queries per call {base_queries} -> {queries}")
+        if result['errors'] > base.get('errors', 0):
+            regressions.append(f"{name}: {result['errors']} errors (baseline {base.get('errors', 0)})")
+    return regressions
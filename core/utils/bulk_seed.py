@@ -0,0 +1,464 @@
+"""
+Bulk seeding of demo and load-test data
+Documents are generated in memory with vectorized NumPy draws and written in
+batches: the hierarchy and product catalog with bulk_write upserts, events
+(activities, leads, sales) with unordered insert_many. Monthly rollups are
+updated once per batch, and subscription agent counts and the result cache
+once per run, instead of once per record.
+
+seed_sample_data writes the demo organisation of core.utils.sample_data
+`scale` times: scale=1 is 2 division heads, 3 area managers and 6 agents
+with ~300 activities, so scale=350 (2,100 agents) gives ~100k for load
+testing. seed_tenant writes a synthetic company of any size with months of
+history (used by `python manage.py benchmark`).
+
+Document IDs follow from the hierarchy, the month and the random seed, so
+re-running a seed with the same sizes skips what is already stored.
+"""
+import time
+from datetime import datetime
+import numpy as np
+from pymongo import UpdateOne
+from core.cache import ResultCache
+from core.database import db
+from core.models import AgentMonthlyStats, Subscription
+from core.models import bulk
+from core.utils import sample_data, banking_products_data
+
+
+DEFAULT_SEED = 42
+
+# Agents generated per step (bounds the documents held in memory)
+AGENT_CHUNK = 100
+
+# Pattern keys of sample_data.PERFORMANCE_PATTERNS, in Activity.TYPES order
+ACTIVITY_PATTERNS = (
+    ("call", "calls", "Customer call"),
+    ("meeting", "meetings", "Meeting"),
+    ("lead", "leads", "Lead"),
+    ("deal", "deals", "Deal"),
+)
+LEVELS = ("high", "medium", "low")
+
+
+def _batch_size(batch_size):
+    from django.conf import settings
+    return batch_size or settings.SEED_BATCH_SIZE
+
+
+def _month_so_far():
+    """Start of the current month and now (seeded events fall in between)"""
+    now = datetime.now()
+    return datetime(now.year, now.month, 1), now
+
+
+def _month_windows(months):
+    """(start, end) of each of the last `months` months, oldest first (the current one ends now)"""
+    start, now = _month_so_far()
+    windows = [(start, now)]
+    for _ in range(months - 1):
+        end = start
+        start = datetime(end.year - 1, 12, 1) if end.month == 1 else datetime(end.year, end.month - 1, 1)
+        windows.append((start, end))
+    return windows[::-1]
+
+
+def _random_times(rng, size, start, end):
+    """size datetimes drawn uniformly from [start, end)"""
+    span = max(int((end - start).total_seconds() * 1e6), 1)
+    offsets = rng.integers(0, span, size).astype('timedelta64[us]')
+    return (np.datetime64(start, 'us') + offsets).tolist()
+
+
+def _positions(counts):
+    """1-based position of every item within its group, for groups of the given sizes"""
+    starts = np.repeat(np.cumsum(counts) - counts, counts)
+    return np.arange(int(counts.sum())) - starts + 1
+
+
+def _upsert(collection, company_id, docs, update_fields=()):
+    """
+    Insert the documents that don't exist yet (one bulk_write of upserts);
+    update_fields are also refreshed on existing documents
+    Returns the number of documents inserted
+    """
+    operations = []
+    for doc in docs:
+        update = {"$setOnInsert": {
+            field: value for field, value in doc.items()
+            if field not in ("_id", "company_id") and field not in update_fields
+        }}
+        if update_fields:
+            update["$set"] = {field: doc[field] for field in update_fields}
+        operations.append(UpdateOne({"_id": doc["_id"], "company_id": company_id}, update, upsert=True))
+    if not operations:
+        return 0
+    return collection.bulk_write(operations, ordered=False).upserted_count
+
+
+def _insert(collection, docs, batch_size, result, key, add_to_rollup=None):
+    """
+    Insert documents in unordered batches, skipping ones already stored
+    add_to_rollup(increments, doc) collects rollup counters for new documents
+    """
+    for start in range(0, len(docs), batch_size):
+        batch = docs[start:start + batch_size]
+        duplicates, errors = bulk.insert_unordered(collection, batch)
+        if errors:
+            raise RuntimeError(f"Could not write {key}: {next(iter(errors.values()))}")
+        inserted = [doc for position, doc in enumerate(batch) if position not in duplicates]
+        result[key] += len(inserted)
+        result["duplicates"] += len(duplicates)
+
+        if add_to_rollup and inserted:
+            increments = {}
+            for doc in inserted:
+                add_to_rollup(increments, doc)
+            AgentMonthlyStats.record_many(increments)
+
+
+def _add_activity(increments, doc):
+    return AgentMonthlyStats.add_activity(increments, doc["company_id"], doc["agent_id"], doc["activity_type"], doc["created_at"])
+
+
+def _add_sale(increments, doc):
+    return AgentMonthlyStats.add_sale(increments, doc["company_id"], doc["agent_id"], doc["amount"], doc["date"])
+
+
+def _scoped_id(company_id, record_id):
+    """
+    A catalog or demo record ID for a company: _ids are global across
+    companies, so outside the demo company they are prefixed with its ID
+    (as build_tenant does)
+    """
+    from django.conf import settings
+    return record_id if company_id == settings.DEMO_COMPANY_ID else f"{company_id}-{record_id}"
+
+
+def _finish(company_id):
+    """Once per run: subscription agent count and dashboard cache"""
+    Subscription.update_agent_count(company_id)
+    ResultCache.bump(company_id)
+
+
+def build_hierarchy(company_id, scale=1):
+    """
+    Documents for `scale` copies of the demo organisation (the first copy
+    keeps the demo IDs and names; IDs are prefixed with the company ID
+    outside the demo company)
+    Returns (division_heads, area_managers, agents, performance level per agent)
+    """
+    now = datetime.now()
+    head_index = {head["head_id"]: i for i, head in enumerate(sample_data.DIVISION_HEADS)}
+    manager_index = {manager["manager_id"]: i for i, manager in enumerate(sample_data.AREA_MANAGERS)}
+
+    def copy_of(record, unit):
+        if unit == 0:
+            return record["name"], record["email"]
+        local, domain = record["email"].split("@")
+        return f"{record['name']} {unit + 1}", f"{local}{unit + 1}@{domain}"
+
+    heads, managers, agents, levels = [], [], [], []
+    for unit in range(scale):
+        head_ids = [_scoped_id(company_id, f"DH{unit * len(head_index) + i + 1:02d}") for i in range(len(head_index))]
+        manager_ids = [_scoped_id(company_id, f"AM{unit * len(manager_index) + i + 1:02d}") for i in range(len(manager_index))]
+        suffix = "" if unit == 0 else f" {unit + 1}"
+
+        for i, head in enumerate(sample_data.DIVISION_HEADS):
+            name, email = copy_of(head, unit)
+            heads.append({
+                "_id": head_ids[i], "name": name, "email": email, "company_id": company_id,
+                "division_name": head["division_name"] + suffix, "created_at": now
+            })
+        for i, manager in enumerate(sample_data.AREA_MANAGERS):
+            name, email = copy_of(manager, unit)
+            managers.append({
+                "_id": manager_ids[i], "name": name, "email": email, "company_id": company_id,
+                "division_head_id": head_ids[head_index[manager["division_head_id"]]],
+                "area_name": manager["area_name"] + suffix, "created_at": now
+            })
+        for i, agent in enumerate(sample_data.AGENTS):
+            name, email = copy_of(agent, unit)
+            agents.append({
+                "_id": _scoped_id(company_id, f"A{101 + unit * len(sample_data.AGENTS) + i}"), "name": name, "email": email,
+                "monthly_target": agent["monthly_target"], "company_id": company_id,
+                "area_manager_id": manager_ids[manager_index[agent["area_manager_id"]]], "created_at": now
+            })
+            levels.append(LEVELS.index(sample_data.AGENT_PERFORMANCE.get(agent["agent_id"], "medium")))
+    return heads, managers, agents, np.array(levels, dtype=int)
+
+
+def _activity_documents(rng, company_id, agent_ids, counts, start, end):
+    """Activities for a chunk of agents in one month; counts[i, t] is agent i's count of type t"""
+    flat = counts.ravel()
+    agent_pos = np.repeat(np.repeat(np.arange(len(agent_ids)), len(ACTIVITY_PATTERNS)), flat)
+    type_pos = np.repeat(np.tile(np.arange(len(ACTIVITY_PATTERNS)), len(agent_ids)), flat)
+    number = _positions(counts.sum(axis=1))  # within the agent (for the _id)
+    type_number = _positions(flat)  # within the agent's activities of that type
+    created = _random_times(rng, len(agent_pos), start, end)
+    month = start.strftime("%Y%m")
+
+    docs = []
+    for agent_i, type_i, n, type_n, created_at in zip(agent_pos.tolist(), type_pos.tolist(), number.tolist(), type_number.tolist(), created):
+        activity_type, _, note = ACTIVITY_PATTERNS[type_i]
+        docs.append({
+            "_id": f"{agent_ids[agent_i]}-{month}-ACT{n:05d}",
+            "agent_id": agent_ids[agent_i],
+            "company_id": company_id,
+            "activity_type": activity_type,
+            "value": 0,
+            "created_at": created_at,
+            "notes": f"{note} {type_n}"
+        })
+    return docs
+
+
+def _sale_documents(rng, company_id, agent_ids, deals, totals, start, end):
+    """One sale per deal, splitting each agent's month total over its deals"""
+    sale_agent = np.repeat(np.arange(len(agent_ids)), deals)
+    number = _positions(deals)
+    weights = rng.uniform(0.5, 1.5, len(sale_agent))
+    weight_sums = np.bincount(sale_agent, weights, minlength=len(agent_ids))
+    amounts = np.rint(totals[sale_agent] * weights / weight_sums[sale_agent]).astype(int)
+    customers = rng.integers(1000, 10000, len(sale_agent))
+    dates = _random_times(rng, len(sale_agent), start, end)
+    month = start.strftime("%Y%m")
+
+    return [
+        {
+            "_id": f"{agent_ids[agent_i]}-{month}-S{n:04d}",
+            "agent_id": agent_ids[agent_i],
+            "company_id": company_id,
+            "amount": amount,
+            "customer": f"Customer #{customer}",
+            "product_id": None,
+            "date": date,
+            "notes": f"Sale transaction {n}"
+        }
+        for agent_i, n, amount, customer, date in zip(sale_agent.tolist(), number.tolist(), amounts.tolist(), customers.tolist(), dates)
+        if amount > 0
+    ]
+
+
+def _seed_events(rng, company_id, agents, levels, months, activity_factor, batch_size, result):
+    """
+    Activities and sales for each of the last `months` months (the current one
+    up to now); activity_factor multiplies the monthly activity patterns
+    """
+    # Per-agent monthly counts for every activity type and the month's sales, in one draw each
+    patterns = sample_data.PERFORMANCE_PATTERNS
+    low = np.array([[patterns[level][key][0] for _, key, _ in ACTIVITY_PATTERNS] for level in LEVELS]) * activity_factor
+    high = np.array([[patterns[level][key][1] for _, key, _ in ACTIVITY_PATTERNS] for level in LEVELS]) * activity_factor
+    sales_low = np.array([sample_data.SALES_RANGES[level][0] for level in LEVELS])
+    sales_high = np.array([sample_data.SALES_RANGES[level][1] for level in LEVELS])
+    targets = np.array([agent["monthly_target"] for agent in agents], dtype=float)
+    agent_ids = [agent["_id"] for agent in agents]
+
+    for start, end in _month_windows(months):
+        counts = rng.integers(low[levels], high[levels] + 1)
+        totals = np.floor(targets * rng.uniform(sales_low[levels], sales_high[levels]))
+        deals = counts[:, 3]  # one sale per deal
+        for first in range(0, len(agent_ids), AGENT_CHUNK):
+            chunk = slice(first, first + AGENT_CHUNK)
+            activities = _activity_documents(rng, company_id, agent_ids[chunk], counts[chunk], start, end)
+            _insert(db.activities, activities, batch_size, result, "activities", _add_activity)
+            sales = _sale_documents(rng, company_id, agent_ids[chunk], deals[chunk], totals[chunk], start, end)
+            _insert(db.sales, sales, batch_size, result, "sales", _add_sale)
+
+
+def seed_sample_data(company_id, scale=1, seed=None, batch_size=None):
+    """
+    Seed the demo hierarchy (times scale) with a month of activities and sales
+    Returns counts of what was added: {'division_heads', 'area_managers',
+    'agents', 'activities', 'sales', 'duplicates', 'seconds'}
+    """
+    started = time.perf_counter()
+    batch_size = _batch_size(batch_size)
+    rng = np.random.default_rng(DEFAULT_SEED if seed is None else seed)
+    result = {"activities": 0, "sales": 0, "duplicates": 0}
+
+    heads, managers, agents, levels = build_hierarchy(company_id, scale)
+    result["division_heads"] = _upsert(db.division_heads, company_id, heads)
+    result["area_managers"] = _upsert(db.area_managers, company_id, managers)
+    # Existing demo agents are moved back under their demo area manager
+    result["agents"] = _upsert(db.agents, company_id, agents, update_fields=("area_manager_id",))
+
+    _seed_events(rng, company_id, agents, levels, 1, 1, batch_size, result)
+
+    _finish(company_id)
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def build_tenant(company_id, agents, area_managers, division_heads, rng):
+    """
+    Documents for a synthetic company of the given size: area managers are
+    spread evenly over division heads and agents over area managers
+    Returns (division_heads, area_managers, agents, performance level per agent)
+    """
+    now = datetime.now()
+    heads = [
+        {
+            "_id": f"{company_id}-DH{i + 1:03d}", "name": f"Division Head {i + 1}",
+            "email": f"head{i + 1}@{company_id.lower()}.example.com", "company_id": company_id,
+            "division_name": f"Division {i + 1}", "created_at": now
+        }
+        for i in range(division_heads)
+    ]
+    managers = [
+        {
+            "_id": f"{company_id}-AM{i + 1:04d}", "name": f"Area Manager {i + 1}",
+            "email": f"manager{i + 1}@{company_id.lower()}.example.com", "company_id": company_id,
+            "division_head_id": heads[i % division_heads]["_id"], "area_name": f"Area {i + 1}", "created_at": now
+        }
+        for i in range(area_managers)
+    ]
+    targets = rng.integers(40, 81, agents) * 10000  # 400k to 800k pesos
+    levels = rng.choice(len(LEVELS), agents, p=[0.3, 0.4, 0.3])
+    agent_docs = [
+        {
+            "_id": f"{company_id}-A{i + 1:06d}", "name": f"Agent {i + 1}",
+            "email": f"agent{i + 1}@{company_id.lower()}.example.com", "monthly_target": target,
+            "company_id": company_id, "area_manager_id": managers[i % area_managers]["_id"], "created_at": now
+        }
+        for i, target in enumerate(targets.tolist())
+    ]
+    return heads, managers, agent_docs, levels
+
+
+def seed_tenant(company_id, agents=1000, area_managers=50, division_heads=5, months=6,
+                activity_factor=1, seed=None, batch_size=None):
+    """
+    Seed a synthetic company for benchmarks and load tests: the hierarchy,
+    `months` months of activities and sales (~50 activities per agent-month
+    times activity_factor), the product catalog and leads
+    Returns counts of what was added, as seed_sample_data plus 'leads'
+    """
+    if min(agents, area_managers, division_heads, months, activity_factor) < 1:
+        raise ValueError("Tenant sizes, months and activity_factor must be at least 1")
+
+    started = time.perf_counter()
+    batch_size = _batch_size(batch_size)
+    rng = np.random.default_rng(DEFAULT_SEED if seed is None else seed)
+    result = {"activities": 0, "sales": 0, "duplicates": 0}
+
+    heads, managers, agent_docs, levels = build_tenant(company_id, agents, area_managers, division_heads, rng)
+    result["division_heads"] = _upsert(db.division_heads, company_id, heads)
+    result["area_managers"] = _upsert(db.area_managers, company_id, managers)
+    result["agents"] = _upsert(db.agents, company_id, agent_docs)
+
+    _seed_events(rng, company_id, agent_docs, levels, months, activity_factor, batch_size, result)
+
+    seed_products(company_id)
+    leads = seed_leads_and_sales(company_id, seed=seed, batch_size=batch_size)
+    result["leads"] = leads["leads"]
+    result["sales"] += leads["sales"]
+    result["duplicates"] += leads["duplicates"]
+
+    # seed_leads_and_sales has already refreshed the agent count and cache
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def seed_products(company_id):
+    """
+    Upsert the banking product catalog for a company; returns how many were added
+    Product IDs are prefixed with the company ID outside the demo company
+    """
+    now = datetime.now()
+    products = [
+        {
+            "_id": _scoped_id(company_id, product["product_id"]),
+            "name": product["name"],
+            "category": product["category"],
+            "description": product["description"],
+            "commission_rate": product["commission_rate"],
+            "company_id": company_id,
+            "created_at": now
+        }
+        for product in banking_products_data.BANKING_PRODUCTS
+    ]
+    return _upsert(db.products, company_id, products)
+
+
+def seed_leads_and_sales(company_id, seed=None, batch_size=None):
+    """
+    Seed leads for every agent of a company; won leads also become sales
+    (the product's commission on the lead value)
+    Returns counts of what was added: {'agents', 'leads', 'sales', 'duplicates', 'seconds'}
+    """
+    started = time.perf_counter()
+    batch_size = _batch_size(batch_size)
+    rng = np.random.default_rng(DEFAULT_SEED if seed is None else seed)
+    result = {"leads": 0, "sales": 0, "duplicates": 0}
+
+    products = list(db.products.find({"company_id": company_id}).sort("_id", 1))
+    if not products:
+        seed_products(company_id)
+        products = list(db.products.find({"company_id": company_id}).sort("_id", 1))
+    agent_ids = [agent["_id"] for agent in db.agents.find({"company_id": company_id}, {"_id": 1}).sort("_id", 1)]
+    result["agents"] = len(agent_ids)
+
+    ranges = banking_products_data.LEAD_VALUE_RANGES
+    value_low = np.array([ranges.get(product["category"], ranges["Account"])[0] for product in products])
+    value_high = np.array([ranges.get(product["category"], ranges["Account"])[1] for product in products])
+    commission = np.array([product["commission_rate"] for product in products], dtype=float)
+    first_names = banking_products_data.FIRST_NAMES
+    last_names = banking_products_data.LAST_NAMES
+    statuses = banking_products_data.LEAD_STATUSES
+    won = statuses.index("Won")
+    min_leads, max_leads = banking_products_data.LEADS_PER_AGENT
+
+    start, end = _month_so_far()
+    for first in range(0, len(agent_ids), AGENT_CHUNK):
+        chunk_ids = agent_ids[first:first + AGENT_CHUNK]
+        lead_counts = rng.integers(min_leads, max_leads + 1, len(chunk_ids))
+        size = int(lead_counts.sum())
+        lead_agent = np.repeat(np.arange(len(chunk_ids)), lead_counts)
+        number = _positions(lead_counts)
+        product = rng.integers(0, len(products), size)
+        status = rng.integers(0, len(statuses), size)
+        value = rng.integers(value_low[product], value_high[product] + 1)
+        sale_amount = (value * commission[product] / 100).astype(int)
+        first_name = rng.integers(0, len(first_names), size)
+        last_name = rng.integers(0, len(last_names), size)
+        contact = rng.integers(100000000, 1000000000, size)
+        created = _random_times(rng, size, start, end)
+
+        leads, sales = [], []
+        for agent_i, n, product_i, status_i, lead_value, amount, first_i, last_i, phone, created_at in zip(
+            lead_agent.tolist(), number.tolist(), product.tolist(), status.tolist(), value.tolist(),
+            sale_amount.tolist(), first_name.tolist(), last_name.tolist(), contact.tolist(), created
+        ):
+            agent_id = chunk_ids[agent_i]
+            customer_name = f"{first_names[first_i]} {last_names[last_i]}"
+            leads.append({
+                "_id": f"{agent_id}-LEAD{n:04d}",
+                "agent_id": agent_id,
+                "company_id": company_id,
+                "customer_name": customer_name,
+                "contact": f"+639{phone}",
+                "product_id": products[product_i]["_id"],
+                "status": statuses[status_i],
+                "value": lead_value,
+                "notes": f"Interested in {products[product_i]['name']}",
+                "created_at": created_at,
+                "updated_at": created_at
+            })
+            if status_i == won:
+                sales.append({
+                    "_id": f"{agent_id}-SALE{n:04d}",
+                    "agent_id": agent_id,
+                    "company_id": company_id,
+                    "amount": amount,
+                    "customer": customer_name,
+                    "product_id": products[product_i]["_id"],
+                    "date": created_at,
+                    "notes": f"Commission from {products[product_i]['name']}"
+                })
+        _insert(db.leads, leads, batch_size, result, "leads")
+        _insert(db.sales, sales, batch_size, result, "sales", _add_sale)
+
+    _finish(company_id)
+    result["seconds"] = time.perf_counter() - started
+    return result
@@ -0,0 +1,60 @@
+"""
+Record parsing for bulk ingestion uploads (NDJSON and CSV)
+Input is read line by line from any iterable of byte lines (an uploaded file
+or the request itself), so an upload is never held in memory as a whole
+"""
+import codecs
+import csv
+import json
+
+
+FORMATS = ('ndjson', 'csv')
+
+
+def detect_format(content_type, requested=None):
+    """Upload format from an explicit ?format= value or the Content-Type header"""
+    if requested:
+        return requested if requested in FORMATS else None
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    if content_type in ('text/csv', 'application/csv'):
+        return 'csv'
+    if content_type in ('application/x-ndjson', 'application/ndjson', 'application/jsonl'):
+        return 'ndjson'
+    return None
+
+
+def iter_records(lines, fmt):
+    """
+    Yield one dict per record; a malformed record yields a ValueError in its
+    place so callers can report it by row number and carry on
+    """
+    text_lines = codecs.iterdecode(lines, 'utf-8-sig')
+    if fmt == 'csv':
+        return _iter_csv(text_lines)
+    return _iter_ndjson(text_lines)
+
+
+def _iter_ndjson(text_lines):
+    for line in text_lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield ValueError(f"Invalid JSON: {e}")
+            continue
+        if not isinstance(record, dict):
+            yield ValueError("Each line must be a JSON object")
+            continue
+        yield record
+
+
+def _iter_csv(text_lines):
+    reader = csv.DictReader(text_lines)
+    for row in reader:
+        if None in row:
+            yield ValueError("Row has more values than the header")
+            continue
+        # Empty cells mean "not given"
+        yield {key: value for key, value in row.items() if value != ''}
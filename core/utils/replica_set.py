@@ -0,0 +1,214 @@
+"""
+Local replica set for testing read routing
+Runs `members` mongod processes on consecutive ports of this machine as one
+replica set (the first member is preferred as primary), so db.analytics can
+be pointed at real secondaries in development (see
+`python manage.py local_replica_set`). Needs the MongoDB server binaries
+(mongod) on PATH; the processes run in the background until stop().
+"""
+import os
+import shutil
+import subprocess
+import threading
+import time
+from collections import Counter
+from pymongo import MongoClient, monitoring
+from pymongo.errors import ConnectionFailure, OperationFailure
+
+
+DEFAULT_PORT = 27117
+DEFAULT_NAME = 'rs-local'
+
+# replSetGetStatus error code before replSetInitiate
+NOT_YET_INITIALIZED = 94
+
+# Commands that read data (the ones read preference applies to)
+READ_COMMANDS = ('find', 'aggregate', 'count', 'distinct', 'getMore')
+
+
+class LocalReplicaSet:
+    """mongod processes under data_dir on ports port, port + 1, ..."""
+
+    def __init__(self, data_dir, port=DEFAULT_PORT, members=3, name=DEFAULT_NAME, mongod='mongod'):
+        if members < 1:
+            raise ValueError("A replica set needs at least one member")
+        self.data_dir = data_dir
+        self.port = port
+        self.members = members
+        self.name = name
+        self.mongod = mongod
+
+    @property
+    def ports(self):
+        return [self.port + i for i in range(self.members)]
+
+    def uri(self):
+        """MONGODB_URI for the replica set"""
+        hosts = ','.join(f'localhost:{port}' for port in self.ports)
+        return f'mongodb://{hosts}/?replicaSet={self.name}'
+
+    @staticmethod
+    def _member(port, timeout_ms=2000):
+        return MongoClient(f'mongodb://localhost:{port}/', directConnection=True,
+                           serverSelectionTimeoutMS=timeout_ms)
+
+    def _running(self, port):
+        client = self._member(port, timeout_ms=500)
+        try:
+            client.admin.command('ping')
+            return True
+        except ConnectionFailure:
+            return False
+        finally:
+            client.close()
+
+    def start(self, timeout=60):
+        """Start the members that are not running, initiate the set and wait for a primary"""
+        binary = shutil.which(self.mongod)
+        if binary is None:
+            raise RuntimeError(f"{self.mongod} not found; install the MongoDB server binaries")
+
+        for i, port in enumerate(self.ports):
+            if self._running(port):
+                continue
+            path = os.path.join(self.data_dir, f'member{i}')
+            os.makedirs(path, exist_ok=True)
+            process = subprocess.run(
+                [binary, '--replSet', self.name, '--port', str(port), '--bind_ip', 'localhost',
+                 '--dbpath', path, '--logpath', os.path.join(path, 'mongod.log'),
+                 '--oplogSize', '128', '--fork'],
+                capture_output=True, text=True
+            )
+            if process.returncode != 0:
+                raise RuntimeError(f"mongod on port {port} failed to start (see {path}/mongod.log): "
+                                   f"{process.stdout.strip() or process.stderr.strip()}")
+
+        self._initiate()
+        self.wait_for_primary(timeout)
+        return self.uri()
+
+    def _initiate(self):
+        client = self._member(self.port)
+        try:
+            client.admin.command('replSetGetStatus')
+        except OperationFailure as e:
+            if e.code != NOT_YET_INITIALIZED:
+                raise
+            client.admin.command('replSetInitiate', {
+                '_id': self.name,
+                'members': [
+                    {'_id': i, 'host': f'localhost:{port}', 'priority': 2 if i == 0 else 1}
+                    for i, port in enumerate(self.ports)
+                ]
+            })
+        finally:
+            client.close()
+
+    def wait_for_primary(self, timeout=60):
+        """Block until there is a primary and every other member is a secondary"""
+        deadline = time.monotonic() + timeout
+        while True:
+            states = Counter(member['state'] for member in self.status())
+            if states['PRIMARY'] == 1 and states['SECONDARY'] == self.members - 1:
+                return
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Replica set {self.name} not ready after {timeout}s: {dict(states)}")
+            time.sleep(0.5)
+
+    def status(self):
+        """[{host, state}] of the members (empty if the set is not running)"""
+        client = self._member(self.port)
+        try:
+            status = client.admin.command('replSetGetStatus')
+        except (ConnectionFailure, OperationFailure):
+            return []
+        finally:
+            client.close()
+        return [{'host': member['name'], 'state': member['stateStr']} for member in status['members']]
+
+    def stop(self):
+        """Shut the members down; returns the ports that were running"""
+        stopped = []
+        for port in self.ports:
+            if not self._running(port):
+                continue
+            client = self._member(port)
+            try:
+                # force: a primary would otherwise wait for secondaries to catch up
+                client.admin.command('shutdown', force=True)
+            except ConnectionFailure:
+                pass  # the connection drops as the server exits
+            finally:
+                client.close()
+            stopped.append(port)
+        return stopped
+
+
+class ReadRouteRecorder(monitoring.CommandListener):
+    """Records which server each read command was sent to"""
+
+    def __init__(self):
+        self._routes = Counter()
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        if event.command_name in READ_COMMANDS:
+            host, port = event.connection_id
+            with self._lock:
+                self._routes[f'{host}:{port}'] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+    def routes(self):
+        with self._lock:
+            return dict(self._routes)
+
+
+def check_read_routing(company_id):
+    """
+    Run the analytics reads of a company and report which servers served
+    them, next to a primary-only read for comparison (PerformanceService
+    reads its agent roster from the primary and its metrics through
+    db.analytics, so it shows both)
+    Returns {primary, secondaries, analytics_read_preference, reads: {name: {server: commands}}}
+    """
+    from core.database import db
+    from core.models import Agent
+    from core.services.performance import PerformanceService
+    from core.services.sales_funnel import SalesFunnelService
+
+    recorder = ReadRouteRecorder()
+    monitoring.register(recorder)
+    # Reconnect so the new client reports to the recorder
+    if db._client is not None:
+        db._client.close()
+    db.reset()
+
+    hello = db.db.command('hello')
+    agent_ids = [agent['_id'] for agent in Agent.get_all(company_id)]
+    checks = [
+        ('primary: Agent.get_all', lambda: Agent.get_all(company_id)),
+        ('analytics: SalesFunnelService.get_funnel_metrics_for_agents',
+         lambda: SalesFunnelService.get_funnel_metrics_for_agents(agent_ids, company_id=company_id)),
+        ('analytics: PerformanceService.get_all_agents_performance',
+         lambda: PerformanceService.get_all_agents_performance(company_id)),
+    ]
+    reads = {}
+    for name, fn in checks:
+        recorder.reset()
+        fn()
+        reads[name] = recorder.routes()
+    return {
+        'primary': hello.get('primary'),
+        'secondaries': [host for host in hello.get('hosts', []) if host != hello.get('primary')],
+        'analytics_read_preference': db.analytics.read_preference.document,
+        'reads': reads
+    }
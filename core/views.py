@@ -1,14 +1,21 @@
 """
 Views for the core application
 """
+import json
 from django.shortcuts import render
-from django.http import JsonResponse
-from core.models import Agent, AreaManager, DivisionHead, Sale, Lead, Product
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from core.cache import ResultCache
+from core.middleware import require_role
+from core.models import Agent, AreaManager, DivisionHead, Sale, Lead, Product, TrainingJob, User
+from core.services.analytics_context import AnalyticsContext
+from core.services.metrics_engine import MetricsEngine
 from core.services.performance import PerformanceService
 from core.services.predictor import PredictorService
 from core.services.hierarchy_performance import HierarchyPerformanceService
+from core.services.org_graph import OrgGraph
 from core.services.sales_funnel import SalesFunnelService
-from core.ai.trainer import AITrainer
+from core.ai.jobs import TrainingJobRunner
 
 
 def landing_page(request):
@@ -35,7 +42,8 @@ def agent_dashboard(request):
     if not agent_id:
         return JsonResponse({'error': 'Agent profile not linked'}, status=400)
     
-    agent = Agent.get(agent_id)
+    context = AnalyticsContext()
+    agent = context.get_agent(agent_id)
     if not agent:
         return JsonResponse({'error': 'Agent not found'}, status=404)
     
@@ -43,11 +51,11 @@ def agent_dashboard(request):
     from core.models import Sale, Lead
     from core.database import db
     
-    performance = PerformanceService.get_agent_performance(agent_id, company_id)
+    performance = PerformanceService.get_agent_performance(agent_id, company_id, context)
     
     # Get AI predictions
     try:
-        predictions = PredictorService.predict_agent(agent_id)
+        predictions = PredictorService.predict_agent(agent_id, context)
     except:
         predictions = {
             'prediction': 'Not enough data for prediction',
@@ -114,12 +122,13 @@ def area_manager_dashboard_view(request):
     if not manager_id:
         return JsonResponse({'error': 'Area Manager profile not linked'}, status=400)
     
-    manager = AreaManager.get(manager_id)
+    graph = OrgGraph.for_company(company_id)
+    manager = graph.get_area_manager(manager_id)
     if not manager:
         return JsonResponse({'error': 'Area Manager not found'}, status=404)
     
     # Get agents under this manager
-    agents = Agent.get_by_area_manager(manager_id)
+    agents = graph.agents_of(manager_id)
     
     # Calculate performance metrics
     total_sales = 0
@@ -134,9 +143,20 @@ def area_manager_dashboard_view(request):
     
     agents_with_data = []
     
+    # Month metrics for the team in one query, predictions in one batch
+    start_date, end_date = PerformanceService.get_current_month_range()
+    metrics_by_agent = MetricsEngine.get_month_metrics_for_agents(
+        [agent['_id'] for agent in agents], start_date
+    )
+    try:
+        predictions = PredictorService.predict_batch(agents, metrics_by_agent)
+    except:
+        predictions = {}
+    
     for agent in agents:
         agent_id = agent['_id']
-        perf = PerformanceService.get_agent_performance(agent_id, company_id)
+        metrics = metrics_by_agent.get(agent_id, MetricsEngine.empty_metrics())
+        perf = PerformanceService.build_performance(agent, metrics, start_date)
         
         total_sales += perf.get('total_sales', 0)
         total_target += agent.get('monthly_target', 0)
@@ -144,11 +164,8 @@ def area_manager_dashboard_view(request):
         achievement = perf.get('achievement_rate', 0)
         
         # Get predictions
-        try:
-            pred = PredictorService.predict_agent(agent_id)
-            risk_level = pred.get('risk_level', 'UNKNOWN')
-        except:
-            risk_level = 'UNKNOWN'
+        pred = predictions.get(agent_id)
+        risk_level = pred.get('risk_level', 'UNKNOWN') if pred else 'UNKNOWN'
         
         if risk_level == 'HIGH':
             high_risk_count += 1
@@ -209,75 +226,46 @@ def division_head_dashboard_view(request):
     
     # Get division head data
     division_head_id = user.get('related_id')
-    company_id = user.get('company_id')
     
     if not division_head_id:
         return JsonResponse({'error': 'Division Head profile not linked'}, status=400)
     
-    division_head = DivisionHead.get(division_head_id)
-    if not division_head:
+    # Area and division totals from one roll-up; agent detail loads per area on demand
+    data = HierarchyPerformanceService.get_division_head_performance(division_head_id, user.get('company_id'))
+    if not data:
         return JsonResponse({'error': 'Division Head not found'}, status=404)
     
-    # Get area managers under this division
-    area_managers = AreaManager.get_by_division_head(division_head_id)
-    
-    # Calculate division-wide metrics
-    total_sales = 0
-    total_target = 0
-    total_agents = 0
-    
+    return render(request, 'division_head_dashboard.html', _division_dashboard_context(user, data))
+
+
+def _division_dashboard_context(user, data):
+    """Template context for division_head_dashboard.html from a division roll-up"""
     managers_with_data = []
-    
-    for manager in area_managers:
-        manager_id = manager['_id']
-        
-        # Get agents under this manager
-        agents = Agent.get_by_area_manager(manager_id)
-        agent_count = len(agents)
-        total_agents += agent_count
-        
-        # Calculate manager's team performance
-        manager_sales = 0
-        manager_target = 0
-        
-        for agent in agents:
-            agent_id = agent['_id']
-            perf = PerformanceService.get_agent_performance(agent_id, company_id)
-            manager_sales += perf.get('total_sales', 0)
-            manager_target += agent.get('monthly_target', 0)
-        
-        total_sales += manager_sales
-        total_target += manager_target
-        
-        manager_achievement = (manager_sales / manager_target * 100) if manager_target > 0 else 0
-        
-        # Add data to manager
-        manager_data = dict(manager)
-        manager_data['agent_count'] = agent_count
-        manager_data['sales'] = manager_sales
-        manager_data['target'] = manager_target
-        manager_data['achievement'] = manager_achievement
+    for area in data['areas']:
+        manager_data = dict(area['manager'])
+        manager_data['manager_id'] = area['manager_id']
+        manager_data['agent_count'] = area['summary']['total_agents']
+        manager_data['sales'] = area['summary']['total_sales']
+        manager_data['target'] = area['summary']['total_target']
+        manager_data['achievement'] = area['summary']['achievement_percentage']
         managers_with_data.append(manager_data)
     
-    achievement_rate = (total_sales / total_target * 100) if total_target > 0 else 0
-    
+    summary = data['summary']
     performance_data = {
-        'total_area_managers': len(area_managers),
-        'total_agents': total_agents,
-        'total_sales': total_sales,
-        'total_target': total_target,
-        'achievement_rate': achievement_rate,
+        'total_area_managers': summary['total_areas'],
+        'total_agents': summary['total_agents'],
+        'total_sales': summary['total_sales'],
+        'total_target': summary['total_target'],
+        'achievement_rate': summary['achievement_percentage'],
         'top_agents': []  # Could add top performing agents across division
     }
     
-    context = {
+    return {
         'user': user,
-        'division_head': division_head,
+        'division_head': data['division_head'],
         'area_managers': managers_with_data,
         'performance': performance_data
     }
-    
-    return render(request, 'division_head_dashboard.html', context)
 
 
 def company_admin_dashboard(request):
@@ -478,92 +466,28 @@ def dashboard(request):
                 trial_enabled=True
             )
         
-        # Get all organizational data
-        agents = Agent.get_all(company_id)
-        area_managers = AreaManager.get_all(company_id)
-        division_heads = DivisionHead.get_all(company_id)
-        
-        # Calculate company-wide statistics
-        total_sales = 0
-        total_target = 0
-        total_leads = 0
-        
-        high_risk_agents = 0
-        medium_risk_agents = 0
-        low_risk_agents = 0
-        
-        agent_data_list = []
-        
-        for agent in agents:
-            agent_id = agent['_id']
-            
-            # Get performance
-            performance = PerformanceService.get_agent_performance(agent_id, company_id)
-            total_sales += performance.get('total_sales', 0)
-            total_target += agent.get('monthly_target', 0)
-            
-            # Get prediction
-            try:
-                prediction = PredictorService.predict_agent(agent_id)
-                risk_level = prediction.get('risk_level', 'UNKNOWN')
-                
-                if risk_level == 'HIGH':
-                    high_risk_agents += 1
-                elif risk_level == 'MEDIUM':
-                    medium_risk_agents += 1
-                elif risk_level == 'LOW':
-                    low_risk_agents += 1
-            except:
-                prediction = {'risk_level': 'UNKNOWN', 'confidence': 0}
-            
-            agent_data_list.append({
-                'agent': agent,
-                'performance': performance,
-                'prediction': prediction
-            })
-        
-        # Get leads count
-        from core.database import db
-        total_leads = db.leads.count_documents({"company_id": company_id})
-        total_sales_count = db.sales.count_documents({"company_id": company_id})
-        
-        # Calculate achievement rate
-        achievement_rate = (total_sales / total_target * 100) if total_target > 0 else 0
+        # Organization-wide numbers are shared between requests (ResultCache)
+        data = ResultCache.get_or_compute(
+            'company_stats', company_id, company_id,
+            PerformanceService.get_current_month_range()[0].strftime('%Y-%m'),
+            lambda: _compute_company_dashboard(company_id)
+        )
         
         # Calculate monthly cost
         try:
             monthly_cost = Subscription.calculate_monthly_cost(company_id)
         except:
             # If calculation fails, use agent count * price per agent
-            monthly_cost = len(agents) * Subscription.PRICE_PER_AGENT
-        
-        # Sort agents by risk
-        risk_order = {'HIGH': 0, 'MEDIUM': 1, 'LOW': 2, 'UNKNOWN': 3}
-        agent_data_list.sort(key=lambda x: risk_order.get(x['prediction']['risk_level'], 999))
-        
-        # Get recent activity (last 5 sales)
-        recent_sales = list(db.sales.find({"company_id": company_id}).sort("date", -1).limit(5))
+            monthly_cost = data['stats']['total_agents'] * Subscription.PRICE_PER_AGENT
         
         context = {
             'user': user,
             'company': company,
             'subscription': subscription,
             'monthly_cost': monthly_cost,
-            'stats': {
-                'total_agents': len(agents),
-                'total_area_managers': len(area_managers),
-                'total_division_heads': len(division_heads),
-                'total_sales': total_sales,
-                'total_target': total_target,
-                'achievement_rate': achievement_rate,
-                'total_leads': total_leads,
-                'total_sales_count': total_sales_count,
-                'high_risk_agents': high_risk_agents,
-                'medium_risk_agents': medium_risk_agents,
-                'low_risk_agents': low_risk_agents
-            },
-            'agents': agent_data_list[:10],  # Show top 10 agents
-            'recent_sales': recent_sales
+            'stats': data['stats'],
+            'agents': data['agents'],
+            'recent_sales': data['recent_sales']
         }
         
         return render(request, 'company_admin_dashboard.html', context)
@@ -602,27 +526,132 @@ def dashboard(request):
         return render(request, 'company_admin_dashboard.html', error_details)
 
 
+def _compute_company_dashboard(company_id):
+    """
+    Company-wide statistics, top agents and recent sales for the admin dashboard
+    (uncached - see dashboard)
+    """
+    from core.database import db
+    
+    # Get all organizational data
+    graph = OrgGraph.for_company(company_id)
+    agents = list(graph.agents.values())
+    total_area_managers = len(graph.area_managers)
+    total_division_heads = len(graph.division_heads)
+    
+    # Calculate company-wide statistics
+    total_sales = 0
+    total_target = 0
+    
+    high_risk_agents = 0
+    medium_risk_agents = 0
+    low_risk_agents = 0
+    
+    agent_data_list = []
+    
+    # Month metrics for every agent in one query, predictions in one batch
+    start_date, end_date = PerformanceService.get_current_month_range()
+    metrics_by_agent = MetricsEngine.get_month_metrics_for_agents(
+        [agent['_id'] for agent in agents], start_date
+    )
+    try:
+        predictions = PredictorService.predict_batch(agents, metrics_by_agent)
+    except:
+        predictions = {}
+    
+    for agent in agents:
+        agent_id = agent['_id']
+        
+        # Get performance
+        metrics = metrics_by_agent.get(agent_id, MetricsEngine.empty_metrics())
+        performance = PerformanceService.build_performance(agent, metrics, start_date)
+        total_sales += performance.get('total_sales', 0)
+        total_target += agent.get('monthly_target', 0)
+        
+        # Get prediction
+        prediction = predictions.get(agent_id)
+        if prediction:
+            risk_level = prediction.get('risk_level', 'UNKNOWN')
+            
+            if risk_level == 'HIGH':
+                high_risk_agents += 1
+            elif risk_level == 'MEDIUM':
+                medium_risk_agents += 1
+            elif risk_level == 'LOW':
+                low_risk_agents += 1
+        else:
+            prediction = {'risk_level': 'UNKNOWN', 'confidence': 0}
+        
+        agent_data_list.append({
+            'agent': agent,
+            'performance': performance,
+            'prediction': prediction
+        })
+    
+    # Get leads count
+    total_leads = db.leads.count_documents({"company_id": company_id})
+    total_sales_count = db.sales.count_documents({"company_id": company_id})
+    
+    # Calculate achievement rate
+    achievement_rate = (total_sales / total_target * 100) if total_target > 0 else 0
+    
+    # Sort agents by risk
+    risk_order = {'HIGH': 0, 'MEDIUM': 1, 'LOW': 2, 'UNKNOWN': 3}
+    agent_data_list.sort(key=lambda x: risk_order.get(x['prediction']['risk_level'], 999))
+    
+    # Get recent activity (last 5 sales)
+    recent_sales = list(db.sales.find({"company_id": company_id}).sort("date", -1).limit(5))
+    
+    return {
+        'stats': {
+            'total_agents': len(agents),
+            'total_area_managers': total_area_managers,
+            'total_division_heads': total_division_heads,
+            'total_sales': total_sales,
+            'total_target': total_target,
+            'achievement_rate': achievement_rate,
+            'total_leads': total_leads,
+            'total_sales_count': total_sales_count,
+            'high_risk_agents': high_risk_agents,
+            'medium_risk_agents': medium_risk_agents,
+            'low_risk_agents': low_risk_agents
+        },
+        'agents': agent_data_list[:10],  # Show top 10 agents
+        'recent_sales': recent_sales
+    }
+
 def agent_detail(request, agent_id):
     """
     Detailed view for a specific agent with sales funnel analysis
     """
     try:
-        agent = Agent.get(agent_id)
+        # One context per request: agent, metrics, funnel and prediction are computed once
+        context = AnalyticsContext()
+        
+        # Company users only see agents within their own part of the hierarchy
+        user = getattr(request, 'user', None) or {}
+        if user.get('company_id'):
+            graph = OrgGraph.for_company(user['company_id'])
+            if not graph.can_access_agent(user, agent_id):
+                return render(request, 'agent_detail.html', {'error': 'Agent not found'})
+            context.prime_agents([graph.get_agent(agent_id)])
+        
+        agent = context.get_agent(agent_id)
         
         if not agent:
             return render(request, 'agent_detail.html', {'error': 'Agent not found'})
         
         # Get performance data
-        performance = PerformanceService.get_agent_performance(agent_id)
+        performance = PerformanceService.get_agent_performance(agent_id, context=context)
         
         # Get prediction with funnel insights
         try:
-            prediction = PredictorService.get_prediction_with_funnel_insights(agent_id)
+            prediction = PredictorService.get_prediction_with_funnel_insights(agent_id, context)
         except:
             prediction = None
         
         # Get sales funnel metrics
-        funnel_metrics = SalesFunnelService.get_funnel_metrics(agent_id)
+        funnel_metrics = SalesFunnelService.get_funnel_metrics(agent_id, context=context)
         
         # Get sales with product details
         sales = Sale.get_by_agent(agent_id)
@@ -682,46 +711,191 @@ def agent_detail(request, agent_id):
 def train_model(request):
     """
     Train the AI model
+    POST queues a background training job and returns its ID; poll
+    training_job_status for progress
+    Company users train their company's model (the global model while the
+    company has too little history); others train the global model
     """
     if request.method == 'POST':
-        try:
-            model, accuracy = AITrainer.train_model()
-            return JsonResponse({
-                'success': True,
-                'accuracy': accuracy,
-                'message': 'Model trained successfully!'
-            })
-        except Exception as e:
-            return JsonResponse({
-                'success': False,
-                'error': str(e)
-            }, status=500)
+        return _submit_training_job(request)
     
     return render(request, 'train_model.html')
 
 
+@require_role(User.ROLE_COMPANY_ADMIN)
+def _submit_training_job(request):
+    """Queue a training job (company admins and super admins only)"""
+    try:
+        user = getattr(request, 'user', None) or {}
+        job = TrainingJobRunner.submit(
+            requested_by=user.get('_id'),
+            company_id=user.get('company_id')
+        )
+        return JsonResponse({
+            'success': True,
+            'job_id': job['_id'],
+            'status': job['status'],
+            'message': 'Training started'
+        }, status=202)
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=500)
+
+
+def training_job_status(request, job_id):
+    """
+    API endpoint to poll a background training job
+    """
+    job = TrainingJob.get(job_id)
+    user = getattr(request, 'user', None) or {}
+    
+    # Company users only see their own company's jobs
+    if not job or (user.get('company_id') and job.get('company_id') != user.get('company_id')):
+        return JsonResponse({'success': False, 'error': 'Training job not found'}, status=404)
+    
+    return JsonResponse({
+        'success': True,
+        'job': TrainingJob.to_dict(job)
+    })
+
+
+API_AGENT_FIELDS = ('agent', 'performance', 'prediction')
+
+
+def _agent_api_rows(agents, fields):
+    """
+    API rows for a batch of agents (one metrics query, one prediction batch)
+    Only the requested sections are computed
+    """
+    metrics_by_agent = {}
+    start_date, end_date = PerformanceService.get_current_month_range()
+    if 'performance' in fields or 'prediction' in fields:
+        metrics_by_agent = MetricsEngine.get_month_metrics_for_agents(
+            [agent['_id'] for agent in agents], start_date
+        )
+    
+    predictions = {}
+    if 'prediction' in fields:
+        try:
+            predictions = PredictorService.predict_batch(agents, metrics_by_agent)
+        except:
+            predictions = {}
+    
+    rows = []
+    for agent in agents:
+        row = {'agent_id': agent['_id']}
+        if 'agent' in fields:
+            row['agent'] = agent
+        if 'performance' in fields:
+            metrics = metrics_by_agent.get(agent['_id'], MetricsEngine.empty_metrics())
+            row['performance'] = PerformanceService.build_performance(agent, metrics, start_date)
+        if 'prediction' in fields:
+            row['prediction'] = predictions.get(agent['_id'])
+        rows.append(row)
+    return rows
+
+
+def _stream_agent_rows(company_id, scope, after, batch_size, fields):
+    """NDJSON lines for every agent after the cursor, computed batch by batch"""
+    try:
+        while True:
+            # A fresh keyset query per batch, so a slow reader never holds a server cursor
+            agents = Agent.get_page(company_id, after, batch_size, scope)
+            for row in _agent_api_rows(agents, fields):
+                yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+            if len(agents) < batch_size:
+                return
+            after = agents[-1]['_id']
+    except Exception as e:
+        yield json.dumps({'error': str(e)}) + '\n'
+
+
 def api_agents(request):
     """
-    API endpoint to get all agents with their data
+    API endpoint to get agents with their performance and prediction
+    
+    Query parameters:
+        limit   page size (default API_PAGE_SIZE, at most API_MAX_PAGE_SIZE)
+        cursor  next_cursor of the previous page (keyset on agent _id)
+        fields  comma-separated sections to include: agent, performance, prediction
+        format  'ndjson' streams every agent after the cursor, one JSON object per line
+        company company ID (required for super admins, who belong to no company)
+    
+    Company users only get the agents they may access (see OrgGraph.can_access_agent)
     """
+    from django.conf import settings
+    
     try:
-        agents = Agent.get_all()
-        performances = []
+        user = getattr(request, 'user', None) or {}
+        if user.get('role') == User.ROLE_SUPER_ADMIN:
+            company_id = request.GET.get('company')
+            if not company_id:
+                return JsonResponse({'error': 'company parameter is required'}, status=400)
+        else:
+            company_id = user.get('company_id')
+            if not company_id:
+                return JsonResponse({'error': 'Access denied'}, status=403)
+        scope = OrgGraph.for_company(company_id).agent_query(user)
         
-        for agent in agents:
-            perf = PerformanceService.get_agent_performance(agent['_id'])
-            try:
-                pred = PredictorService.predict_agent(agent['_id'])
-            except:
-                pred = None
-            
-            performances.append({
-                'agent': agent,
-                'performance': perf,
-                'prediction': pred
-            })
+        try:
+            limit = int(request.GET.get('limit', settings.API_PAGE_SIZE))
+        except ValueError:
+            return JsonResponse({'error': 'limit must be an integer'}, status=400)
+        limit = max(1, min(limit, settings.API_MAX_PAGE_SIZE))
+        
+        fields = request.GET.get('fields')
+        fields = [field.strip() for field in fields.split(',') if field.strip()] if fields else list(API_AGENT_FIELDS)
+        unknown = [field for field in fields if field not in API_AGENT_FIELDS]
+        if unknown:
+            return JsonResponse({'error': f"Unknown fields: {', '.join(unknown)}"}, status=400)
+        
+        cursor = request.GET.get('cursor') or None
+        
+        if request.GET.get('format') == 'ndjson':
+            return StreamingHttpResponse(
+                _stream_agent_rows(company_id, scope, cursor, limit, fields),
+                content_type='application/x-ndjson'
+            )
+        
+        # One extra agent tells whether another page follows
+        agents = Agent.get_page(company_id, cursor, limit + 1, scope)
+        has_more = len(agents) > limit
+        agents = agents[:limit]
+        
+        return JsonResponse({
+            'agents': _agent_api_rows(agents, fields),
+            'next_cursor': agents[-1]['_id'] if has_more else None,
+            'has_more': has_more
+        })
+    
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+def api_area_manager_agents(request, manager_id):
+    """
+    API endpoint with the agent cards of one area manager's team
+    Loaded when a manager row is expanded on the division dashboard
+    """
+    try:
+        user = getattr(request, 'user', None) or {}
+        company_id = user.get('company_id')
+        
+        # Company users only see teams within their own part of the hierarchy
+        if company_id and not OrgGraph.for_company(company_id).can_access_area_manager(user, manager_id):
+            return JsonResponse({'error': 'Area Manager not found'}, status=404)
         
-        return JsonResponse({'agents': performances})
+        data = HierarchyPerformanceService.get_area_manager_performance(manager_id, company_id)
+        if not data:
+            return JsonResponse({'error': 'Area Manager not found'}, status=404)
+        
+        return JsonResponse({
+            'manager_id': manager_id,
+            'summary': data['summary'],
+            'agents': data['agents']
+        })
     
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
@@ -732,18 +906,15 @@ def area_manager_dashboard(request, manager_id):
     Dashboard for Area Manager showing their team's performance
     """
     try:
-        # Get area manager performance data
-        data = HierarchyPerformanceService.get_area_manager_performance(manager_id)
+        # Get area manager performance data (agents already sorted by risk, HIGH first)
+        user = getattr(request, 'user', None) or {}
+        data = HierarchyPerformanceService.get_area_manager_performance(manager_id, user.get('company_id'))
         
         if not data:
             return render(request, 'area_manager_dashboard.html', {
                 'error': 'Area Manager not found'
             })
         
-        # Sort agents by risk level (HIGH first)
-        risk_order = {'HIGH': 0, 'MEDIUM': 1, 'LOW': 2, 'UNKNOWN': 3}
-        data['agents'].sort(key=lambda x: risk_order.get(x['prediction']['risk_level'], 999))
-        
         return render(request, 'area_manager_dashboard.html', data)
     
     except Exception as e:
@@ -757,18 +928,16 @@ def division_head_dashboard(request, head_id):
     Dashboard for Division Head showing all areas' performance
     """
     try:
-        # Get division head performance data
-        data = HierarchyPerformanceService.get_division_head_performance(head_id)
+        # Get division head roll-up (areas already sorted by achievement, lowest first)
+        user = getattr(request, 'user', None) or {}
+        data = HierarchyPerformanceService.get_division_head_performance(head_id, user.get('company_id'))
         
         if not data:
             return render(request, 'division_head_dashboard.html', {
                 'error': 'Division Head not found'
             })
         
-        # Sort areas by achievement percentage (lowest first to highlight issues)
-        data['areas'].sort(key=lambda x: x['summary']['achievement_percentage'])
-        
-        return render(request, 'division_head_dashboard.html', data)
+        return render(request, 'division_head_dashboard.html', _division_dashboard_context(getattr(request, 'user', None), data))
     
     except Exception as e:
         return render(request, 'division_head_dashboard.html', {
@@ -781,7 +950,11 @@ def area_managers_list(request):
     List all area managers
     """
     try:
-        managers = AreaManager.get_all()
+        user = getattr(request, 'user', None) or {}
+        if user.get('company_id'):
+            managers = list(OrgGraph.for_company(user['company_id']).area_managers.values())
+        else:
+            managers = AreaManager.get_all()
         # Add manager_id to each manager dict for template
         managers_list = []
         for manager in managers:
@@ -803,7 +976,11 @@ def division_heads_list(request):
     List all division heads
     """
     try:
-        heads = DivisionHead.get_all()
+        user = getattr(request, 'user', None) or {}
+        if user.get('company_id'):
+            heads = list(OrgGraph.for_company(user['company_id']).division_heads.values())
+        else:
+            heads = DivisionHead.get_all()
         # Add head_id to each head dict for template
         heads_list = []
         for head in heads:
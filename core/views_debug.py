@@ -0,0 +1,74 @@
+"""
+Operational endpoints for sizing and diagnosing the deployment (super admin
+only, except the token-protected Prometheus scrape at /metrics)
+Figures are per worker process: each request lands on one worker
+"""
+import hmac
+import os
+from datetime import datetime
+from django.conf import settings
+from django.http import Http404, HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+
+from core import metrics as metrics_registry
+from core.database import db
+from core.models import User
+from core.middleware import require_role
+
+
+@csrf_exempt
+@require_role(User.ROLE_SUPER_ADMIN)
+def db_pool_stats(request):
+    """MongoDB connection pool settings and statistics of this worker"""
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+    
+    return JsonResponse(db.pool_stats())
+
+
+@csrf_exempt
+@require_role(User.ROLE_SUPER_ADMIN)
+def query_stats(request):
+    """
+    Slowest MongoDB query shapes and N+1 patterns (shapes repeated within
+    one request) of this worker; ?limit= (default 20). DELETE resets them.
+    """
+    from core.profiling import query_stats as stats
+
+    if request.method == 'DELETE':
+        stats.reset()
+        return JsonResponse({'reset': True})
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+    
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 20)), 500))
+    except ValueError:
+        return JsonResponse({'error': 'limit must be an integer'}, status=400)
+    
+    return JsonResponse({
+        'pid': os.getpid(),
+        'enabled': settings.DB_PROFILER_ENABLED,
+        'since': datetime.fromtimestamp(stats.since).isoformat(timespec='seconds'),
+        'n_plus_one_threshold': settings.DB_PROFILER_N_PLUS_ONE_THRESHOLD,
+        'dropped': stats.dropped,
+        'slowest_shapes': stats.slowest(limit),
+        'n_plus_one': stats.n_plus_one(limit)
+    })
+
+
+def metrics(request):
+    """Prometheus metrics of this worker (text exposition format)"""
+    if not settings.METRICS_ENABLED:
+        raise Http404()
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+    
+    if settings.METRICS_TOKEN:
+        expected = f'Bearer {settings.METRICS_TOKEN}'
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), expected):
+            return JsonResponse({'error': 'Authentication required'}, status=401)
+    elif not settings.DEBUG:
+        raise Http404()
+    
+    return HttpResponse(metrics_registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
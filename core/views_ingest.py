@@ -0,0 +1,116 @@
+"""
+Views for bulk ingestion of activities and sales (e.g. CRM event pushes)
+Uploads are written synchronously by default; with ?mode=queue they are
+appended to the write-behind queue (core.ingest_queue) and acknowledged
+immediately
+"""
+from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+
+from core.ingest_queue import IngestQueue, QueueFull
+from core.models import Activity, Sale, User
+from core.middleware import require_role
+from core.utils.ingestion import detect_format, iter_records
+
+
+def _split_parse_errors(records, errors):
+    """Pass parsed records through, collecting malformed rows into errors"""
+    for row_number, record in enumerate(records, start=1):
+        if isinstance(record, Exception):
+            errors.append({'row': row_number, 'id': None, 'error': str(record)})
+        else:
+            yield record
+
+
+def _enqueue(request, kind, company_id, fmt):
+    """Queue an upload for the background writer (202 Accepted)"""
+    errors = []
+    try:
+        queued = IngestQueue.enqueue(kind, company_id, _split_parse_errors(iter_records(request, fmt), errors))
+    except QueueFull as e:
+        # Backpressure: the client should retry after the writer catches up
+        response = JsonResponse({'error': 'Ingestion queue is full', 'message': str(e)}, status=503)
+        response['Retry-After'] = '30'
+        return response
+    
+    return JsonResponse({
+        'success': not errors,
+        'queued': queued,
+        'error_count': len(errors),
+        'errors': errors[:settings.INGEST_MAX_REPORTED_ERRORS]
+    }, status=202)
+
+
+def _ingest(request, model, kind):
+    """
+    Stream the request body (NDJSON or CSV) into model.bulk_create
+    Returns counts and up to INGEST_MAX_REPORTED_ERRORS per-row errors
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+    
+    company_id = request.user.get('company_id')
+    if not company_id:
+        return JsonResponse({'error': 'No company associated'}, status=400)
+    
+    fmt = detect_format(request.content_type, request.GET.get('format'))
+    if fmt is None:
+        return JsonResponse({
+            'error': 'Unsupported format',
+            'message': 'Send text/csv or application/x-ndjson (or pass ?format=csv|ndjson)'
+        }, status=415)
+    
+    if request.GET.get('mode') == 'queue':
+        return _enqueue(request, kind, company_id, fmt)
+    
+    try:
+        # The request is read line by line; the upload is never loaded whole
+        result = model.bulk_create(company_id, iter_records(request, fmt))
+    except Exception as e:
+        return JsonResponse({
+            'error': 'Ingestion failed',
+            'message': str(e)
+        }, status=500)
+    
+    errors = result['errors']
+    return JsonResponse({
+        'success': not errors,
+        'received': result['received'],
+        'inserted': result['inserted'],
+        'duplicates': result['duplicates'],
+        'error_count': len(errors),
+        'errors': errors[:settings.INGEST_MAX_REPORTED_ERRORS]
+    })
+
+
+@csrf_exempt
+@require_role(User.ROLE_COMPANY_ADMIN)
+def ingest_activities(request):
+    """Bulk create activities (admin only)"""
+    return _ingest(request, Activity, 'activity')
+
+
+@csrf_exempt
+@require_role(User.ROLE_COMPANY_ADMIN)
+def ingest_sales(request):
+    """Bulk create sales (admin only)"""
+    return _ingest(request, Sale, 'sale')
+
+
+@csrf_exempt
+@require_role(User.ROLE_COMPANY_ADMIN)
+def ingest_status(request):
+    """Queued and dead-lettered events of the company (admin only)"""
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+    
+    company_id = request.user.get('company_id')
+    if not company_id:
+        return JsonResponse({'error': 'No company associated'}, status=400)
+    
+    return JsonResponse({
+        'pending': IngestQueue.pending_count(company_id),
+        'dead_letters': IngestQueue.dead_letter_count(company_id),
+        'recent_dead_letters': IngestQueue.get_dead_letters(company_id, limit=50)
+    })
@@ -4,6 +4,7 @@ Views for database setup via web interface
 from django.http import JsonResponse, HttpResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
+from django.conf import settings
 from datetime import datetime
 from core.utils.sample_data import create_sample_data, clear_all_data
 from core.utils.banking_products_data import create_banking_products, create_sample_leads_and_sales
@@ -23,6 +24,8 @@ def setup_database(request):
     Usage:
     GET/POST to: /setup-database/?key=YOUR_SETUP_KEY
     Or: /setup-database/?key=YOUR_SETUP_KEY&clear=true
+    Optional: &scale=N (N copies of the demo organisation, up to
+    SETUP_MAX_SCALE), &company=COMPANY_ID, &seed=N
     """
     
     # Security check - require setup key from environment
@@ -39,8 +42,23 @@ def setup_database(request):
     # Check if should clear data
     should_clear = request.GET.get('clear', '').lower() == 'true'
     
+    company_id = request.GET.get('company') or settings.DEMO_COMPANY_ID
+    try:
+        scale = int(request.GET.get('scale', 1))
+        seed = int(request.GET['seed']) if request.GET.get('seed') else None
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'scale and seed must be integers'}, status=400)
+    if not 1 <= scale <= settings.SETUP_MAX_SCALE:
+        return JsonResponse({
+            'success': False,
+            'error': f'scale must be between 1 and {settings.SETUP_MAX_SCALE}',
+            'message': 'Use `python manage.py setup_demo --scale N` for larger load-test data'
+        }, status=400)
+    
     results = {
         'success': True,
+        'company_id': company_id,
+        'scale': scale,
         'steps': []
     }
     
@@ -65,8 +83,9 @@ def setup_database(request):
             'status': 'started'
         })
         try:
-            create_sample_data()
+            seeded = create_sample_data(company_id, scale=scale, seed=seed)
             results['steps'][-1]['status'] = 'completed'
+            results['steps'][-1]['seconds'] = round(seeded['seconds'], 2)
             results['steps'][-1]['counts'] = {
                 'division_heads': db.division_heads.count_documents({}),
                 'area_managers': db.area_managers.count_documents({}),
@@ -87,7 +106,7 @@ def setup_database(request):
             'status': 'started'
         })
         try:
-            create_banking_products()
+            create_banking_products(company_id)
             results['steps'][-1]['status'] = 'completed'
             results['steps'][-1]['counts'] = {
                 'products': db.products.count_documents({})
@@ -105,8 +124,9 @@ def setup_database(request):
             'status': 'started'
         })
         try:
-            create_sample_leads_and_sales()
+            seeded = create_sample_leads_and_sales(company_id, seed=seed)
             results['steps'][-1]['status'] = 'completed'
+            results['steps'][-1]['seconds'] = round(seeded['seconds'], 2)
             results['steps'][-1]['counts'] = {
                 'leads': db.leads.count_documents({}),
                 'sales': db.sales.count_documents({})
@@ -0,0 +1,23 @@
+"""
+Gunicorn configuration (read automatically from the working directory)
+Workers and threads come from the command line (Procfile / render.yaml);
+size MONGODB_MAX_POOL_SIZE to the threads per worker plus background threads
+"""
+
+
+def post_fork(server, worker):
+    """Drop a MongoDB client inherited from the master (e.g. one created by --preload)"""
+    from core.database import db
+    db.reset()
+
+
+def post_worker_init(worker):
+    """Open MongoDB connections before the worker takes requests"""
+    from core.database import db
+    try:
+        stats = db.warm_pool()
+        print(f"🔌 Worker {stats['pid']}: {stats['open_connections']} MongoDB connections ready "
+              f"(pool max {stats['max_pool_size']})")
+    except Exception as e:
+        # The pool fills on demand instead
+        print(f"⚠️  Could not warm the MongoDB pool: {e}")
@@ -32,6 +32,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost, so the latency and MongoDB cost of every other middleware is counted
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.QueryProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # For static files in production
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -40,10 +43,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    # Custom middleware for multi-tenant SaaS
-    'core.middleware.AuthenticationMiddleware',
-    'core.middleware.MultiTenantMiddleware',
-    'core.middleware.SubscriptionMiddleware',
+    # Custom middleware for multi-tenant SaaS: user, subscription and company in one pass
+    'core.middleware.TenancyMiddleware',
 ]
 
 ROOT_URLCONF = 'salesAI.urls'
@@ -73,6 +74,147 @@ DATABASES = {}
 MONGODB_URI = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
 MONGODB_NAME = 'sales_ai'
 
+# MongoDB connection pool (per process, see core.database). Size
+# MONGODB_MAX_POOL_SIZE to the gunicorn threads per worker plus background
+# threads (training jobs, ingestion writer); a request waits up to
+# MONGODB_WAIT_QUEUE_TIMEOUT_MS for a free connection. /api/debug/db-pool/
+# shows checkout waits.
+MONGODB_MAX_POOL_SIZE = int(os.getenv('MONGODB_MAX_POOL_SIZE', '10'))
+MONGODB_MIN_POOL_SIZE = int(os.getenv('MONGODB_MIN_POOL_SIZE', '0'))
+MONGODB_MAX_IDLE_TIME_MS = int(os.getenv('MONGODB_MAX_IDLE_TIME_MS', '300000'))
+MONGODB_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv('MONGODB_WAIT_QUEUE_TIMEOUT_MS', '10000'))
+MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGODB_SERVER_SELECTION_TIMEOUT_MS', '10000'))
+MONGODB_CONNECT_TIMEOUT_MS = int(os.getenv('MONGODB_CONNECT_TIMEOUT_MS', '20000'))
+MONGODB_SOCKET_TIMEOUT_MS = int(os.getenv('MONGODB_SOCKET_TIMEOUT_MS', '20000'))
+# Connections a gunicorn worker opens before taking requests (gunicorn.conf.py)
+MONGODB_WARM_CONNECTIONS = int(os.getenv('MONGODB_WARM_CONNECTIONS', '2'))
+# Read preference (e.g. primaryPreferred) and write concern (e.g. 1, majority);
+# unset keeps the MONGODB_URI options and server defaults
+MONGODB_READ_PREFERENCE = os.getenv('MONGODB_READ_PREFERENCE') or None
+MONGODB_WRITE_CONCERN = os.getenv('MONGODB_WRITE_CONCERN') or None
+MONGODB_JOURNAL = {'True': True, 'False': False}.get(os.getenv('MONGODB_JOURNAL', ''))
+
+# Analytics reads (core.database db.analytics: metrics aggregations, rollup
+# scans, training extraction) go to secondaries when the deployment is a
+# replica set; writes always go to the primary. Secondaries lag behind, so
+# dashboards can be up to MONGODB_ANALYTICS_MAX_STALENESS_SECONDS (min 90,
+# -1 for no bound) plus RESULT_CACHE_TTL_SECONDS behind the primary. Set the
+# read preference to primary to turn routing off; tags (e.g.
+# nodeType:ANALYTICS for Atlas analytics nodes) restrict which secondaries
+# serve them. `manage.py local_replica_set` runs a replica set to test with.
+MONGODB_ANALYTICS_READ_PREFERENCE = os.getenv('MONGODB_ANALYTICS_READ_PREFERENCE', 'secondaryPreferred')
+MONGODB_ANALYTICS_MAX_STALENESS_SECONDS = int(os.getenv('MONGODB_ANALYTICS_MAX_STALENESS_SECONDS', '120'))
+MONGODB_ANALYTICS_TAGS = os.getenv('MONGODB_ANALYTICS_TAGS', '')
+
+# Create the indexes declared on core.models at web server startup (idempotent)
+MONGODB_ENSURE_INDEXES = os.getenv('MONGODB_ENSURE_INDEXES', 'True') == 'True'
+
+# Background model training (core.ai.jobs)
+TRAINING_JOB_WORKERS = int(os.getenv('TRAINING_JOB_WORKERS', '1'))
+# A queued/running job not updated for this long is treated as dead
+TRAINING_JOB_STALE_SECONDS = int(os.getenv('TRAINING_JOB_STALE_SECONDS', '1800'))
+
+# Versioned model registry (core.ai.registry)
+MODEL_REGISTRY_DIR = os.getenv('MODEL_REGISTRY_DIR', str(BASE_DIR / 'core' / 'ai' / 'models'))
+MODEL_REGISTRY_KEEP = int(os.getenv('MODEL_REGISTRY_KEEP', '5'))  # Versions kept on disk
+# How often PredictorService checks the registry for a newly published model
+MODEL_RELOAD_CHECK_SECONDS = float(os.getenv('MODEL_RELOAD_CHECK_SECONDS', '5'))
+# Memory budget for loaded models per process (global + per-company, LRU-evicted;
+# measured from the loaded models' arrays, which every process holds privately)
+MODEL_CACHE_MAX_BYTES = int(os.getenv('MODEL_CACHE_MAX_BYTES', str(512 * 1024 * 1024)))
+# Agent-months with activity a company needs before it gets its own model
+# (until then /train/ trains the global model instead)
+TENANT_MODEL_MIN_SAMPLES = int(os.getenv('TENANT_MODEL_MIN_SAMPLES', '60'))
+
+# Authentication cache (core.auth_cache)
+AUTH_CACHE_TTL_SECONDS = float(os.getenv('AUTH_CACHE_TTL_SECONDS', '30'))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv('AUTH_CACHE_MAX_ENTRIES', '10000'))
+# last_login updates are batched and written this often
+LAST_LOGIN_FLUSH_SECONDS = float(os.getenv('LAST_LOGIN_FLUSH_SECONDS', '30'))
+
+# Django cache framework (used by the result cache when RESULT_CACHE_BACKEND=django)
+# Use a file-based cache to share entries between worker processes, e.g.
+# DJANGO_CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('DJANGO_CACHE_LOCATION', 'salesai-results'),
+    }
+}
+
+# Dashboard result cache (core.cache.ResultCache): 'lru' (in-process) or 'django'
+RESULT_CACHE_BACKEND = os.getenv('RESULT_CACHE_BACKEND', 'lru')
+RESULT_CACHE_ALIAS = os.getenv('RESULT_CACHE_ALIAS', 'default')
+RESULT_CACHE_TTL_SECONDS = float(os.getenv('RESULT_CACHE_TTL_SECONDS', '300'))
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv('RESULT_CACHE_MAX_ENTRIES', '1000'))
+
+# Paginated API endpoints (e.g. /api/agents/?limit=)
+API_PAGE_SIZE = int(os.getenv('API_PAGE_SIZE', '100'))
+API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', '500'))
+
+# Bulk ingestion (/api/ingest/...): rows per insert_many, and how many
+# per-row errors a response lists (all are counted)
+INGEST_BATCH_SIZE = int(os.getenv('INGEST_BATCH_SIZE', '1000'))
+INGEST_MAX_REPORTED_ERRORS = int(os.getenv('INGEST_MAX_REPORTED_ERRORS', '1000'))
+
+# Write-behind ingestion queue (core.ingest_queue, ?mode=queue uploads)
+INGEST_QUEUE_PATH = os.getenv('INGEST_QUEUE_PATH', str(BASE_DIR / 'data' / 'ingest_queue.sqlite3'))
+# 'thread' drains the queue from each web process; 'off' leaves it to
+# `python manage.py process_ingest_queue`
+INGEST_QUEUE_WRITER = os.getenv('INGEST_QUEUE_WRITER', 'thread')
+INGEST_QUEUE_BATCH_SIZE = int(os.getenv('INGEST_QUEUE_BATCH_SIZE', '1000'))
+# Uploads are refused (503) while this many events are waiting
+INGEST_QUEUE_MAX_PENDING = int(os.getenv('INGEST_QUEUE_MAX_PENDING', '200000'))
+INGEST_QUEUE_POLL_SECONDS = float(os.getenv('INGEST_QUEUE_POLL_SECONDS', '1'))
+INGEST_QUEUE_LEASE_SECONDS = float(os.getenv('INGEST_QUEUE_LEASE_SECONDS', '300'))
+INGEST_QUEUE_RETRY_SECONDS = float(os.getenv('INGEST_QUEUE_RETRY_SECONDS', '5'))
+INGEST_QUEUE_MAX_ATTEMPTS = int(os.getenv('INGEST_QUEUE_MAX_ATTEMPTS', '8'))
+
+# Demo and load-test seeding (core.utils.bulk_seed): the company demo data
+# belongs to, documents per insert_many, and the largest ?scale= accepted by
+# /setup-database/ (use `python manage.py setup_demo --scale` beyond that)
+DEMO_COMPANY_ID = os.getenv('DEMO_COMPANY_ID', 'COMP-TEST001')
+SEED_BATCH_SIZE = int(os.getenv('SEED_BATCH_SIZE', '5000'))
+SETUP_MAX_SCALE = int(os.getenv('SETUP_MAX_SCALE', '20'))
+
+# MongoDB query profiling (core.profiling): per-request totals in a
+# Server-Timing header and a JSON line on the core.profiling logger, and per
+# query shape for /api/debug/queries/. A shape run at least
+# DB_PROFILER_N_PLUS_ONE_THRESHOLD times in one request is an N+1 candidate.
+# The header goes to super admins and in DEBUG only, unless
+# DB_PROFILER_SERVER_TIMING sends it on every response (including public pages)
+DB_PROFILER_ENABLED = os.getenv('DB_PROFILER_ENABLED', 'True') == 'True'
+DB_PROFILER_SERVER_TIMING = os.getenv('DB_PROFILER_SERVER_TIMING', 'False') == 'True'
+DB_PROFILER_N_PLUS_ONE_THRESHOLD = int(os.getenv('DB_PROFILER_N_PLUS_ONE_THRESHOLD', '5'))
+DB_PROFILER_MAX_SHAPES = int(os.getenv('DB_PROFILER_MAX_SHAPES', '500'))
+DB_PROFILER_MAX_SHAPE_LENGTH = int(os.getenv('DB_PROFILER_MAX_SHAPE_LENGTH', '1000'))
+
+# Prometheus metrics (core.metrics) at /metrics. Scrapers authenticate with
+# "Authorization: Bearer $METRICS_TOKEN"; without a token the endpoint is only
+# served when DEBUG is on
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Request log lines (JSON) go to stdout: requests with N+1 patterns at WARNING,
+# the rest at INFO (DB_PROFILER_LOG_LEVEL=INFO logs every request)
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'message'},
+    },
+    'loggers': {
+        'core.profiling': {
+            'handlers': ['console'],
+            'level': os.getenv('DB_PROFILER_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -14,3 +14,13 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'salesAI.settings')
 
 application = get_wsgi_application()
+
+# Make sure MongoDB indexes exist before serving traffic
+from django.conf import settings
+
+if settings.MONGODB_ENSURE_INDEXES:
+    from core.models.indexes import ensure_indexes
+    try:
+        ensure_indexes()
+    except Exception as e:
+        print(f"⚠️  Could not ensure MongoDB indexes: {e}")